@@ -21,6 +21,8 @@ if config.config_file_name is not None:
 from app.db import Base
 from app.models.user import User  # noqa
 from app.models.chat import ChatThread, ChatMessage, RoleEnum  # noqa
+from app.models.query_rewrite import QueryRewrite  # noqa
+from app.models.revoked_token import RevokedToken  # noqa
 
 # Get database URL from environment variable
 db_url = os.getenv("SYNC_DATABASE_URL")
@@ -0,0 +1,39 @@
+"""add_chat_messages_thread_index
+
+Revision ID: e82b4f6c3a91
+Revises: d5a3e7b19c40
+Create Date: 2026-10-17 15:40:03.618254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e82b4f6c3a91'
+down_revision: Union[str, None] = 'd5a3e7b19c40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so existing chat traffic is not blocked while a large table is indexed
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_chat_messages_thread_id_created_at_id',
+            'chat_messages',
+            ['thread_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_chat_messages_thread_id_created_at_id',
+            table_name='chat_messages',
+            postgresql_concurrently=True,
+        )
@@ -18,9 +18,142 @@ REFRESH_TOKEN_EXPIRE_DAYS = 7
 # Password Configuration
 PWD_CONTEXT_SCHEMES = ["bcrypt"]
 PWD_CONTEXT_DEPRECATED = "auto"
+# bcrypt cost factor; hashes made with a different cost are transparently rehashed on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads doing bcrypt work; at most this many hashes run at once per worker process
+PASSWORD_HASH_MAX_WORKERS = int(os.getenv("PASSWORD_HASH_MAX_WORKERS", "2"))
+# Hash requests allowed to wait for a thread before new ones are rejected with 503
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+# Authenticated User Cache Configuration
+# Upper bound on how long a change to a user row can go unnoticed by another worker process
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+
+# Access Token Validation Configuration
+# "stateless" trusts the signed claims plus the in-memory revocation list; "database" loads the user row (cached)
+AUTH_VALIDATION_MODE = os.getenv("AUTH_VALIDATION_MODE", "stateless").lower()
+# Upper bound, besides clock skew, on how long a revocation made by another worker process goes unnoticed
+REVOCATION_SYNC_INTERVAL_SECONDS = int(os.getenv("REVOCATION_SYNC_INTERVAL_SECONDS", "15"))
 
 # Environment
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 
 if ENVIRONMENT == "production" and JWT_SECRET_KEY == "your-secret-key-change-in-production":
     raise ValueError("JWT_SECRET_KEY must be set in production environment")
+
+# Model Registry Configuration
+MODEL_WARMUP_ENABLED = os.getenv("MODEL_WARMUP_ENABLED", "true").lower() == "true"
+
+# Retrieval Configuration
+# Output size of the OpenAI embedding model, used when the collection has to be created
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "1536"))
+RERANKER_MODEL_NAME = os.getenv("RERANKER_MODEL_NAME", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# "torch" (sentence-transformers on PyTorch) or "onnx-int8" (ONNX Runtime, int8 dynamic quantization)
+RERANKER_BACKEND = os.getenv("RERANKER_BACKEND", "torch")
+RERANKER_ONNX_DIR = os.getenv("RERANKER_ONNX_DIR", "models/ms-marco-MiniLM-L-6-v2-onnx")
+# One of "avx2", "avx512", "avx512_vnni" or "arm64", matching the production CPUs
+RERANKER_ONNX_QUANTIZATION = os.getenv("RERANKER_ONNX_QUANTIZATION", "avx2")
+RERANK_MAX_WORKERS = int(os.getenv("RERANK_MAX_WORKERS", "2"))
+# "dense" (vector search only) or "hybrid" (vector search + BM25 fused with reciprocal rank fusion)
+SEARCH_MODE = os.getenv("SEARCH_MODE", "dense")
+DENSE_CANDIDATE_K = int(os.getenv("DENSE_CANDIDATE_K", "10"))
+HYBRID_DENSE_K = int(os.getenv("HYBRID_DENSE_K", "20"))
+HYBRID_SPARSE_K = int(os.getenv("HYBRID_SPARSE_K", "20"))
+HYBRID_CANDIDATE_K = int(os.getenv("HYBRID_CANDIDATE_K", "6"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+SPARSE_INDEX_PATH = os.getenv("SPARSE_INDEX_PATH", "data/bm25_index.json")
+# "qdrant" (network search) or "faiss" (in-process memory-mapped mirror of the Qdrant collection)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant")
+FAISS_INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "data/faiss/immigration_docs.faiss")
+FAISS_PAYLOAD_PATH = os.getenv("FAISS_PAYLOAD_PATH", "data/faiss/immigration_docs_payloads.sqlite")
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+FAISS_EF_CONSTRUCTION = int(os.getenv("FAISS_EF_CONSTRUCTION", "200"))
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+RERANK_BATCHING_ENABLED = os.getenv("RERANK_BATCHING_ENABLED", "true").lower() == "true"
+RERANK_BATCH_WINDOW_MS = float(os.getenv("RERANK_BATCH_WINDOW_MS", "5"))
+RERANK_MAX_BATCH_SIZE = int(os.getenv("RERANK_MAX_BATCH_SIZE", "64"))
+
+# Embedding Cache Configuration
+EMBEDDING_CACHE_MAX_SIZE = int(os.getenv("EMBEDDING_CACHE_MAX_SIZE", "2048"))
+EMBEDDING_CACHE_TTL_SECONDS = float(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "86400"))
+# Leave empty to keep the cache in memory only
+EMBEDDING_CACHE_DB_PATH = os.getenv("EMBEDDING_CACHE_DB_PATH", "")
+EMBEDDING_CACHE_DB_TTL_SECONDS = float(os.getenv("EMBEDDING_CACHE_DB_TTL_SECONDS", str(30 * 24 * 3600)))
+
+# Semantic Answer Cache Configuration
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAX_SIZE = int(os.getenv("SEMANTIC_CACHE_MAX_SIZE", "1000"))
+SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", str(6 * 3600)))
+SEMANTIC_CACHE_FINGERPRINT_INTERVAL_SECONDS = float(os.getenv("SEMANTIC_CACHE_FINGERPRINT_INTERVAL_SECONDS", "60"))
+
+# Chat Pipeline Configuration
+# "sequential" (rewrite, then retrieve) or "speculative" (retrieve on the raw query while the rewrite runs)
+CHAT_PIPELINE_MODE = os.getenv("CHAT_PIPELINE_MODE", "speculative")
+# Queries with at most this many words and no conversational filler skip the LLM rewrite
+REWRITE_SKIP_MAX_WORDS = int(os.getenv("REWRITE_SKIP_MAX_WORDS", "5"))
+SPECULATIVE_MAX_CANDIDATES = int(os.getenv("SPECULATIVE_MAX_CANDIDATES", "15"))
+
+# Query Rewrite Cache Configuration
+REWRITE_CACHE_ENABLED = os.getenv("REWRITE_CACHE_ENABLED", "true").lower() == "true"
+REWRITE_CACHE_MAX_SIZE = int(os.getenv("REWRITE_CACHE_MAX_SIZE", "4096"))
+REWRITE_CACHE_TTL_SECONDS = float(os.getenv("REWRITE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Keep rewrites in the query_rewrites table so they survive restarts and are shared across workers
+REWRITE_CACHE_PERSISTENT = os.getenv("REWRITE_CACHE_PERSISTENT", "true").lower() == "true"
+
+# Context Packing Configuration
+# Upper bound on the retrieved context placed in the final-answer prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+# Word-shingle Jaccard similarity above which a lower-ranked chunk is dropped as a near-duplicate
+CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.8"))
+CONTEXT_SHINGLE_SIZE = int(os.getenv("CONTEXT_SHINGLE_SIZE", "5"))
+
+# ContextCite Attribution Configuration
+# Refines the citations of each reply in a background CPU process pool after the reply is returned
+CONTEXTCITE_ENABLED = os.getenv("CONTEXTCITE_ENABLED", "false").lower() == "true"
+CONTEXTCITE_MODEL_NAME = os.getenv("CONTEXTCITE_MODEL_NAME", "TinyLlama/TinyLlama-1.1B-Chat-v1.0")
+CONTEXTCITE_MAX_WORKERS = int(os.getenv("CONTEXTCITE_MAX_WORKERS", "1"))
+CONTEXTCITE_TOP_K = int(os.getenv("CONTEXTCITE_TOP_K", "3"))
+# Attribution jobs beyond this many in flight are skipped rather than queued
+CONTEXTCITE_MAX_PENDING = int(os.getenv("CONTEXTCITE_MAX_PENDING", "32"))
+
+# Conversation Memory Configuration
+# Turns (question + answer) sent verbatim; older turns are folded into the thread summary
+HISTORY_MAX_TURNS = int(os.getenv("HISTORY_MAX_TURNS", "3"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1200"))
+# Smaller slice of the history given to the query rewrite to resolve follow-up references
+REWRITE_HISTORY_TOKEN_BUDGET = int(os.getenv("REWRITE_HISTORY_TOKEN_BUDGET", "400"))
+THREAD_SUMMARY_MAX_WORDS = int(os.getenv("THREAD_SUMMARY_MAX_WORDS", "200"))
+THREAD_SUMMARY_MODEL = os.getenv("THREAD_SUMMARY_MODEL", "gpt-3.5")
+
+# Chat Message Sink Configuration
+# Messages are written behind the request in batches of up to this size...
+MESSAGE_SINK_BATCH_SIZE = int(os.getenv("MESSAGE_SINK_BATCH_SIZE", "100"))
+# ...and at least this often
+MESSAGE_SINK_FLUSH_INTERVAL_MS = float(os.getenv("MESSAGE_SINK_FLUSH_INTERVAL_MS", "250"))
+MESSAGE_SINK_MAX_RETRIES = int(os.getenv("MESSAGE_SINK_MAX_RETRIES", "3"))
+
+# PDF Ingestion Pipeline Configuration
+# Processes extracting page text; each job covers INGEST_PAGES_PER_TASK pages
+INGEST_EXTRACT_WORKERS = int(os.getenv("INGEST_EXTRACT_WORKERS", "2"))
+INGEST_PAGES_PER_TASK = int(os.getenv("INGEST_PAGES_PER_TASK", "8"))
+# Chunks embedded and upserted per call, and how many such calls run at once
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+INGEST_MAX_INFLIGHT_BATCHES = int(os.getenv("INGEST_MAX_INFLIGHT_BATCHES", "4"))
+# Extracted pages allowed to wait for chunking before extraction pauses
+INGEST_PAGE_QUEUE_SIZE = int(os.getenv("INGEST_PAGE_QUEUE_SIZE", "32"))
+
+# Embedding Scheduler Configuration
+# Token and input limits of one embeddings request
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "20000"))
+EMBEDDING_BATCH_MAX_INPUTS = int(os.getenv("EMBEDDING_BATCH_MAX_INPUTS", "256"))
+# Embedding requests in flight at once per worker process, across all uploads
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+# Keep below the account's tokens-per-minute limit for the embedding model
+EMBEDDING_TOKENS_PER_MINUTE = int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", "1000000"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "6"))
+EMBEDDING_BACKOFF_BASE_SECONDS = float(os.getenv("EMBEDDING_BACKOFF_BASE_SECONDS", "1"))
+EMBEDDING_BACKOFF_MAX_SECONDS = float(os.getenv("EMBEDDING_BACKOFF_MAX_SECONDS", "60"))
+# Progress of interrupted ingestions, so a retry only embeds what is missing; leave empty to disable
+EMBEDDING_CHECKPOINT_DIR = os.getenv("EMBEDDING_CHECKPOINT_DIR", "data/embedding_checkpoints")
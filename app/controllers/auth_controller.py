@@ -29,7 +29,7 @@ class AuthController:
             created_at=current_user.created_at
         )
 
-    async def logout(self, current_user: User) -> dict:
-        """Logout user by invalidating refresh token."""
-        await self.service.logout_user(current_user)
+    async def logout(self, current_user: User, token_claims: dict) -> dict:
+        """Logout user by invalidating refresh token and revoking the access token."""
+        await self.service.logout_user(current_user, token_claims)
         return {"message": "Successfully logged out"} 
\ No newline at end of file
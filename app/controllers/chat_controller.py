@@ -1,12 +1,28 @@
+from typing import Optional
 
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas.chat import ChatCreate
+from app.schemas.search import SearchFilters
 from app.services.chat.chat_service import ChatService
+from app.services.chat.sse import encode_sse_stream
+from app.services.registry.model_registry import ModelRegistry
 
 class ChatController:
-    def __init__(self, db: AsyncSession):
-        self.service = ChatService(db)
+    def __init__(self, db: AsyncSession, registry: ModelRegistry):
+        self.service = ChatService(db, registry)
 
-    async def handle_create_chat(self, thread_id: str, query: str):
-        return await self.service.handle_message(thread_id, query)
\ No newline at end of file
+    async def handle_create_chat(self, thread_id: str, query: str, filters: Optional[SearchFilters] = None):
+        return await self.service.handle_message(thread_id, query, filters)
+
+    async def handle_stream_chat(self, thread_id: str, query: str, filters: Optional[SearchFilters] = None):
+        history = await self.service.start_stream(thread_id, query)
+        return StreamingResponse(
+            encode_sse_stream(self.service.stream_reply(thread_id, query, filters, history)),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def handle_get_message_citations(self, message_id: str):
+        return await self.service.get_message_citations(message_id)
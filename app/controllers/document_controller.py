@@ -1,14 +1,30 @@
-from services.documents.document_service import DocumentService
+from typing import Optional
+
+from app.services.documents.document_service import DocumentService
+from app.services.documents.ingestion_pipeline import IngestionPipeline
+from app.services.search.embedding_scheduler import EmbeddingScheduler
+from app.services.search.qdrant_search_service import QdrantSearchService
 
 
 class DocumentController:
 
-    def __init__(self):
-        self.service = DocumentService()
+    def __init__(
+        self,
+        qdrant_search_service: QdrantSearchService,
+        ingestion_pipeline: Optional[IngestionPipeline] = None,
+        embedding_scheduler: Optional[EmbeddingScheduler] = None,
+    ):
+        self.service = DocumentService(qdrant_search_service, ingestion_pipeline, embedding_scheduler)
 
     def retrieve_collection_info(self):
         return self.service.get_collection_info()
 
 
-    async def upload_pdf(self, file_path: str):
-        return await self.service.handle_upload_pdf_file(file_path)
\ No newline at end of file
+    async def upload_pdf(
+        self,
+        file_path: str,
+        metadata: dict = None,
+        source_name: Optional[str] = None,
+        document_id: Optional[str] = None,
+    ):
+        return await self.service.handle_upload_pdf_file(file_path, metadata, source_name, document_id)
\ No newline at end of file
@@ -0,0 +1,12 @@
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.threads.thread_service import ThreadService
+
+class ThreadController:
+    def __init__(self, db: AsyncSession):
+        self.service = ThreadService(db)
+
+    async def list_messages(self, thread_id: str, limit: int, cursor: Optional[str] = None, newest_first: bool = False):
+        return await self.service.list_messages(thread_id, limit, cursor, newest_first)
@@ -1,20 +1,66 @@
+import asyncio
 from contextlib import asynccontextmanager
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routes import user_routes, chat_routes, documents_routes, auth_routes
+from app.config.config import REVOCATION_SYNC_INTERVAL_SECONDS
+from app.routes import user_routes, chat_routes, documents_routes, auth_routes, metrics_routes
+from app.services.auth.password_hasher import password_hasher
+from app.services.auth.revocation_list import revocation_list
 from app.services.cron_jobs.immi_web_scrape_cron_job import ImmigrationWebScrapeCronJob
+from app.services.registry.model_registry import ModelRegistry
 
 scheduler = AsyncIOScheduler()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load heavy models and clients once per process, off the event loop
+    model_registry = ModelRegistry()
+    await asyncio.to_thread(model_registry.load)
+    await asyncio.to_thread(model_registry.warmup)
+    await model_registry.astart()
+    app.state.model_registry = model_registry
+    print("Model registry loaded...")
+
+    immigration_cron_job = ImmigrationWebScrapeCronJob(model_registry.qdrant_search_service)
+
+    scheduler.add_job(
+        immigration_cron_job.scrape_immigration_info_weekly,
+        trigger=CronTrigger(day_of_week="wed", hour=9, minute=0),
+        id="immigration_weekly_scrape_job",
+        replace_existing=True
+    )
+    # Revocations from other workers reach this process's in-memory list within one interval
+    await revocation_list.sync()
+    scheduler.add_job(
+        revocation_list.sync,
+        trigger=IntervalTrigger(seconds=REVOCATION_SYNC_INTERVAL_SECONDS),
+        id="revocation_list_sync_job",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+    scheduler.start()
+    print("Scheduler started...")
+
+    yield
+
+    scheduler.shutdown()
+    print("Scheduler stopped.")
+
+    await model_registry.aclose()
+    password_hasher.close()
+
 # Initialize FastAPI with metadata for Swagger UI
 app = FastAPI(
     title="Greetli AI Backend",
     description="""
     Greetli AI Backend API with OCR, Langchain, Google Translate, and JWT Authentication capabilities.
-    """
+    """,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -38,26 +84,9 @@ async def health_check():
         "features": ["JWT Authentication", "User Management", "OCR", "AI Integration", "Translation"]
     }
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    immigration_cron_job = ImmigrationWebScrapeCronJob()
-
-    scheduler.add_job(
-        immigration_cron_job.scrape_immigration_info_weekly,
-        trigger=CronTrigger(day_of_week="wed", hour=9, minute=0),
-        id="immigration_weekly_scrape_job",
-        replace_existing=True
-    )
-    scheduler.start()
-    print("Scheduler started...")
-
-    yield
-
-    scheduler.shutdown()
-    print("Scheduler stopped.")
-
 # Include routers
 app.include_router(auth_routes.router)
 app.include_router(user_routes.router)
 app.include_router(chat_routes.router)
-app.include_router(documents_routes.router)
\ No newline at end of file
+app.include_router(documents_routes.router)
+app.include_router(metrics_routes.router)
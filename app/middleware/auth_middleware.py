@@ -3,6 +3,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
+from app.config.config import AUTH_VALIDATION_MODE
 from app.db import get_db
 from app.models.user import User
 from app.services.auth.auth_service import AuthService
@@ -10,19 +11,34 @@ from app.services.auth.auth_service import AuthService
 # Security scheme for Bearer token
 security = HTTPBearer()
 
+async def get_token_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> dict:
+    """
+    Dependency returning the verified, unrevoked claims of the request's access token.
+    Pure CPU work: signature, expiry and the in-memory revocation list.
+    """
+    return AuthService(db=None).decode_access_token(credentials.credentials)
+
+async def _resolve_user(claims: dict, db: AsyncSession) -> User:
+    if AUTH_VALIDATION_MODE == "stateless":
+        user = AuthService.user_from_claims(claims)
+        if user is not None:
+            return user
+    return await AuthService(db).get_user_from_claims(claims)
+
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    claims: dict = Depends(get_token_claims),
     db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     Dependency to get the current authenticated user from JWT token.
     Use this dependency to protect endpoints that require authentication.
+    In stateless mode the user is built from the token claims and no query is made;
+    the returned object then only carries id, email and is_active.
     """
-    auth_service = AuthService(db)
-    
     try:
-        user = await auth_service.get_current_user(credentials.credentials)
-        return user
+        return await _resolve_user(claims, db)
     except HTTPException:
         raise
     except Exception:
@@ -46,6 +62,16 @@ async def get_current_active_user(
         )
     return current_user
 
+async def get_current_db_user(
+    claims: dict = Depends(get_token_claims),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """
+    Dependency to get the current active user as stored, for endpoints that need more than
+    the token claims (e.g. created_at). Served from the user cache or the database in every mode.
+    """
+    return await AuthService(db).get_user_from_claims(claims)
+
 async def get_optional_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
     db: AsyncSession = Depends(get_db)
@@ -57,13 +83,11 @@ async def get_optional_current_user(
     """
     if credentials is None:
         return None
-        
-    auth_service = AuthService(db)
-    
+
     try:
-        user = await auth_service.get_current_user(credentials.credentials)
-        return user
+        claims = AuthService(db).decode_access_token(credentials.credentials)
+        return await _resolve_user(claims, db)
     except HTTPException:
         return None
     except Exception:
-        return None 
\ No newline at end of file
+        return None
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum
 import enum
+from datetime import datetime, timezone
 from uuid import uuid4
 
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -13,21 +13,38 @@ class RoleEnum(str, enum.Enum):
     USER = "user"
     ASSISTANT = "assistant"
 
+class AttributionStatusEnum(str, enum.Enum):
+    PENDING = "pending"
+    READY = "ready"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
 class ChatThread(Base):
     __tablename__ = "chat_threads"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid4()))
     user_id = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Rolling summary of the messages up to summarized_until; newer messages are sent verbatim
+    summary = Column(Text, nullable=True)
+    summarized_until = Column(DateTime(timezone=True), nullable=True)
     messages = relationship("ChatMessage", back_populates="thread", cascade="all, delete")
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # Serves thread history reads and their (created_at, id) keyset pagination
+        Index("ix_chat_messages_thread_id_created_at_id", "thread_id", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid4()))
     thread_id = Column(String, ForeignKey("chat_threads.id", ondelete="CASCADE"))
     role = Column(Enum(RoleEnum), nullable=False)
     content = Column(Text, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set client-side: now() is the transaction start, which would give a question and its answer the same timestamp
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
+    # ContextCite citations computed after the reply was sent; NULL when attribution is disabled
+    attribution_status = Column(Enum(AttributionStatusEnum), nullable=True)
+    attributions = Column(JSON, nullable=True)
 
     thread = relationship("ChatThread", back_populates="messages")
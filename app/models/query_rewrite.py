@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Text, DateTime
+from sqlalchemy.sql import func
+
+from app.db import Base
+
+
+class QueryRewrite(Base):
+    __tablename__ = "query_rewrites"
+
+    cache_key = Column(String, primary_key=True)
+    prompt_version = Column(String, nullable=False, index=True)
+    normalized_query = Column(Text, nullable=False)
+    rewritten_query = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
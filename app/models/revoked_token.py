@@ -0,0 +1,20 @@
+from uuid import uuid4
+
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+
+from app.db import Base
+
+
+class RevokedToken(Base):
+    """
+    A revoked access token (jti set) or every token of a user issued up to revoked_at (user_id only).
+    Rows are only needed until the tokens they cover would have expired anyway.
+    """
+    __tablename__ = "revoked_tokens"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid4()))
+    jti = Column(String, nullable=True, index=True)
+    user_id = Column(String, nullable=True, index=True)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
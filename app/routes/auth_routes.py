@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import get_db
 from app.controllers.auth_controller import AuthController
 from app.schemas.user import UserRegister, UserLogin, Token, RefreshTokenRequest, UserResponse
-from app.middleware.auth_middleware import get_current_active_user
+from app.middleware.auth_middleware import get_current_active_user, get_current_db_user, get_token_claims
 from app.models.user import User
 
 router = APIRouter(
@@ -62,7 +62,7 @@ async def refresh_token(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_db_user)
 ):
     """
     Get current authenticated user profile.
@@ -76,13 +76,14 @@ async def get_current_user(
 @router.post("/logout")
 async def logout(
     current_user: User = Depends(get_current_active_user),
+    claims: dict = Depends(get_token_claims),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Logout current user by invalidating refresh token.
+    Logout current user by invalidating refresh token and revoking the access token.
     
     Requires valid access token in Authorization header:
     Authorization: Bearer <access_token>
     """
     controller = AuthController(db)
-    return await controller.logout(current_user) 
\ No newline at end of file
+    return await controller.logout(current_user, claims) 
\ No newline at end of file
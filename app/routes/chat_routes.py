@@ -1,10 +1,15 @@
 # routers/chat_routes.py
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
+from app.db import get_db, get_read_db
 from app.controllers.chat_controller import ChatController
-from app.schemas.chat import ChatCreate
+from app.controllers.thread_controller import ThreadController
+from app.schemas.chat import ChatCreate, ChatMessagePage
+from app.schemas.search import SearchFilters
+from app.services.registry.model_registry import ModelRegistry, get_model_registry
 
 router = APIRouter(
     prefix="/chat",
@@ -15,7 +20,69 @@ router = APIRouter(
 @router.post("/")
 async def create_new_chat(
     thread_id: str, query: str,
-    db: AsyncSession = Depends(get_db)
+    filters: SearchFilters = Depends(),
+    db: AsyncSession = Depends(get_db),
+    registry: ModelRegistry = Depends(get_model_registry)
+):
+    """
+    Answer a question in a chat thread.
+
+    Optional **topic**, **language**, **canton** and **document_type** filters restrict retrieval
+    to matching documents. **message_id** is null if the reply could not be saved.
+    """
+    controller = ChatController(db, registry)
+    return await controller.handle_create_chat(thread_id, query, filters)
+
+
+@router.post("/stream")
+async def stream_chat(
+    thread_id: str, query: str,
+    filters: SearchFilters = Depends(),
+    db: AsyncSession = Depends(get_db),
+    registry: ModelRegistry = Depends(get_model_registry)
+):
+    """
+    Answer a question in a chat thread as a server-sent-events stream.
+
+    Events: **sources** (retrieved documents, sent before generation starts), **token** (rewritten
+    answer text), **done** (message id, bibliography and cache flag) or **error**, which is also sent
+    instead of **done** when the streamed reply could not be saved.
+    """
+    controller = ChatController(db, registry)
+    return await controller.handle_stream_chat(thread_id, query, filters)
+
+
+@router.get("/messages/{message_id}/citations")
+async def get_message_citations(
+    message_id: str,
+    db: AsyncSession = Depends(get_read_db),
+    registry: ModelRegistry = Depends(get_model_registry)
+):
+    """
+    Refined ContextCite citations of an assistant message.
+
+    **status** is *pending* while attribution is still running, *ready* once **citations** are available,
+    *failed* or *skipped* if none will be computed, and *unavailable* when attribution is disabled.
+    **response** is the reply text the scores were computed for.
+    """
+    controller = ChatController(db, registry)
+    return await controller.handle_get_message_citations(message_id)
+
+
+@router.get("/{thread_id}/messages", response_model=ChatMessagePage)
+async def list_thread_messages(
+    thread_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    newest_first: bool = False,
+    db: AsyncSession = Depends(get_read_db)
 ):
-    controller = ChatController(db)
-    return await controller.handle_create_chat(thread_id, query)
+    """
+    Read back a conversation, one page at a time.
+
+    Messages are ordered by creation time (oldest first unless **newest_first** is set). Pass the
+    returned **next_cursor** as **cursor** to fetch the following page; it is null on the last page.
+    """
+    controller = ThreadController(db)
+    return await controller.list_messages(thread_id, limit, cursor, newest_first)
+
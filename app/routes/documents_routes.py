@@ -2,12 +2,13 @@ import os
 import shutil
 from uuid import uuid4
 
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse
-from typing import List
+from typing import List, Optional
 
 from app.services.documents.document_service import DocumentService
-from controllers.document_controller import DocumentController
+from app.controllers.document_controller import DocumentController
+from app.services.registry.model_registry import ModelRegistry, get_model_registry
 
 router = APIRouter(
     prefix="/documents",
@@ -19,16 +20,24 @@ router = APIRouter(
 async def upload_text_document(
     text: str,
     source: str = "api_upload",
-    topic: str = "general"
+    topic: str = "general",
+    language: Optional[str] = None,
+    canton: Optional[str] = None,
+    document_type: Optional[str] = None,
+    registry: ModelRegistry = Depends(get_model_registry)
 ):
     """Upload a text document to the vector database."""
-    service = DocumentService()
+    service = DocumentService(
+        registry.qdrant_search_service, registry.ingestion_pipeline, registry.embedding_scheduler
+    )
     
     metadata = {
         "source": source,
         "topic": topic,
         "upload_method": "api"
     }
+    filter_metadata = {"language": language, "canton": canton, "document_type": document_type}
+    metadata.update({key: value for key, value in filter_metadata.items() if value is not None})
     
     success = await service.add_text_document(text, metadata)
     
@@ -38,19 +47,36 @@ async def upload_text_document(
         raise HTTPException(status_code=500, detail="Failed to upload document")
 
 @router.get("/collection-info")
-def get_collection_info():
-    controller = DocumentController()
+def get_collection_info(registry: ModelRegistry = Depends(get_model_registry)):
+    controller = DocumentController(registry.qdrant_search_service)
 
     return controller.retrieve_collection_info()
 
 @router.post("/upload-pdf")
-async def upload_pdf(file: UploadFile = File(...)):
+async def upload_pdf(
+    file: UploadFile = File(...),
+    topic: Optional[str] = None,
+    language: Optional[str] = None,
+    canton: Optional[str] = None,
+    document_type: Optional[str] = None,
+    document_id: Optional[str] = None,
+    registry: ModelRegistry = Depends(get_model_registry)
+):
+    """
+    Upload and index a PDF. Uploading the same document again replaces its chunks; a document is identified by
+    document_id when given, else by its file name together with topic, language, canton and document_type.
+    """
     temp_filename = f"/tmp/{uuid4()}_{file.filename}"
     with open(temp_filename, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
 
-    controller = DocumentController()
-    result = await controller.upload_pdf(temp_filename)
+    filter_metadata = {"topic": topic, "language": language, "canton": canton, "document_type": document_type}
+    metadata = {key: value for key, value in filter_metadata.items() if value is not None}
+
+    controller = DocumentController(
+        registry.qdrant_search_service, registry.ingestion_pipeline, registry.embedding_scheduler
+    )
+    result = await controller.upload_pdf(temp_filename, metadata, source_name=file.filename, document_id=document_id)
 
     os.remove(temp_filename)
 
@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Depends
+
+from app.config.config import AUTH_VALIDATION_MODE
+from app.db import pool_stats
+from app.services.auth.password_hasher import password_hasher
+from app.services.auth.revocation_list import revocation_list
+from app.services.auth.user_cache import user_cache
+from app.services.registry.model_registry import ModelRegistry, get_model_registry
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/models")
+async def get_model_metrics(registry: ModelRegistry = Depends(get_model_registry)):
+    """
+    Load time, warmup time and memory footprint of each component in the model registry.
+    """
+    return registry.stats()
+
+@router.get("/caches")
+async def get_cache_metrics(registry: ModelRegistry = Depends(get_model_registry)):
+    """
+    Size and hit/miss counters of the in-process caches.
+    """
+    semantic_cache = registry.semantic_cache
+    rewrite_cache = registry.query_parser.rewrite_cache
+    return {
+        "query_embeddings": registry.embeddings.stats(),
+        "query_rewrites": rewrite_cache.stats() if rewrite_cache else None,
+        "semantic_answers": semantic_cache.stats() if semantic_cache else None,
+        "authenticated_users": user_cache.stats(),
+    }
+
+@router.get("/reranker")
+async def get_reranker_metrics(registry: ModelRegistry = Depends(get_model_registry)):
+    """
+    Batch-size, queue-wait and predict-time histograms of the rerank scheduler.
+    """
+    scheduler = registry.rerank_scheduler
+    if scheduler is None:
+        return {"backend": registry.reranker.backend, "batching_enabled": False}
+    return {"backend": registry.reranker.backend, "batching_enabled": True, **scheduler.stats()}
+
+@router.get("/tasks")
+async def get_task_metrics(registry: ModelRegistry = Depends(get_model_registry)):
+    """
+    Background work queued after replies: ContextCite attribution jobs, thread summary updates
+    and the write-behind chat message sink.
+    """
+    attribution_service = registry.attribution_service
+    return {
+        "background_tasks": registry.background_tasks.stats(),
+        "attribution": attribution_service.stats() if attribution_service else None,
+        "thread_summaries": registry.conversation_memory.stats(),
+        "message_sink": registry.message_sink.stats(),
+    }
+
+@router.get("/ingestion")
+async def get_ingestion_metrics(registry: ModelRegistry = Depends(get_model_registry)):
+    """
+    PDF ingestion totals, pages/s and chunks/s of the last upload, and embed-and-upsert batch times.
+    Embedding scheduler: requests in flight, tokens embedded, rate-limit waits and retries.
+    """
+    return {
+        **registry.ingestion_pipeline.stats(),
+        "embedding_scheduler": registry.embedding_scheduler.stats(),
+    }
+
+@router.get("/db")
+async def get_db_metrics():
+    """
+    Connection pool usage: checked-out and overflow connections, checkout wait time and timeouts, new connection times.
+    """
+    return pool_stats()
+
+@router.get("/auth")
+async def get_auth_metrics():
+    """
+    Password hashing pool: running and queued bcrypt calls, queue wait and hash time, rejections and rehashes.
+    Access token revocation list: revoked tokens and users held in memory and the state of the Postgres sync.
+    """
+    return {
+        "validation_mode": AUTH_VALIDATION_MODE,
+        "password_hashing": password_hasher.stats(),
+        "revocations": revocation_list.stats(),
+    }
+
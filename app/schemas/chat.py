@@ -1,3 +1,5 @@
+from datetime import datetime
+from typing import List, Optional
 from uuid import UUID
 from pydantic import BaseModel
 
@@ -12,4 +14,19 @@ class Chat(ChatBase):
     id: UUID
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class ChatMessageOut(BaseModel):
+    id: str
+    role: str
+    content: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ChatMessagePage(BaseModel):
+    messages: List[ChatMessageOut]
+    # Opaque keyset cursor; pass it back as `cursor` to fetch the next page
+    next_cursor: Optional[str] = None
+    has_more: bool = False
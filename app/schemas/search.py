@@ -0,0 +1,28 @@
+import json
+from typing import Optional
+
+from pydantic import BaseModel
+
+# Metadata keys that can be used to narrow retrieval; each one has a Qdrant payload index
+FILTERABLE_METADATA_FIELDS = ("topic", "language", "canton", "document_type")
+
+
+class SearchFilters(BaseModel):
+    topic: Optional[str] = None
+    language: Optional[str] = None
+    canton: Optional[str] = None
+    document_type: Optional[str] = None
+
+    def as_metadata(self) -> dict:
+        """Only the filters that were actually set, as metadata key/value pairs."""
+        return {key: value for key, value in self.model_dump().items() if value is not None}
+
+    def is_empty(self) -> bool:
+        return not self.as_metadata()
+
+    def matches(self, metadata: dict) -> bool:
+        return all(metadata.get(key) == value for key, value in self.as_metadata().items())
+
+    def cache_scope(self) -> str:
+        """Stable string identifying this filter combination, used to partition caches."""
+        return json.dumps(self.as_metadata(), sort_keys=True) if not self.is_empty() else ""
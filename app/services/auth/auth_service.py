@@ -1,5 +1,7 @@
+from datetime import datetime, timezone
 from typing import Optional
 from fastapi import HTTPException, status
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 import uuid
@@ -7,6 +9,9 @@ import uuid
 from app.models.user import User
 from app.schemas.user import UserRegister, UserLogin, Token, UserResponse
 from app.services.auth.jwt_service import JWTService
+from app.services.auth.password_hasher import password_hasher
+from app.services.auth.revocation_list import revocation_list
+from app.services.auth.user_cache import user_cache
 
 
 class AuthService:
@@ -38,8 +43,8 @@ class AuthService:
                 detail="Email already registered"
             )
 
-        # Hash password
-        hashed_password = self.jwt_service.get_password_hash(user_data.password)
+        # Hash password off the event loop
+        hashed_password = await password_hasher.hash(user_data.password)
 
         # Create user
         user = User(
@@ -50,7 +55,7 @@ class AuthService:
         )
 
         # Create refresh token
-        token_data = self.jwt_service.create_token_pair(str(user.id))
+        token_data = self.jwt_service.create_token_pair(str(user.id), user.email)
         user.refresh_token = token_data["refresh_token"]
 
         # Save to database
@@ -67,8 +72,12 @@ class AuthService:
             return None
         if not user.is_active:
             return None
-        if not self.jwt_service.verify_password(password, user.hashed_password):
+        valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+        if not valid:
             return None
+        if new_hash is not None:
+            # Hashed with an older cost factor; the caller's commit stores the upgraded hash
+            user.hashed_password = new_hash
         return user
 
     async def login_user(self, user_data: UserLogin) -> Token:
@@ -82,7 +91,7 @@ class AuthService:
             )
 
         # Create token pair
-        token_data = self.jwt_service.create_token_pair(str(user.id))
+        token_data = self.jwt_service.create_token_pair(str(user.id), user.email)
         
         # Update refresh token in database
         user.refresh_token = token_data["refresh_token"]
@@ -127,7 +136,7 @@ class AuthService:
             )
 
         # Create new token pair
-        token_data = self.jwt_service.create_token_pair(user_id)
+        token_data = self.jwt_service.create_token_pair(user_id, user.email)
         
         # Update refresh token in database
         user.refresh_token = token_data["refresh_token"]
@@ -135,25 +144,43 @@ class AuthService:
 
         return Token(**token_data)
 
-    async def get_current_user(self, token: str) -> User:
-        """Get current user from access token."""
+    def decode_access_token(self, token: str) -> dict:
+        """Verify an access token's signature and expiry and check it against the revocation list. No I/O."""
         payload = self.jwt_service.verify_token(token, "access")
-        if not payload:
+        if not payload or payload.get("sub") is None or revocation_list.is_revoked(payload):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        return payload
+
+    @staticmethod
+    def user_from_claims(payload: dict) -> Optional[User]:
+        """
+        Transient user built from the token alone, for stateless validation.
+        Deactivated and deleted users are caught by the revocation list, so a valid token implies an active user.
+        Returns None for tokens issued without the claims needed (before stateless validation existed).
+        """
+        if payload.get("email") is None or payload.get("jti") is None:
+            return None
+        try:
+            user_id = uuid.UUID(payload["sub"])
+        except ValueError:
+            return None
+        return User(id=user_id, email=payload["email"], is_active=True)
 
+    async def get_user_from_claims(self, payload: dict) -> User:
+        """Load the user named by verified token claims from the user cache or the database."""
         user_id = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
 
-        user = await self.get_user_by_id(user_id)
+        # The JWT already proves identity; only the row's state is needed, and it rarely changes
+        user = user_cache.get(user_id)
+        if user is None:
+            user = await self.get_user_by_id(user_id)
+            if user is not None:
+                user_cache.set(user)
+
         if user is None or not user.is_active:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -163,7 +190,21 @@ class AuthService:
 
         return user
 
-    async def logout_user(self, user: User) -> None:
-        """Logout user by invalidating refresh token."""
-        user.refresh_token = None
-        await self.db.commit() 
\ No newline at end of file
+    async def get_current_user(self, token: str) -> User:
+        """Get current user from access token."""
+        payload = self.decode_access_token(token)
+        return await self.get_user_from_claims(payload)
+
+    async def logout_user(self, user: User, token_claims: Optional[dict] = None) -> None:
+        """Logout user by invalidating refresh token and revoking the access token used for the request."""
+        # An UPDATE rather than mutating `user`, which may be a detached copy from the user cache
+        await self.db.execute(update(User).where(User.id == user.id).values(refresh_token=None))
+        if token_claims is not None and token_claims.get("jti") is not None:
+            revocation_list.revoke_token(
+                self.db,
+                token_claims["jti"],
+                str(user.id),
+                datetime.fromtimestamp(token_claims["exp"], tz=timezone.utc),
+            )
+        await self.db.commit()
+        user_cache.invalidate(user.id)
@@ -1,7 +1,6 @@
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 import uuid
 
 from app.config.config import (
@@ -9,23 +8,19 @@ from app.config.config import (
     JWT_ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     REFRESH_TOKEN_EXPIRE_DAYS,
-    PWD_CONTEXT_SCHEMES,
-    PWD_CONTEXT_DEPRECATED
 )
+from app.services.auth.password_hasher import password_hasher
 
 class JWTService:
     def __init__(self):
-        self.pwd_context = CryptContext(
-            schemes=PWD_CONTEXT_SCHEMES,
-            deprecated=PWD_CONTEXT_DEPRECATED
-        )
+        self.pwd_context = password_hasher.context
         
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """Verify a plain password against its hash."""
+        """Verify a plain password against its hash. Blocking; async code should use password_hasher."""
         return self.pwd_context.verify(plain_password, hashed_password)
     
     def get_password_hash(self, password: str) -> str:
-        """Hash a password for storing in the database."""
+        """Hash a password for storing in the database. Blocking; async code should use password_hasher."""
         return self.pwd_context.hash(password)
     
     def create_access_token(self, data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
@@ -37,7 +32,8 @@ class JWTService:
         else:
             expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
             
-        to_encode.update({"exp": expire, "type": "access"})
+        # jti lets a single token be revoked; iat lets every token of a user issued before a point be revoked
+        to_encode.update({"exp": expire, "iat": datetime.utcnow(), "type": "access", "jti": str(uuid.uuid4())})
         encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
         return encoded_jwt
     
@@ -88,9 +84,11 @@ class JWTService:
             return payload.get("sub")
         return None
     
-    def create_token_pair(self, user_id: str) -> Dict[str, Any]:
+    def create_token_pair(self, user_id: str, email: Optional[str] = None) -> Dict[str, Any]:
         """Create both access and refresh tokens for a user."""
-        access_token = self.create_access_token(data={"sub": user_id})
+        # The email claim lets stateless validation build the user without a database read
+        access_claims = {"sub": user_id, "email": email} if email else {"sub": user_id}
+        access_token = self.create_access_token(data=access_claims)
         refresh_token = self.create_refresh_token(data={"sub": user_id})
         
         return {
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.config.config import (
+    PWD_CONTEXT_SCHEMES,
+    PWD_CONTEXT_DEPRECATED,
+    BCRYPT_ROUNDS,
+    PASSWORD_HASH_MAX_WORKERS,
+    PASSWORD_HASH_MAX_QUEUE,
+)
+from app.services.metrics.histogram import Histogram
+
+
+def build_password_context(rounds: int = BCRYPT_ROUNDS) -> CryptContext:
+    # Pinning min and max to the configured cost makes any hash with another cost "need update"
+    return CryptContext(
+        schemes=PWD_CONTEXT_SCHEMES,
+        deprecated=PWD_CONTEXT_DEPRECATED,
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop on a small dedicated thread pool.
+    bcrypt releases the GIL while hashing, so threads give real parallelism without the pickling
+    overhead of a process pool. Callers beyond the pool size wait in a bounded queue; once the queue
+    is full new requests are rejected with 503 instead of piling up behind a login burst.
+    """
+
+    def __init__(self, context: CryptContext, max_workers: int = 2, max_queue: int = 64):
+        self.context = context
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._running = 0
+        self.max_queue_depth = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.queue_wait_histogram = Histogram([0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0])
+        self.hash_seconds_histogram = Histogram([0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0])
+
+    async def _run(self, func, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent authentication requests, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._waiting)
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self.queue_wait_histogram.observe(time.perf_counter() - queued_at)
+
+        self._running += 1
+        started_at = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.hash_seconds_histogram.observe(time.perf_counter() - started_at)
+            self._running -= 1
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; when it matches a hash made with outdated settings, also return a fresh hash."""
+        valid, new_hash = await self._run(self.context.verify_and_update, password, hashed_password)
+        if new_hash is not None:
+            self.rehashed += 1
+        return valid, new_hash
+
+    def stats(self) -> dict:
+        return {
+            "rounds": BCRYPT_ROUNDS,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": self._running,
+            "queue_depth": self._waiting,
+            "max_queue_depth": self.max_queue_depth,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "queue_wait_seconds": self.queue_wait_histogram.snapshot(),
+            "hash_seconds": self.hash_seconds_histogram.snapshot(),
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Shared by every request in this worker process
+password_hasher = PasswordHasher(
+    build_password_context(),
+    max_workers=PASSWORD_HASH_MAX_WORKERS,
+    max_queue=PASSWORD_HASH_MAX_QUEUE,
+)
@@ -0,0 +1,111 @@
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.config.config import ACCESS_TOKEN_EXPIRE_MINUTES
+from app.db import AsyncSessionLocal
+from app.models.revoked_token import RevokedToken
+
+# Re-read rows revoked slightly before the last sync, in case their transaction committed after it
+SYNC_OVERLAP = timedelta(seconds=60)
+# Expired rows are deleted from Postgres every this many syncs
+PURGE_EVERY_SYNCS = 20
+
+
+class RevocationList:
+    """
+    In-memory set of revoked access tokens, checked on every authenticated request without any I/O.
+    Holds revoked jtis and per-user "revoked before" timestamps, each only until the tokens it covers expire.
+    Revocations made by this process apply immediately; those made by other workers arrive with the
+    periodic sync from the revoked_tokens table, so they take effect within one sync interval.
+    """
+
+    def __init__(self, access_token_lifetime_seconds: float = ACCESS_TOKEN_EXPIRE_MINUTES * 60):
+        self.access_token_lifetime = timedelta(seconds=access_token_lifetime_seconds)
+        self._jtis: Dict[str, float] = {}
+        self._users: Dict[str, Tuple[float, float]] = {}
+        self._last_sync: Optional[datetime] = None
+        self.syncs = 0
+        self.sync_failures = 0
+        self.last_sync_seconds: Optional[float] = None
+
+    def is_revoked(self, claims: dict) -> bool:
+        jti = claims.get("jti")
+        if jti is not None and jti in self._jtis:
+            return True
+        user_entry = self._users.get(claims.get("sub"))
+        return user_entry is not None and claims.get("iat", 0) <= user_entry[0]
+
+    def _remember(self, row: RevokedToken) -> None:
+        expires_at = row.expires_at.timestamp()
+        if row.jti is not None:
+            self._jtis[row.jti] = expires_at
+        elif row.user_id is not None:
+            revoked_at = row.revoked_at.timestamp()
+            current = self._users.get(row.user_id)
+            if current is None or current[0] < revoked_at:
+                self._users[row.user_id] = (revoked_at, expires_at)
+
+    def _prune(self) -> None:
+        now = time.time()
+        self._jtis = {jti: expires_at for jti, expires_at in self._jtis.items() if expires_at > now}
+        self._users = {user_id: entry for user_id, entry in self._users.items() if entry[1] > now}
+
+    def revoke_token(self, db: AsyncSession, jti: str, user_id: str, expires_at: datetime) -> None:
+        """Revoke a single access token until it expires. Persisted when the caller commits."""
+        row = RevokedToken(jti=jti, user_id=user_id, revoked_at=datetime.now(timezone.utc), expires_at=expires_at)
+        db.add(row)
+        self._remember(row)
+
+    def revoke_user(self, db: AsyncSession, user_id) -> None:
+        """Revoke every access token issued to a user so far (deactivation, deletion)."""
+        revoked_at = datetime.now(timezone.utc)
+        row = RevokedToken(user_id=str(user_id), revoked_at=revoked_at, expires_at=revoked_at + self.access_token_lifetime)
+        db.add(row)
+        self._remember(row)
+
+    async def sync(self) -> None:
+        """Pull revocations made by other workers and drop entries whose tokens have expired."""
+        started_at = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        query = select(RevokedToken).where(RevokedToken.expires_at > now)
+        if self._last_sync is not None:
+            query = query.where(RevokedToken.revoked_at > self._last_sync - SYNC_OVERLAP)
+
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(query)
+                for row in result.scalars():
+                    self._remember(row)
+
+                if self.syncs % PURGE_EVERY_SYNCS == 0:
+                    await session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+                    await session.commit()
+        except Exception as e:
+            # Keep serving from the current set; the next sync catches up
+            self.sync_failures += 1
+            print(f"Revocation list sync failed: {e}")
+            return
+
+        self._last_sync = now
+        self._prune()
+        self.syncs += 1
+        self.last_sync_seconds = round(time.perf_counter() - started_at, 4)
+
+    def stats(self) -> dict:
+        return {
+            "revoked_tokens": len(self._jtis),
+            "revoked_users": len(self._users),
+            "last_sync": self._last_sync.isoformat() if self._last_sync else None,
+            "last_sync_seconds": self.last_sync_seconds,
+            "syncs": self.syncs,
+            "sync_failures": self.sync_failures,
+        }
+
+
+# Shared by every request in this worker process
+revocation_list = RevocationList()
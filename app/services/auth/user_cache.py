@@ -0,0 +1,51 @@
+import uuid
+from typing import Optional
+
+from app.config.config import USER_CACHE_MAX_SIZE, USER_CACHE_TTL_SECONDS
+from app.models.user import User
+from app.services.cache.lru_cache import LRUTTLCache
+
+
+class UserCache:
+    """
+    Short-lived cache of authenticated users, keyed by user id.
+    Entries are transient User copies without the password hash or refresh token, so they can be
+    handed to request handlers safely; writes must go through UPDATE statements, never through these objects.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 60):
+        self.cache = LRUTTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    @staticmethod
+    def _key(user_id) -> Optional[str]:
+        try:
+            return str(uuid.UUID(str(user_id)))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _copy(user: User) -> User:
+        return User(id=user.id, email=user.email, is_active=user.is_active, created_at=user.created_at)
+
+    def get(self, user_id) -> Optional[User]:
+        key = self._key(user_id)
+        if key is None:
+            return None
+        cached = self.cache.get(key)
+        # A fresh copy per caller, so one request cannot change what the next one sees
+        return self._copy(cached) if cached is not None else None
+
+    def set(self, user: User) -> None:
+        self.cache.set(str(user.id), self._copy(user))
+
+    def invalidate(self, user_id) -> None:
+        key = self._key(user_id)
+        if key is not None:
+            self.cache.pop(key)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+# Shared by every request in this worker process
+user_cache = UserCache(max_size=USER_CACHE_MAX_SIZE, ttl_seconds=USER_CACHE_TTL_SECONDS)
@@ -0,0 +1,12 @@
+import hashlib
+import unicodedata
+
+
+def normalize_text(text: str) -> str:
+    """Normalize unicode, case and whitespace so trivially different inputs share a cache entry."""
+    normalized = unicodedata.normalize("NFKC", text)
+    return " ".join(normalized.casefold().split())
+
+
+def hash_key(*parts: str) -> str:
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
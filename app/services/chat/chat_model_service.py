@@ -1,7 +1,7 @@
 from langchain_openai import ChatOpenAI
-from langchain.schema.messages import AIMessage
+from langchain.schema.messages import AIMessage, AIMessageChunk
 from langchain_core.language_models.chat_models import BaseChatModel
-from typing import Optional, Literal
+from typing import AsyncIterator, Optional, Literal
 
 
 class ChatModelService:
@@ -32,4 +32,9 @@ class ChatModelService:
 
     def stream(self, prompt: str, model_name: Optional[str] = None):
         model = self.get_model(model_name)
-        return model.stream(prompt)
\ No newline at end of file
+        return model.stream(prompt)
+
+    def astream(self, prompt: str, model_name: Optional[str] = None) -> AsyncIterator[AIMessageChunk]:
+        """Async token stream for the selected model"""
+        model = self.get_model(model_name)
+        return model.astream(prompt)
\ No newline at end of file
@@ -1,75 +1,386 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from langchain_core.documents import Document
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 
-from app.config.config import OPENAI_API_KEY
-from app.models.chat import ChatThread, ChatMessage, RoleEnum
-from app.services.chat.chat_model_service import ChatModelService
+from app.config.config import (
+    OPENAI_API_KEY,
+    CHAT_PIPELINE_MODE,
+    SPECULATIVE_MAX_CANDIDATES,
+    REWRITE_HISTORY_TOKEN_BUDGET,
+)
+from app.models.chat import AttributionStatusEnum, ChatThread, ChatMessage, RoleEnum
+from app.schemas.search import SearchFilters
+from app.services.chat.message_sink import PendingMessage
+from app.services.metrics.stage_timer import StageTimer
 from app.services.prompts.prompt_generator import PromptGenerator
-from app.services.search.qdrant_search_service import QdrantSearchService
+from app.services.registry.model_registry import ModelRegistry
+from app.services.search.rank_fusion import reciprocal_rank_fusion
 from app.services.search.web_search_service import WebSearchService
 from app.services.threads.thread_service import ThreadService
-from services.prompts.citation_service import CitationService
-from services.prompts.query_parser import QueryParser
+
+logger = logging.getLogger(__name__)
 
 
 class ChatService:
 
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, registry: ModelRegistry):
         self.db = db
         self.openai_api_key = OPENAI_API_KEY
         self.web_search_service = WebSearchService()
-        self.qdrant_search_service = QdrantSearchService()
         self.prompt_generator = PromptGenerator()
-        self.chat_model_service = ChatModelService()
         self.thread_service = ThreadService(db)
-        self.query_parser = QueryParser()
-        self.citation_service = CitationService()
 
-    def generate_prompt(self, context: str, query: str):
+        # Heavy models and API clients are shared across requests via the registry
+        self.qdrant_search_service = registry.qdrant_search_service
+        self.chat_model_service = registry.chat_model_service
+        self.query_parser = registry.query_parser
+        self.citation_service = registry.citation_service
+        self.semantic_cache = registry.semantic_cache
+        self.attribution_service = registry.attribution_service
+        self.background_tasks = registry.background_tasks
+        self.conversation_memory = registry.conversation_memory
+        self.message_sink = registry.message_sink
+
+    def generate_prompt(self, context: str, query: str, history: str = ""):
         return self.prompt_generator.generate(
-            "final_answer", context=context, question=query
+            "final_answer", context=context, question=query, history=history or "(none)"
         )
 
-    def retrieve_query_chunks(self, query: str):
-        relevant_chunks = self.qdrant_search_service.search_similarity(query, k=10)
+    async def retrieve_query_chunks(self, query: str, filters: Optional[SearchFilters] = None):
+        relevant_chunks = await self.qdrant_search_service.asearch_similarity(query, filters=filters)
         if not relevant_chunks:
             # search web
             pass
         return relevant_chunks
 
-    # Saves a chat message (user or assistant) to the DB
-    async def save_message(self, thread: ChatThread, role: RoleEnum, content: str):
-        message = ChatMessage(thread_id=thread.id, role=role, content=content)
-        self.db.add(message)
-        await self.db.flush()
+    async def retrieve_candidates(self, query: str, filters: Optional[SearchFilters] = None) -> List[Document]:
+        try:
+            return await self.qdrant_search_service.aretrieve_candidates(query, filters=filters)
+        except Exception as e:
+            print(f"Candidate retrieval failed: {e}")
+            return []
 
-    # Main handler: receives a user query, responds, and saves everything
-    async def handle_message(self, thread_id: str, user_query: str) -> dict:
+    # Rewrites the query and retrieves reranked chunks, answering from the semantic cache when possible.
+    # In speculative mode, retrieval on the raw query overlaps with the LLM rewrite and both candidate sets
+    # are merged before reranking. Returns (optimized query, cached answer or None, relevant chunks, pipeline).
+    async def optimize_and_retrieve(
+        self,
+        user_query: str,
+        filters: Optional[SearchFilters],
+        cache_scope: str,
+        timer: StageTimer,
+        rewrite_history: str = ""
+    ) -> Tuple[str, Optional[dict], List[Document], str]:
+        skip_rewrite = self.query_parser.should_skip_rewrite(user_query, has_history=bool(rewrite_history))
+        if skip_rewrite:
+            pipeline = "rewrite_skipped"
+        else:
+            pipeline = "speculative" if CHAT_PIPELINE_MODE == "speculative" else "sequential"
+
+        raw_retrieval = None
+        if pipeline == "speculative":
+            raw_retrieval = asyncio.create_task(
+                timer.measure("raw_query_retrieval", self.retrieve_candidates(user_query, filters))
+            )
+
+        try:
+            # Step 1: Optimize query for semantic retrieval
+            if skip_rewrite:
+                optimized_user_query = user_query
+            else:
+                optimized_user_query = await timer.measure("rewrite", self.query_parser.optimize(user_query, rewrite_history))
+
+            # Serve semantically equivalent questions from the answer cache, skipping retrieval and generation.
+            # Follow-ups are answered against the thread, so only questions opening a thread share the cache.
+            if self.semantic_cache is not None and not rewrite_history:
+                cached_answer = await timer.measure(
+                    "semantic_cache_lookup",
+                    self.semantic_cache.lookup(optimized_user_query, scope=cache_scope)
+                )
+                if cached_answer:
+                    return optimized_user_query, cached_answer, [], pipeline
+
+            # Step 2: Retrieve relevant knowledge chunks
+            if raw_retrieval is None:
+                relevant_chunks = await timer.measure(
+                    "retrieval", self.retrieve_query_chunks(optimized_user_query, filters)
+                )
+                return optimized_user_query, None, relevant_chunks, pipeline
+
+            if optimized_user_query.strip().casefold() == user_query.strip().casefold():
+                rewritten_candidates = []
+            else:
+                rewritten_candidates = await timer.measure(
+                    "rewritten_query_retrieval", self.retrieve_candidates(optimized_user_query, filters)
+                )
+            raw_candidates = await raw_retrieval
+            raw_retrieval = None
+
+            # Merge and dedupe both candidate sets, then rerank once against the rewritten query
+            candidates = reciprocal_rank_fusion([rewritten_candidates, raw_candidates])[:SPECULATIVE_MAX_CANDIDATES]
+            top_k = 5
+            try:
+                relevant_chunks = await timer.measure(
+                    "rerank", self.qdrant_search_service.arerank(optimized_user_query, candidates, top_k)
+                )
+            except Exception as e:
+                # The fused order is still a sensible ranking, so answer from it rather than failing the chat
+                print(f"Speculative rerank failed, using fused order: {e}")
+                relevant_chunks = candidates[:top_k]
+            return optimized_user_query, None, relevant_chunks, pipeline
+        finally:
+            if raw_retrieval is not None and not raw_retrieval.done():
+                raw_retrieval.cancel()
+
+    # Hands a chat message (user or assistant) to the write-behind sink; it is inserted shortly after in a batch
+    def save_message(
+        self,
+        thread_id: str,
+        role: RoleEnum,
+        content: str,
+        attribution_status: Optional[AttributionStatusEnum] = None
+    ) -> PendingMessage:
+        return self.message_sink.enqueue(thread_id, role, content, attribution_status)
+
+    # Waits until the sink has written a reply, so the message id handed to the client can be read back
+    # right away (citations, thread listing). Returns False when the sink dropped the row; its id must not be
+    # handed out then. Shielded so a disconnecting client cannot cancel the shared future.
+    @staticmethod
+    async def wait_until_persisted(message: PendingMessage) -> bool:
+        try:
+            await asyncio.shield(message.persisted)
+            return True
+        except Exception as e:
+            logger.error("Chat message %s was not persisted: %s", message.id, e)
+            return False
+
+    # Creates the thread if needed and commits right away, releasing the request's pooled connection
+    # before the multi-second retrieval and generation steps
+    async def open_thread(self, thread_id: str) -> Tuple[str, str]:
         thread = await self.thread_service.get_or_create_thread(thread_id)
-        await self.save_message(thread, RoleEnum.USER, user_query)
+        history = await self.load_history(thread)
+        await self.db.commit()
+        return history
 
-        # Step 1: Optimize query for semantic retrieval
-        optimized_user_query = await self.query_parser.optimize(user_query)
+    # Decides whether the reply gets ContextCite citations computed in the background
+    def attribution_status_for(self, citation_map: dict) -> Optional[AttributionStatusEnum]:
+        if self.attribution_service is None or not citation_map:
+            return None
+        if not self.attribution_service.accepts_job():
+            return AttributionStatusEnum.SKIPPED
+        return AttributionStatusEnum.PENDING
 
-        # Step 2: Retrieve relevant knowledge chunks
-        relevant_chunks = self.retrieve_query_chunks(optimized_user_query)
+    # Runs a job once the message it reads or updates has actually been written by the sink.
+    # The future is shared with the sink and other waiters, so cancelling this job (e.g. on drain) must not cancel it.
+    @staticmethod
+    async def run_when_persisted(message: PendingMessage, job: Callable[[], Awaitable[None]]) -> None:
+        await asyncio.shield(message.persisted)
+        await job()
 
-        # Step 3: Assign citation IDs and build citation map + context string
-        context_str, citation_map = self.citation_service.generate_citation_map(relevant_chunks)
+    # Loads the thread memory (including messages still in the sink) and renders it
+    # for the answer prompt and, more tightly, for the query rewrite
+    async def load_history(self, thread: ChatThread) -> Tuple[str, str]:
+        pending = self.message_sink.pending_messages(thread.id)
+        history = await self.conversation_memory.load(self.db, thread, pending)
+        if history.is_empty():
+            return "", ""
+        return (
+            self.conversation_memory.format(history),
+            self.conversation_memory.format(history, REWRITE_HISTORY_TOKEN_BUDGET),
+        )
+
+    # Background work once a reply is stored: refine its citations and fold old turns into the thread summary.
+    # Both jobs read the reply from their own sessions, so they wait until the sink has written it.
+    def schedule_after_reply(
+        self,
+        thread_id: str,
+        message: PendingMessage,
+        user_query: str,
+        citation_map: Optional[dict] = None,
+        attribution_status: Optional[AttributionStatusEnum] = None
+    ) -> None:
+        if attribution_status == AttributionStatusEnum.PENDING:
+            self.background_tasks.spawn(
+                self.run_when_persisted(
+                    message,
+                    lambda: self.attribution_service.refine_message_citations(
+                        message.id, user_query, message.content, citation_map
+                    ),
+                ),
+                name=f"attribution-{message.id}",
+            )
+        self.background_tasks.spawn(
+            self.run_when_persisted(message, lambda: self.conversation_memory.update_summary(thread_id)),
+            name=f"thread-summary-{thread_id}",
+        )
 
-        # Step 4: Build prompt with retrieved context and original query
-        prompt = self.generate_prompt(context_str, user_query)
+    # Returns the ContextCite citations stored for an assistant message
+    async def get_message_citations(self, message_id: str) -> dict:
+        result = await self.db.execute(select(ChatMessage).where(ChatMessage.id == message_id))
+        message = result.scalar_one_or_none()
+        if message is None:
+            raise HTTPException(status_code=404, detail="Message not found")
+        # Rows attributed before the response was stored alongside hold just the list of citations
+        attributions = message.attributions or {}
+        if isinstance(attributions, list):
+            attributions = {"response": None, "citations": attributions}
+        return {
+            "message_id": message.id,
+            "status": message.attribution_status.value if message.attribution_status else "unavailable",
+            "response": attributions.get("response"),
+            "citations": attributions.get("citations") or [],
+        }
+
+    # Main handler: receives a user query, responds, and saves everything
+    async def handle_message(self, thread_id: str, user_query: str, filters: Optional[SearchFilters] = None) -> dict:
+        cache_scope = filters.cache_scope() if filters is not None else ""
+        timer = StageTimer()
+        history, rewrite_history = await timer.measure("history", self.open_thread(thread_id))
+        self.save_message(thread_id, RoleEnum.USER, user_query)
+
+        # Steps 1-2: Optimize the query (resolving follow-ups against the thread) and retrieve relevant knowledge chunks
+        optimized_user_query, cached_answer, relevant_chunks, pipeline = await self.optimize_and_retrieve(
+            user_query, filters, cache_scope, timer, rewrite_history
+        )
+        if cached_answer:
+            message = self.save_message(thread_id, RoleEnum.ASSISTANT, cached_answer["reply"])
+            self.schedule_after_reply(thread_id, message, user_query)
+            persisted = await timer.measure("persist", self.wait_until_persisted(message))
+            return {
+                "message_id": message.id if persisted else None,
+                "reply": cached_answer["reply"],
+                "bibliography": cached_answer["bibliography"],
+                "cached": True,
+                "pipeline": pipeline,
+                "timings": timer.as_dict()
+            }
+
+        # Step 3: Pack the chunks into the token budget, then assign citation IDs and build citation map + context string
+        with timer.stage("packing"):
+            packed_chunks, context_stats = self.citation_service.pack_context(relevant_chunks)
+        context_str, citation_map = self.citation_service.generate_citation_map(packed_chunks)
+
+        # Step 4: Build prompt with retrieved context, conversation history and original query
+        prompt = self.generate_prompt(context_str, user_query, history)
 
         # Step 5: Get LLM response
-        llm_response = await self.chat_model_service.invoke(prompt, "gpt-4o")
+        llm_response = await timer.measure("generation", self.chat_model_service.invoke(prompt, "gpt-4o"))
 
         # Step 6: Post-process the LLM response with citations
         final_answer, bibliography = self.citation_service.replace_markers(llm_response.content, citation_map)
 
         # Step 7: Save assistant reply
-        await self.save_message(thread, RoleEnum.ASSISTANT, final_answer)
+        attribution_status = self.attribution_status_for(citation_map)
+        message = self.save_message(thread_id, RoleEnum.ASSISTANT, final_answer, attribution_status)
+        self.schedule_after_reply(thread_id, message, user_query, citation_map, attribution_status)
+
+        # Step 8: Remember grounded answers for semantically similar questions; follow-ups depend on their thread
+        if self.semantic_cache is not None and relevant_chunks and not rewrite_history:
+            await self.semantic_cache.store(optimized_user_query, final_answer, bibliography, scope=cache_scope)
+
+        persisted = await timer.measure("persist", self.wait_until_persisted(message))
+        timings = timer.as_dict()
+        print(f"Chat pipeline '{pipeline}' timings (ms): {timings}")
+        print(f"Context packing: {context_stats}")
 
-        # Step 8: Return full response
+        # Step 9: Return full response; without a stored row there is no message id to look citations up by
         return {
+            "message_id": message.id if persisted else None,
             "reply": final_answer,
-            "bibliography": bibliography
-        }
\ No newline at end of file
+            "bibliography": bibliography,
+            "cached": False,
+            "pipeline": pipeline,
+            "context": context_stats,
+            "timings": timings
+        }
+
+    # Streaming handler, part 1: creates the thread, loads its memory and queues the user message.
+    # Returns the (answer, rewrite) history for part 2.
+    async def start_stream(self, thread_id: str, user_query: str) -> Tuple[str, str]:
+        history = await self.open_thread(thread_id)
+        self.save_message(thread_id, RoleEnum.USER, user_query)
+        return history
+
+    # Streaming handler, part 2: yields (event, data) pairs while the answer is generated.
+    # The assistant reply is persisted only once the stream has completed.
+    async def stream_reply(
+        self,
+        thread_id: str,
+        user_query: str,
+        filters: Optional[SearchFilters] = None,
+        history: Tuple[str, str] = ("", "")
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        cache_scope = filters.cache_scope() if filters is not None else ""
+        answer_history, rewrite_history = history
+        timer = StageTimer()
+        try:
+            # Steps 1-2: Optimize the query and retrieve relevant knowledge chunks
+            optimized_user_query, cached_answer, relevant_chunks, pipeline = await self.optimize_and_retrieve(
+                user_query, filters, cache_scope, timer, rewrite_history
+            )
+            if cached_answer:
+                yield "sources", {"sources": []}
+                yield "token", {"text": cached_answer["reply"]}
+                message = self.save_message(thread_id, RoleEnum.ASSISTANT, cached_answer["reply"])
+                self.schedule_after_reply(thread_id, message, user_query)
+                if not await timer.measure("persist", self.wait_until_persisted(message)):
+                    yield "error", {"detail": "Failed to save the response"}
+                    return
+                yield "done", {
+                    "message_id": message.id,
+                    "bibliography": cached_answer["bibliography"],
+                    "cached": True,
+                    "pipeline": pipeline,
+                    "timings": timer.as_dict()
+                }
+                return
+
+            # Step 3: Pack the chunks, build citation map and tell the client which sources the answer will draw on
+            with timer.stage("packing"):
+                packed_chunks, context_stats = self.citation_service.pack_context(relevant_chunks)
+            print(f"Context packing: {context_stats}")
+            context_str, citation_map = self.citation_service.generate_citation_map(packed_chunks)
+            yield "sources", {"sources": self.citation_service.describe_sources(citation_map)}
+
+            # Step 4: Stream the LLM response, rewriting citation markers as tokens arrive
+            prompt = self.generate_prompt(context_str, user_query, answer_history)
+            rewriter = self.citation_service.create_stream_rewriter(citation_map)
+            with timer.stage("generation"):
+                async for chunk in self.chat_model_service.astream(prompt, "gpt-4o"):
+                    text = rewriter.feed(chunk.content)
+                    if text:
+                        yield "token", {"text": text}
+                tail = rewriter.flush()
+                if tail:
+                    yield "token", {"text": tail}
+
+            final_answer = rewriter.text
+            bibliography = rewriter.bibliography()
+
+            # Step 5: Persist the completed reply and queue its ContextCite attribution
+            attribution_status = self.attribution_status_for(citation_map)
+            message = self.save_message(thread_id, RoleEnum.ASSISTANT, final_answer, attribution_status)
+            self.schedule_after_reply(thread_id, message, user_query, citation_map, attribution_status)
+
+            if self.semantic_cache is not None and relevant_chunks and not rewrite_history:
+                await self.semantic_cache.store(optimized_user_query, final_answer, bibliography, scope=cache_scope)
+
+            if not await timer.measure("persist", self.wait_until_persisted(message)):
+                yield "error", {"detail": "Failed to save the response"}
+                return
+            yield "done", {
+                "message_id": message.id,
+                "bibliography": bibliography,
+                "cached": False,
+                "pipeline": pipeline,
+                "context": context_stats,
+                "timings": timer.as_dict()
+            }
+        except Exception as e:
+            print(f"Chat stream failed: {e}")
+            yield "error", {"detail": "Failed to generate a response"}
@@ -0,0 +1,178 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import insert
+
+from app.db import AsyncSessionLocal
+from app.models.chat import AttributionStatusEnum, ChatMessage, RoleEnum
+from app.services.metrics.histogram import Histogram
+
+
+class PendingMessage:
+    """A chat message accepted by the sink. `persisted` resolves once its row has been inserted."""
+
+    def __init__(
+        self,
+        thread_id: str,
+        role: RoleEnum,
+        content: str,
+        attribution_status: Optional[AttributionStatusEnum] = None,
+    ):
+        self.id = str(uuid4())
+        self.thread_id = thread_id
+        self.role = role
+        self.content = content
+        self.attribution_status = attribution_status
+        # Stamped at enqueue time so turn order does not depend on when the batch is written
+        self.created_at = datetime.now(timezone.utc)
+        self.persisted: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def as_row(self) -> dict:
+        return {
+            "id": self.id,
+            "thread_id": self.thread_id,
+            "role": self.role,
+            "content": self.content,
+            "attribution_status": self.attribution_status,
+            "created_at": self.created_at,
+        }
+
+
+class MessageSink:
+    """
+    Write-behind persistence for chat messages.
+    Request handlers enqueue messages and move on; a background task bulk-inserts them in batches
+    of up to batch_size, at least every flush_interval_ms, so no pooled connection is held while the LLM runs.
+    """
+
+    def __init__(self, flush_interval_ms: float = 250, batch_size: int = 100, max_retries: int = 3):
+        self.flush_interval = flush_interval_ms / 1000
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self._buffer: List[PendingMessage] = []
+        self._pending_by_thread: Dict[str, List[PendingMessage]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.persisted_count = 0
+        self.dropped_count = 0
+        self.batch_size_histogram = Histogram([1, 2, 5, 10, 25, 50, 100, 250, 500])
+        self.flush_seconds_histogram = Histogram([0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5])
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._closing = False
+            self._task = asyncio.create_task(self._run(), name="message-sink")
+
+    async def stop(self) -> None:
+        """Stop the flusher after writing everything still buffered."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    def enqueue(
+        self,
+        thread_id: str,
+        role: RoleEnum,
+        content: str,
+        attribution_status: Optional[AttributionStatusEnum] = None,
+    ) -> PendingMessage:
+        # A flusher that died would leave every later message unwritten with nobody told
+        if self._task is None or self._task.done() or self._closing:
+            raise RuntimeError("Message sink is not running")
+
+        message = PendingMessage(thread_id, role, content, attribution_status)
+        self._buffer.append(message)
+        self._pending_by_thread.setdefault(thread_id, []).append(message)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return message
+
+    def pending_messages(self, thread_id: str) -> List[PendingMessage]:
+        """Messages of a thread that are accepted but not yet in the database, oldest first."""
+        return list(self._pending_by_thread.get(thread_id, []))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            while self._buffer:
+                batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+                await self._write(batch)
+
+            if self._closing:
+                return
+
+    async def _insert(self, rows: List[dict]) -> None:
+        async with AsyncSessionLocal() as session:
+            await session.execute(insert(ChatMessage), rows)
+            await session.commit()
+
+    async def _write(self, batch: List[PendingMessage]) -> None:
+        started_at = asyncio.get_running_loop().time()
+        for attempt in range(self.max_retries):
+            try:
+                await self._insert([message.as_row() for message in batch])
+                self._settle(batch)
+                break
+            except Exception as e:
+                print(f"Message sink batch of {len(batch)} failed (attempt {attempt + 1}): {e}")
+                # Nothing to wait for after the last attempt; every waiter on the batch would pay for it
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(min(0.1 * 2 ** attempt, 2.0))
+        else:
+            # Isolate the bad rows so one invalid message does not take its whole batch down with it
+            for message in batch:
+                try:
+                    await self._insert([message.as_row()])
+                    self._settle([message])
+                except Exception as e:
+                    print(f"Dropping chat message {message.id}: {e}")
+                    self._settle([message], error=e)
+
+        self.batch_size_histogram.observe(len(batch))
+        self.flush_seconds_histogram.observe(asyncio.get_running_loop().time() - started_at)
+
+    def _settle(self, messages: List[PendingMessage], error: Optional[Exception] = None) -> None:
+        for message in messages:
+            thread_pending = self._pending_by_thread.get(message.thread_id, [])
+            if message in thread_pending:
+                thread_pending.remove(message)
+            if not thread_pending:
+                self._pending_by_thread.pop(message.thread_id, None)
+
+            if error is None:
+                self.persisted_count += 1
+            else:
+                self.dropped_count += 1
+            # Settling a future a waiter already cancelled would raise and take the flusher down with it
+            if message.persisted.done():
+                continue
+            if error is None:
+                message.persisted.set_result(message.id)
+            else:
+                message.persisted.set_exception(error)
+                # Nobody may be waiting on this message; avoid "exception was never retrieved" warnings
+                message.persisted.exception()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "buffered": len(self._buffer),
+            "threads_with_pending": len(self._pending_by_thread),
+            "persisted": self.persisted_count,
+            "dropped": self.dropped_count,
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "flush_seconds": self.flush_seconds_histogram.snapshot(),
+        }
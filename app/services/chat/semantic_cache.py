@@ -0,0 +1,157 @@
+import time
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.services.search.qdrant_search_service import QdrantSearchService
+
+
+class SemanticAnswerCache:
+    """
+    In-memory cache of final answers keyed by the embedding of the optimized query.
+    A lookup returns a stored answer when a previous query in the same scope is similar enough.
+    Entries expire after a TTL, the least recently used entry is evicted when full, and the whole
+    cache is dropped when the underlying Qdrant collection changes.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        search_service: QdrantSearchService,
+        similarity_threshold: float = 0.92,
+        max_size: int = 1000,
+        ttl_seconds: float = 6 * 3600,
+        fingerprint_interval_seconds: float = 60,
+    ):
+        self.embeddings = embeddings
+        self.search_service = search_service
+        self.similarity_threshold = similarity_threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.fingerprint_interval_seconds = fingerprint_interval_seconds
+
+        self._entries: List[dict] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._known_version = search_service.collection_version
+        self._known_fingerprint = None
+        self._fingerprint_checked_at = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def invalidate(self, reason: str = "manual") -> None:
+        if self._entries:
+            print(f"Semantic answer cache invalidated ({reason}), dropped {len(self._entries)} entries.")
+        self._entries = []
+        self._vectors = None
+        self.invalidations += 1
+
+    async def _ensure_fresh(self) -> None:
+        # Ingestion in this process bumps the collection version directly
+        if self.search_service.collection_version != self._known_version:
+            self._known_version = self.search_service.collection_version
+            self.invalidate("collection updated")
+
+        # Ingestion in other workers is detected through a periodic collection fingerprint
+        now = time.monotonic()
+        if now - self._fingerprint_checked_at < self.fingerprint_interval_seconds:
+            return
+        self._fingerprint_checked_at = now
+
+        try:
+            fingerprint = await self.search_service.acollection_fingerprint()
+        except Exception as e:
+            print(f"Collection fingerprint check failed: {e}")
+            return
+
+        if self._known_fingerprint is not None and fingerprint != self._known_fingerprint:
+            self.invalidate("collection fingerprint changed")
+        self._known_fingerprint = fingerprint
+
+    def _drop_expired(self) -> None:
+        now = time.time()
+        keep = [i for i, entry in enumerate(self._entries) if entry["expires_at"] > now]
+        if len(keep) != len(self._entries):
+            self._entries = [self._entries[i] for i in keep]
+            self._vectors = self._vectors[keep] if keep else None
+
+    async def lookup(self, query: str, scope: str = "") -> Optional[dict]:
+        """Return the cached answer for the most similar stored query in the same scope, if any."""
+        await self._ensure_fresh()
+        query_vector = self._normalize(await self.embeddings.aembed_query(query))
+
+        # No awaits from here on: store() and invalidate() may replace both lists while we were embedding
+        self._drop_expired()
+        entries, vectors = self._entries, self._vectors
+        if not entries or vectors is None or len(vectors) != len(entries):
+            self.misses += 1
+            return None
+
+        similarities = vectors @ query_vector
+
+        best_index, best_similarity = None, self.similarity_threshold
+        for index in np.argsort(similarities)[::-1]:
+            if similarities[index] < best_similarity:
+                break
+            if entries[index]["scope"] == scope:
+                best_index, best_similarity = int(index), float(similarities[index])
+                break
+
+        if best_index is None:
+            self.misses += 1
+            return None
+
+        entry = entries[best_index]
+        entry["last_used_at"] = time.monotonic()
+        self.hits += 1
+        return {
+            "reply": entry["reply"],
+            "bibliography": entry["bibliography"],
+            "matched_query": entry["query"],
+            "similarity": round(best_similarity, 4),
+        }
+
+    async def store(self, query: str, reply: str, bibliography: str, scope: str = "") -> None:
+        vector = self._normalize(await self.embeddings.aembed_query(query))
+
+        if len(self._entries) >= self.max_size:
+            self._drop_expired()
+        if len(self._entries) >= self.max_size:
+            oldest = min(range(len(self._entries)), key=lambda i: self._entries[i]["last_used_at"])
+            del self._entries[oldest]
+            self._vectors = np.delete(self._vectors, oldest, axis=0)
+            self.evictions += 1
+
+        self._entries.append({
+            "query": query,
+            "scope": scope,
+            "reply": reply,
+            "bibliography": bibliography,
+            "expires_at": time.time() + self.ttl_seconds,
+            "last_used_at": time.monotonic(),
+        })
+        row = vector.reshape(1, -1)
+        self._vectors = row if self._vectors is None or not len(self._vectors) else np.vstack([self._vectors, row])
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "similarity_threshold": self.similarity_threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
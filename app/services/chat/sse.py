@@ -0,0 +1,12 @@
+import json
+from typing import Any, AsyncIterator, Tuple
+
+
+def format_sse_event(event: str, data: Any) -> str:
+    """Encode a single server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def encode_sse_stream(events: AsyncIterator[Tuple[str, Any]]) -> AsyncIterator[str]:
+    async for event, data in events:
+        yield format_sse_event(event, data)
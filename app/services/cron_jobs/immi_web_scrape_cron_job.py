@@ -1,13 +1,12 @@
 from datetime import datetime
 
-from services.search.qdrant_search_service import QdrantSearchService
+from app.services.search.qdrant_search_service import QdrantSearchService
 
 
 class ImmigrationWebScrapeCronJob:
 
-    def __init__(self):
-        self.qdrant_search_service = QdrantSearchService()
+    def __init__(self, qdrant_search_service: QdrantSearchService):
+        self.qdrant_search_service = qdrant_search_service
 
     def scrape_immigration_info_weekly(self):
-        pass
-
+        pass
\ No newline at end of file
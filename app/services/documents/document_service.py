@@ -1,19 +1,33 @@
-from typing import List
+import asyncio
+import os
+from typing import Dict, List, Optional, Set
 
 from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
-from qdrant_client import QdrantClient
+from app.services.cache.keys import hash_key
+from app.services.documents.ingestion_pipeline import IngestionPipeline
+from app.services.documents.point_ids import chunk_point_id, chunk_source, document_key
+from app.services.search.embedding_scheduler import EmbeddingCheckpoint, EmbeddingScheduler, build_embedding_scheduler
 from app.services.search.qdrant_search_service import QdrantSearchService
 
 class DocumentService:
-    def __init__(self):
+    def __init__(
+        self,
+        qdrant_search_service: Optional[QdrantSearchService] = None,
+        ingestion_pipeline: Optional[IngestionPipeline] = None,
+        embedding_scheduler: Optional[EmbeddingScheduler] = None,
+    ):
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=500,
             chunk_overlap=50,
             length_function=len,
+            # Chunk offsets let the context packer merge overlapping neighbours exactly
+            add_start_index=True,
         )
-        self.qdrant_search_service = QdrantSearchService()
+        self.qdrant_search_service = qdrant_search_service or QdrantSearchService()
+        # The app passes the registry's pipeline; standalone callers own this one and should close() it
+        self.ingestion_pipeline = ingestion_pipeline or IngestionPipeline()
+        self.embedding_scheduler = embedding_scheduler or build_embedding_scheduler(self.qdrant_search_service.embeddings)
 
     @staticmethod
     def ensure_metadata_completeness(metadata: dict) -> dict:
@@ -26,6 +40,87 @@ class DocumentService:
         enriched = {key: metadata.get(key, default_keys[key]) for key in default_keys}
         return {**metadata, **enriched}
 
+    @staticmethod
+    def chunk_ids(chunks: List[Document]) -> List[str]:
+        return [chunk_point_id(chunk.page_content, chunk_source(chunk.metadata)) for chunk in chunks]
+
+    async def _astore_chunks(
+        self,
+        chunks: List[Document],
+        checkpoint: Optional[EmbeddingCheckpoint] = None,
+        written: Optional[Dict[str, Document]] = None,
+    ) -> int:
+        """
+        Embed and upsert the chunks not stored yet, then update the sparse index and FAISS mirror once.
+        A caller storing a document over several calls passes `written` to collect the chunks and update them itself.
+        Point ids are derived from the chunk text and source, so chunks already in the collection, or
+        recorded in the checkpoint of an interrupted run, cost no embedding call. Chunks already stored
+        whose metadata changed (e.g. a corrected title, url or year) have their payload updated in place.
+        Returns how many chunks were embedded.
+        """
+        unique_chunks = dict(zip(self.chunk_ids(chunks), chunks))
+        pending_ids = [
+            point_id for point_id in unique_chunks
+            if checkpoint is None or point_id not in checkpoint.completed
+        ]
+        if not pending_ids:
+            return 0
+        stored_metadata = await asyncio.to_thread(self.qdrant_search_service.stored_metadata, pending_ids)
+        new_ids = [point_id for point_id in pending_ids if point_id not in stored_metadata]
+        changed_metadata = {
+            point_id: unique_chunks[point_id].metadata
+            for point_id, metadata in stored_metadata.items()
+            if metadata != unique_chunks[point_id].metadata
+        }
+
+        job_written: Dict[str, Document] = {} if written is None else written
+        if changed_metadata:
+            await asyncio.to_thread(self.qdrant_search_service.update_chunk_metadata, changed_metadata)
+            job_written.update((point_id, unique_chunks[point_id]) for point_id in changed_metadata)
+        if not new_ids:
+            if written is None:
+                await self._update_indexes(job_written)
+            return 0
+
+        async def store(ids: List[str], vectors: List[List[float]]) -> None:
+            documents = [unique_chunks[point_id] for point_id in ids]
+            await asyncio.to_thread(
+                self.qdrant_search_service.upsert_chunks, ids, documents, vectors, update_indexes=False
+            )
+            job_written.update(zip(ids, documents))
+
+        try:
+            report = await self.embedding_scheduler.run(
+                [(point_id, unique_chunks[point_id].page_content) for point_id in new_ids], store, checkpoint
+            )
+        finally:
+            if written is None:
+                await self._update_indexes(job_written)
+        return report["embedded"]
+
+    async def _update_indexes(self, written: Dict[str, Document]) -> None:
+        """
+        Hand chunks written to Qdrant to the BM25 index and FAISS mirror in one go. Callers do this even when
+        the job failed part way, since a resumed job skips checkpointed chunks and would never mirror them.
+        """
+        if written:
+            await asyncio.to_thread(
+                self.qdrant_search_service.on_documents_added, list(written), list(written.values())
+            )
+
+    def _remove_stale_chunks(self, key: str, current_ids: Set[str]) -> int:
+        """Delete chunks of a re-ingested document that its new version no longer contains."""
+        stale_ids = [
+            point_id for point_id in self.qdrant_search_service.point_ids_for_document(key)
+            if point_id not in current_ids
+        ]
+        self.qdrant_search_service.delete_points(stale_ids)
+        return len(stale_ids)
+
+    def _split_page(self, page: Document) -> List[Document]:
+        chunks = self.text_splitter.split_documents([page])
+        return [chunk for chunk in chunks if len(chunk.page_content.strip()) > 30]
+
     async def add_text_document(self, text: str, metadata: dict = None) -> bool:
         try:
             document = Document(
@@ -34,26 +129,59 @@ class DocumentService:
             )
             text_chunks = self.text_splitter.split_documents([document])
             filtered_chunks = [chunk for chunk in text_chunks if len(chunk.page_content.strip()) > 30]
-            self.qdrant_search_service.vector_store.add_documents(filtered_chunks)
+            await self._astore_chunks(filtered_chunks)
             return True
         except Exception as e:
             print(f"Error adding text document: {e}")
             return False
 
-    async def handle_upload_pdf_file(self, file_path: str, metadata: dict = None) -> bool:
+    async def handle_upload_pdf_file(
+        self,
+        file_path: str,
+        metadata: dict = None,
+        source_name: Optional[str] = None,
+        document_id: Optional[str] = None,
+    ) -> bool:
         try:
-            pdf_loader = PyPDFLoader(file_path)
-            pdf_documents = pdf_loader.load()
-            for document in pdf_documents:
-                enriched_meta = self.ensure_metadata_completeness(metadata or {})
-                enriched_meta['source_file'] = file_path
-                document.metadata.update(enriched_meta)
-
-            pdf_chunks = self.text_splitter.split_documents(pdf_documents)
-            filtered_chunks = [chunk for chunk in pdf_chunks if len(chunk.page_content.strip()) > 30]
-            self.qdrant_search_service.vector_store.add_documents(filtered_chunks)
-
-            print(f"Ingested {len(pdf_documents)} pages, split into {len(filtered_chunks)} chunks.")
+            # Identify the document by its original name, not the temporary path it was saved under
+            source_file = source_name or os.path.basename(file_path)
+            enriched_meta = self.ensure_metadata_completeness(metadata or {})
+            enriched_meta['source_file'] = source_file
+            enriched_meta.setdefault('source', source_file)
+            # Re-uploads replace the chunks of this document only, never those of a same-named file elsewhere
+            key = document_key(source_file, enriched_meta, document_id)
+            enriched_meta['document_key'] = key
+
+            current_ids: Set[str] = set()
+            written: Dict[str, Document] = {}
+            # Resumes an upload of the same document that failed part way through
+            checkpoint = self.embedding_scheduler.checkpoint(f"pdf:{key}")
+
+            async def store_batch(chunks: List[Document]) -> int:
+                # Repeated chunks of this upload are only considered once, even across concurrent batches
+                unseen = []
+                for point_id, chunk in zip(self.chunk_ids(chunks), chunks):
+                    if point_id not in current_ids:
+                        current_ids.add(point_id)
+                        unseen.append(chunk)
+                return await self._astore_chunks(unseen, checkpoint, written)
+
+            try:
+                report = await self.ingestion_pipeline.ingest_pdf(
+                    file_path, enriched_meta, self._split_page, store_batch
+                )
+            finally:
+                # One BM25 save and one FAISS rewrite per upload rather than per stored batch
+                await self._update_indexes(written)
+            removed = await asyncio.to_thread(self._remove_stale_chunks, key, current_ids)
+            if checkpoint is not None:
+                checkpoint.clear()
+
+            print(
+                f"Ingested {report['pages']} pages, split into {report['chunks']} chunks in {report['seconds']:.1f}s "
+                f"({report['pages_per_second']} pages/s, {report['chunks_per_second']} chunks/s); "
+                f"embedded {report['stored']} new chunks, removed {removed} stale ones."
+            )
             return True
         except Exception as e:
             print(f"Error adding PDF file: {e}")
@@ -68,7 +196,11 @@ class DocumentService:
                 filtered_chunks = [chunk for chunk in chunks if len(chunk.page_content.strip()) > 30]
                 document_chunks.extend(filtered_chunks)
 
-            self.qdrant_search_service.vector_store.add_documents(document_chunks)
+            # The same corpus maps to the same job, so rerunning a failed import resumes it
+            checkpoint = self.embedding_scheduler.checkpoint(f"documents:{hash_key(*sorted(self.chunk_ids(document_chunks)))}")
+            await self._astore_chunks(document_chunks, checkpoint)
+            if checkpoint is not None:
+                checkpoint.clear()
             return True
         except Exception as e:
             print(f"Error adding multiple documents: {e}")
@@ -79,7 +211,7 @@ class DocumentService:
 
     def get_collection_info(self) -> dict:
         try:
-            qdrant_client = QdrantClient(host="localhost", port=6333)
+            qdrant_client = self.qdrant_search_service.client
             collection_info = qdrant_client.get_collection(self.qdrant_search_service.collection_name)
 
             points, _ = qdrant_client.scroll(
@@ -109,8 +241,12 @@ class DocumentService:
 
     async def delete_collection(self) -> bool:
         try:
-            qdrant_client = QdrantClient(host="localhost", port=6333)
+            qdrant_client = self.qdrant_search_service.client
             qdrant_client.delete_collection(self.qdrant_search_service.collection_name)
+            self.qdrant_search_service.on_collection_deleted()
+            # The search service is shared for the life of the process, so recreate the empty collection
+            # and its payload indexes now rather than leaving every later upload and search failing
+            self.qdrant_search_service.bootstrap_collection()
             return True
         except Exception as e:
             print(f"Error deleting collection: {e}")
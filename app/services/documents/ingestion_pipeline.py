@@ -0,0 +1,195 @@
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+from app.services.metrics.histogram import Histogram
+
+
+def count_pdf_pages(file_path: str) -> int:
+    """Runs in a worker process."""
+    return len(PdfReader(file_path).pages)
+
+
+def extract_pdf_pages(file_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Runs in a worker process. Text of pages start..end-1, extracted the way PyPDFLoader does."""
+    reader = PdfReader(file_path)
+    return [(page_number, reader.pages[page_number].extract_text() or "") for page_number in range(start, end)]
+
+
+class IngestionPipeline:
+    """
+    Staged PDF ingestion that keeps the event loop free while a large document is indexed:
+
+      extract  page text pulled out in a process pool, pages_per_task pages per job
+      chunk    each page split as soon as it arrives, chunks grouped into batches of batch_size
+      store    up to max_inflight_batches batches embedded and upserted concurrently
+
+    Stages are connected by bounded queues, so a slow embedding API throttles extraction
+    instead of letting extracted pages pile up in memory.
+    """
+
+    def __init__(
+        self,
+        extract_workers: int = 2,
+        pages_per_task: int = 8,
+        batch_size: int = 64,
+        max_inflight_batches: int = 4,
+        page_queue_size: int = 32,
+    ):
+        self.extract_workers = extract_workers
+        self.pages_per_task = pages_per_task
+        self.batch_size = batch_size
+        self.max_inflight_batches = max_inflight_batches
+        self.page_queue_size = page_queue_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        self.documents_ingested = 0
+        self.pages_ingested = 0
+        self.chunks_ingested = 0
+        self.chunks_stored = 0
+        self.failed = 0
+        self.last_report: Optional[dict] = None
+        self.store_seconds_histogram = Histogram([0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0])
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned workers only import pypdf, not the models and clients of the API process
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.extract_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _extract(self, file_path: str, metadata: dict, pages: asyncio.Queue, report: dict) -> None:
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        started_at = time.perf_counter()
+        page_count = await loop.run_in_executor(executor, count_pdf_pages, file_path)
+
+        async def emit(job: asyncio.Future) -> None:
+            for page_number, text in await job:
+                page_metadata = {"source": file_path, "page": page_number, **metadata}
+                await pages.put(Document(page_content=text, metadata=page_metadata))
+                report["pages"] += 1
+
+        # Keep every worker busy while handing pages on in document order
+        in_flight = deque()
+        try:
+            for start in range(0, page_count, self.pages_per_task):
+                end = min(start + self.pages_per_task, page_count)
+                in_flight.append(loop.run_in_executor(executor, extract_pdf_pages, file_path, start, end))
+                if len(in_flight) >= self.extract_workers:
+                    await emit(in_flight.popleft())
+            while in_flight:
+                await emit(in_flight.popleft())
+        finally:
+            for job in in_flight:
+                job.cancel()
+
+        report["extract_seconds"] = round(time.perf_counter() - started_at, 4)
+        await pages.put(None)
+
+    async def _chunk(
+        self,
+        pages: asyncio.Queue,
+        batches: asyncio.Queue,
+        split_page: Callable[[Document], List[Document]],
+    ) -> None:
+        batch: List[Document] = []
+        while True:
+            page = await pages.get()
+            if page is None:
+                break
+            batch.extend(split_page(page))
+            while len(batch) >= self.batch_size:
+                await batches.put(batch[:self.batch_size])
+                batch = batch[self.batch_size:]
+
+        if batch:
+            await batches.put(batch)
+        for _ in range(self.max_inflight_batches):
+            await batches.put(None)
+
+    async def _store(
+        self,
+        batches: asyncio.Queue,
+        store_batch: Callable[[List[Document]], Awaitable[int]],
+        report: dict,
+    ) -> None:
+        while True:
+            batch = await batches.get()
+            if batch is None:
+                return
+            started_at = time.perf_counter()
+            stored = await store_batch(batch)
+            report["chunks"] += len(batch)
+            report["stored"] += stored
+            report["batches"] += 1
+            self.store_seconds_histogram.observe(time.perf_counter() - started_at)
+
+    async def ingest_pdf(
+        self,
+        file_path: str,
+        metadata: dict,
+        split_page: Callable[[Document], List[Document]],
+        store_batch: Callable[[List[Document]], Awaitable[int]],
+    ) -> dict:
+        """
+        Ingest one PDF. split_page turns a page into the chunks to index; store_batch embeds and
+        upserts a batch of chunks and returns how many it actually wrote (chunks already indexed
+        may be skipped). Returns throughput figures.
+        """
+        report = {"file": file_path, "pages": 0, "chunks": 0, "stored": 0, "batches": 0, "extract_seconds": None}
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.page_queue_size)
+        # One queued batch per store worker is enough to keep them all busy
+        batches: asyncio.Queue = asyncio.Queue(maxsize=self.max_inflight_batches)
+
+        started_at = time.perf_counter()
+        tasks = [
+            asyncio.create_task(self._extract(file_path, metadata, pages, report)),
+            asyncio.create_task(self._chunk(pages, batches, split_page)),
+            *(asyncio.create_task(self._store(batches, store_batch, report)) for _ in range(self.max_inflight_batches)),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # A failed stage would leave its neighbours blocked on a queue forever
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.failed += 1
+            raise
+
+        elapsed = time.perf_counter() - started_at
+        report["seconds"] = round(elapsed, 4)
+        report["pages_per_second"] = round(report["pages"] / elapsed, 2) if elapsed else None
+        report["chunks_per_second"] = round(report["chunks"] / elapsed, 2) if elapsed else None
+
+        self.documents_ingested += 1
+        self.pages_ingested += report["pages"]
+        self.chunks_ingested += report["chunks"]
+        self.chunks_stored += report["stored"]
+        self.last_report = report
+        return report
+
+    def stats(self) -> dict:
+        return {
+            "documents": self.documents_ingested,
+            "pages": self.pages_ingested,
+            "chunks": self.chunks_ingested,
+            "chunks_stored": self.chunks_stored,
+            "failed": self.failed,
+            "last_ingestion": self.last_report,
+            "store_batch_seconds": self.store_seconds_histogram.snapshot(),
+        }
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
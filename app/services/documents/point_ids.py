@@ -0,0 +1,36 @@
+import json
+import unicodedata
+import uuid
+from typing import Optional
+
+from app.schemas.search import FILTERABLE_METADATA_FIELDS
+from app.services.cache.keys import hash_key
+
+# Fixed namespace so every process and script derives the same id for the same chunk
+CHUNK_ID_NAMESPACE = uuid.UUID("6f1c3a52-8d4e-4b7a-9c1e-2f5d7a9b3e10")
+
+
+def normalize_chunk_text(text: str) -> str:
+    """Unicode and whitespace normalization only; case is kept, since it can carry meaning in legal text."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def document_key(source_file: str, metadata: dict, document_id: Optional[str] = None) -> str:
+    """
+    Identity of an uploaded document across re-uploads: the explicit document id when the caller gives one,
+    otherwise the file name scoped by the filterable metadata, so e.g. two cantons' "permit_b.pdf" stay apart.
+    """
+    if document_id:
+        return json.dumps({"document_id": document_id}, sort_keys=True, ensure_ascii=False)
+    scope = {field: metadata[field] for field in FILTERABLE_METADATA_FIELDS if metadata.get(field)}
+    return json.dumps({"source_file": source_file, **scope}, sort_keys=True, ensure_ascii=False)
+
+
+def chunk_source(metadata: dict) -> str:
+    """The document a chunk belongs to: the document key for uploads, else the declared source."""
+    return metadata.get("document_key") or metadata.get("source_file") or metadata.get("source") or ""
+
+
+def chunk_point_id(text: str, source: Optional[str]) -> str:
+    """Deterministic Qdrant point id: re-ingesting the same chunk of the same document maps to the same point."""
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, hash_key(source or "", normalize_chunk_text(text))))
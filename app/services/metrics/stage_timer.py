@@ -0,0 +1,28 @@
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class StageTimer:
+    """Wall-clock timings of the named stages of a single request, in milliseconds."""
+
+    def __init__(self):
+        self._started_at = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round((time.perf_counter() - started_at) * 1000, 2)
+
+    async def measure(self, name: str, awaitable: Awaitable[T]) -> T:
+        with self.stage(name):
+            return await awaitable
+
+    def as_dict(self) -> Dict[str, float]:
+        return {**self.stages, "total": round((time.perf_counter() - self._started_at) * 1000, 2)}
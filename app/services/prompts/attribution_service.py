@@ -0,0 +1,177 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from sqlalchemy import update
+
+from app.db import AsyncSessionLocal
+from app.models.chat import AttributionStatusEnum, ChatMessage
+from app.services.prompts.citation_service import format_citation
+
+# Loaded once per worker process, on first use
+_model = None
+_tokenizer = None
+
+
+def _load_model(model_name: str):
+    global _model, _tokenizer
+    if _model is None:
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        _tokenizer = AutoTokenizer.from_pretrained(model_name)
+        _model = AutoModelForCausalLM.from_pretrained(model_name)
+        _model.to("cpu")
+        _model.eval()
+    return _model, _tokenizer
+
+
+def compute_attributions(model_name: str, chunks: List[str], question: str, response: str, top_k: int) -> List[dict]:
+    """
+    Runs in a worker process. Ablates the context sentence by sentence with ContextCite, scoring how much
+    each sentence supports the given response, and ranks the chunks by the strongest score of any of their sentences.
+    """
+    from context_cite import ContextCiter
+
+    model, tokenizer = _load_model(model_name)
+    context = "\n\n".join(chunks)
+    context_citer = ContextCiter(model, tokenizer, context, question)
+    # Attribute the reply the user received, not one the local model would generate itself.
+    # ContextCiter takes no response argument; it attributes its cached output, the chat prompt followed by the response.
+    _, prompt = context_citer._get_prompt_ids(return_prompt=True)
+    context_citer._cache["output"] = prompt + response
+    scores = context_citer.get_attributions(as_dataframe=False, verbose=False)
+
+    # Character span of every chunk inside the joined context
+    spans = []
+    offset = 0
+    for chunk in chunks:
+        spans.append((offset, offset + len(chunk)))
+        offset += len(chunk) + 2
+
+    chunk_scores: Dict[int, float] = {}
+    cursor = 0
+    for source_index, score in enumerate(scores):
+        source = context_citer.partitioner.get_source(source_index)
+        position = context.find(source, cursor)
+        if position == -1:
+            continue
+        cursor = position + len(source)
+        for index, (start, end) in enumerate(spans):
+            if start <= position < end:
+                chunk_scores[index] = max(chunk_scores.get(index, float("-inf")), float(score))
+                break
+
+    ranked = sorted(
+        ((index, score) for index, score in chunk_scores.items() if score > 0),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    return [{"chunk_index": index, "score": round(score, 6)} for index, score in ranked[:top_k]]
+
+
+class AttributionService:
+    """
+    Refines the citations of an answer with ContextCite after the reply has been returned.
+    The attribution model is loaded lazily, on CPU, inside a dedicated process pool so it never
+    blocks the event loop or competes with request handling for the GIL.
+    """
+
+    def __init__(self, model_name: str, max_workers: int = 1, top_k: int = 3, max_pending: int = 32):
+        self.model_name = model_name
+        self.max_workers = max_workers
+        self.top_k = top_k
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned workers do not inherit the event loop, DB pool or torch state of the API process
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def accepts_job(self) -> bool:
+        """Shed attribution work instead of letting the queue grow without bound."""
+        if self._pending < self.max_pending:
+            return True
+        self.skipped += 1
+        return False
+
+    @staticmethod
+    async def _set_result(message_id: str, status: AttributionStatusEnum, attributions: Optional[dict] = None):
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(ChatMessage)
+                .where(ChatMessage.id == message_id)
+                .values(attribution_status=status, attributions=attributions)
+            )
+            await session.commit()
+
+    async def refine_message_citations(
+        self,
+        message_id: str,
+        question: str,
+        response: str,
+        citation_map: Dict[str, dict],
+    ) -> None:
+        """
+        Compute ContextCite attributions of a reply to its sources and store them on its ChatMessage,
+        together with the exact text they were computed for.
+        """
+        source_ids = list(citation_map.keys())
+        chunks = [citation_map[source_id]["text"] for source_id in source_ids]
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            ranked = await loop.run_in_executor(
+                self._get_executor(), compute_attributions, self.model_name, chunks, question, response, self.top_k
+            )
+        except Exception as e:
+            self.failed += 1
+            print(f"ContextCite attribution failed for message {message_id}: {e}")
+            await self._set_result(message_id, AttributionStatusEnum.FAILED)
+            return
+        finally:
+            self._pending -= 1
+
+        attributions = []
+        for item in ranked:
+            source_id = source_ids[item["chunk_index"]]
+            metadata = citation_map[source_id]["metadata"]
+            inline, bib_entry = format_citation(metadata)
+            attributions.append({
+                "id": source_id,
+                "score": item["score"],
+                "inline": inline,
+                "bibliography": bib_entry,
+                "source_file": metadata.get("source_file"),
+                "page": metadata.get("page"),
+            })
+
+        self.completed += 1
+        await self._set_result(
+            message_id, AttributionStatusEnum.READY, {"response": response, "citations": attributions}
+        )
+
+    def stats(self) -> dict:
+        return {
+            "model_name": self.model_name,
+            "workers_started": self._executor is not None,
+            "pending": self._pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+        }
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
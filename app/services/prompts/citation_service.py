@@ -1,12 +1,83 @@
-from context_cite import ContextCiter
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Set, Tuple
 import re
 
+from app.services.prompts.context_packer import ContextPacker
+
+MARKER_PATTERN = re.compile(r"\[@source\d+\]")
+# A proper prefix of a marker, e.g. "[", "[@sou" or "[@source1", that may be completed by the next chunk
+PARTIAL_MARKER_PATTERN = re.compile(r"\[(?:@(?:s(?:o(?:u(?:r(?:c(?:e\d*)?)?)?)?)?)?)?")
+
+
+def format_citation(metadata: dict) -> Tuple[str, str]:
+    """Inline citation and bibliography entry for a cited chunk."""
+    author = metadata.get("author", "Unknown Author")
+    year = metadata.get("year", "n.d.")
+    title = metadata.get("title", "Untitled")
+    url = metadata.get("url", "")
+    return f"({author}, {year})", f"{author} ({year}). *{title}*. {url}".strip()
+
+
+class IncrementalCitationRewriter:
+    """
+    Rewrites [@sourceN] markers in LLM output as it streams in.
+    Text is emitted as soon as it cannot be part of a marker; a trailing partial marker is held back
+    until the next chunk completes or rules it out.
+    """
+
+    def __init__(self, citation_map: Dict[str, dict]):
+        self.citation_map = citation_map
+        self.matched_sources: Set[str] = set()
+        self._pending = ""
+        self._bibliography_entries: Set[str] = set()
+        self._output: List[str] = []
+
+    def _replace(self, match) -> str:
+        marker = match.group(0)
+        source_id = marker[2:-1]
+        citation = self.citation_map.get(source_id)
+        if not citation:
+            return marker
+        inline, bib_entry = format_citation(citation["metadata"])
+        self._bibliography_entries.add(bib_entry)
+        self.matched_sources.add(source_id)
+        return inline
+
+    def feed(self, chunk: str) -> str:
+        """Consume a chunk of raw LLM output and return the rewritten text that is safe to emit."""
+        self._pending += chunk
+        split_at = len(self._pending)
+        last_bracket = self._pending.rfind("[")
+        if last_bracket != -1 and PARTIAL_MARKER_PATTERN.fullmatch(self._pending[last_bracket:]):
+            split_at = last_bracket
+
+        ready, self._pending = self._pending[:split_at], self._pending[split_at:]
+        rewritten = MARKER_PATTERN.sub(self._replace, ready)
+        self._output.append(rewritten)
+        return rewritten
+
+    def flush(self) -> str:
+        """Emit whatever is still held back at the end of the stream."""
+        rewritten = MARKER_PATTERN.sub(self._replace, self._pending)
+        self._pending = ""
+        self._output.append(rewritten)
+        return rewritten
+
+    @property
+    def text(self) -> str:
+        return "".join(self._output)
+
+    def bibliography(self) -> str:
+        return "\n".join(sorted(self._bibliography_entries))
+
 
 class CitationService:
 
-    def __init__(self, model_name: str = "TinyLlama/TinyLlama-1.1B-Chat-v1.0", device: str = "cuda"):
-        self.context_citer = ContextCiter.from_pretrained(model_name, device=device)
+    def __init__(self, context_packer: Optional[ContextPacker] = None):
+        self.context_packer = context_packer or ContextPacker()
+
+    def pack_context(self, documents) -> Tuple[list, dict]:
+        """Deduplicate, merge and trim reranked chunks to the context token budget before citing them."""
+        return self.context_packer.pack(documents)
 
     @staticmethod
     def generate_citation_map(documents) -> Tuple[str, Dict[str, dict]]:
@@ -28,63 +99,34 @@ class CitationService:
         context_str = "\n\n".join(cited_contexts)
         return context_str, citation_map
 
-    def replace_markers(self, answer: str, citation_map: Dict[str, dict]) -> Tuple[str, str]:
-        bibliography_entries: List[str] = []
-        matched_sources = set()
-
-        def marker_replacer(match):
-            marker = match.group(0)
-            source_id = marker[2:-1]
-            citation = citation_map.get(source_id)
-            print(f"🔎 Found marker: {marker} -> looking for: {source_id}")
-
-            if citation:
-                meta = citation["metadata"]
-                author = meta.get("author", "Unknown Author")
-                year = meta.get("year", "n.d.")
-                title = meta.get("title", "Untitled")
-                url = meta.get("url", "")
-
-                bib_entry = f"{author} ({year}). *{title}*. {url}".strip()
-                bibliography_entries.append(bib_entry)
-                matched_sources.add(source_id)
-
-                return f"({author}, {year})"
-            return marker
+    @staticmethod
+    def describe_sources(citation_map: Dict[str, dict]) -> List[dict]:
+        """Client-facing summary of the chunks placed in the prompt, keyed by their citation id."""
+        sources = []
+        for source_id, citation in citation_map.items():
+            meta = citation["metadata"]
+            sources.append({
+                "id": source_id,
+                "title": meta.get("title", "Untitled"),
+                "author": meta.get("author", "Unknown Author"),
+                "year": meta.get("year", "n.d."),
+                "url": meta.get("url", ""),
+                "source_file": meta.get("source_file"),
+                "page": meta.get("page"),
+            })
+        return sources
+
+    @staticmethod
+    def create_stream_rewriter(citation_map: Dict[str, dict]) -> IncrementalCitationRewriter:
+        return IncrementalCitationRewriter(citation_map)
 
-        final_answer = re.sub(r"\[@source\d+\]", marker_replacer, answer)
+    def replace_markers(self, answer: str, citation_map: Dict[str, dict]) -> Tuple[str, str]:
+        # Same rewriter as the streaming path, fed the whole answer at once, so both produce identical output
+        rewriter = self.create_stream_rewriter(citation_map)
+        rewriter.feed(answer)
+        rewriter.flush()
 
-        if not matched_sources:
+        if not rewriter.matched_sources:
             print("⚠️ No citation markers found in answer.")
 
-        bibliography = "\n".join(sorted(set(bibliography_entries)))
-        return final_answer, bibliography
-
-    def cite_with_contextcite(self, context_documents: List, question: str) -> Tuple[str, str]:
-        # Combine all context into one string
-        context_text = "\n\n".join([doc.page_content for doc in context_documents])
-
-        # Ask the context-cite model to generate an answer with inline citations
-        cc_result = self.context_citer.generate(context=context_text, question=question)
-
-        # Extract the answer
-        cited_answer = cc_result.get_answer()
-
-        # Get top source chunk IDs
-        df = cc_result.get_attributions(as_dataframe=True, top_k=3)
-        top_chunks = df['chunk_id'].unique().tolist()
-
-        # Build bibliography from top chunks
-        bibliography_entries = []
-        for chunk_id in top_chunks:
-            if chunk_id < len(context_documents):  # Safety check
-                doc = context_documents[chunk_id]
-                meta = doc.metadata
-                author = meta.get("author", "Unknown Author")
-                year = meta.get("year", "n.d.")
-                title = meta.get("title", "Untitled")
-                url = meta.get("url", "")
-                bibliography_entries.append(f"{author} ({year}). *{title}*. {url}".strip())
-
-        bibliography = "\n".join(sorted(set(bibliography_entries)))
-        return cited_answer, bibliography
\ No newline at end of file
+        return rewriter.text, rewriter.bibliography()
@@ -0,0 +1,146 @@
+import re
+from typing import List, Optional, Set, Tuple
+
+import tiktoken
+from langchain_core.documents import Document
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class ContextPacker:
+    """
+    Shrinks the reranked chunks before they are placed in the prompt:
+    near-duplicates are dropped, overlapping neighbours from the same source file are merged,
+    and the remaining chunks are added in rerank order until the token budget is reached.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 3000,
+        duplicate_threshold: float = 0.8,
+        shingle_size: int = 5,
+        min_overlap_chars: int = 20,
+        max_overlap_chars: int = 200,
+        model_name: str = "gpt-4o",
+    ):
+        self.token_budget = token_budget
+        self.duplicate_threshold = duplicate_threshold
+        self.shingle_size = shingle_size
+        self.min_overlap_chars = min_overlap_chars
+        self.max_overlap_chars = max_overlap_chars
+        self.encoding = tiktoken.encoding_for_model(model_name)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode(text))
+
+    def _shingles(self, text: str) -> Set[Tuple[str, ...]]:
+        words = _WORD_PATTERN.findall(text.casefold())
+        if len(words) < self.shingle_size:
+            return {tuple(words)} if words else set()
+        return {tuple(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    @staticmethod
+    def _jaccard(a: Set, b: Set) -> float:
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    def _text_overlap(self, first: str, second: str) -> int:
+        """Length of the longest suffix of first that is also a prefix of second."""
+        longest = min(len(first), len(second), self.max_overlap_chars)
+        for size in range(longest, self.min_overlap_chars - 1, -1):
+            if first.endswith(second[:size]):
+                return size
+        return 0
+
+    def _merge(self, earlier: Document, later: Document) -> Optional[str]:
+        """Merged text when the two chunks are neighbours in the same source, otherwise None."""
+        # Same-named files uploaded for different scopes are different documents
+        source = earlier.metadata.get("document_key") or earlier.metadata.get("source_file")
+        if not source or source != (later.metadata.get("document_key") or later.metadata.get("source_file")):
+            return None
+
+        same_page = earlier.metadata.get("page") == later.metadata.get("page")
+        start_a, start_b = earlier.metadata.get("start_index"), later.metadata.get("start_index")
+        if same_page and start_a is not None and start_b is not None:
+            # Splitter offsets tell us exactly how the two chunks overlap
+            if start_a > start_b:
+                earlier, later, start_a, start_b = later, earlier, start_b, start_a
+            overlap = start_a + len(earlier.page_content) - start_b
+            if overlap < 0:
+                return None
+            return earlier.page_content + later.page_content[overlap:]
+
+        # Chunks ingested without offsets: fall back to matching the splitter's chunk overlap
+        overlap = self._text_overlap(earlier.page_content, later.page_content)
+        if overlap:
+            return earlier.page_content + later.page_content[overlap:]
+        overlap = self._text_overlap(later.page_content, earlier.page_content)
+        if overlap:
+            return later.page_content + earlier.page_content[overlap:]
+        return None
+
+    def pack(self, documents: List[Document]) -> Tuple[List[Document], dict]:
+        tokens_before = self.count_tokens("\n\n".join(document.page_content for document in documents))
+
+        # Step 1: Drop near-duplicates, keeping the higher-ranked copy
+        kept: List[Document] = []
+        kept_shingles: List[Set] = []
+        duplicates_dropped = 0
+        for document in documents:
+            shingles = self._shingles(document.page_content)
+            if any(self._jaccard(shingles, other) >= self.duplicate_threshold for other in kept_shingles):
+                duplicates_dropped += 1
+                continue
+            kept.append(document)
+            kept_shingles.append(shingles)
+
+        # Step 2: Merge neighbouring chunks of the same source into the slot of the higher-ranked one
+        merged: List[Document] = []
+        chunks_merged = 0
+        for document in kept:
+            for index, existing in enumerate(merged):
+                merged_text = self._merge(existing, document)
+                if merged_text is None:
+                    continue
+                metadata = {
+                    **existing.metadata,
+                    "_merged_ids": existing.metadata.get("_merged_ids", [existing.metadata.get("_id")])
+                    + [document.metadata.get("_id")],
+                }
+                if existing.metadata.get("start_index") is not None and document.metadata.get("start_index") is not None:
+                    metadata["start_index"] = min(existing.metadata["start_index"], document.metadata["start_index"])
+                merged[index] = Document(page_content=merged_text, metadata=metadata)
+                chunks_merged += 1
+                break
+            else:
+                merged.append(document)
+
+        # Step 3: Fill the token budget in rerank order
+        packed: List[Document] = []
+        tokens_used = 0
+        for document in merged:
+            tokens = self.count_tokens(document.page_content)
+            if tokens_used + tokens > self.token_budget:
+                if packed:
+                    continue
+                # Never send an empty context: trim the best chunk to the budget instead
+                trimmed = self.encoding.decode(self.encoding.encode(document.page_content)[:self.token_budget])
+                document = Document(page_content=trimmed, metadata=document.metadata)
+                tokens = self.token_budget
+            packed.append(document)
+            tokens_used += tokens
+
+        tokens_after = self.count_tokens("\n\n".join(document.page_content for document in packed))
+        stats = {
+            "input_chunks": len(documents),
+            "packed_chunks": len(packed),
+            "duplicates_dropped": duplicates_dropped,
+            "chunks_merged": chunks_merged,
+            "chunks_over_budget": len(merged) - len(packed),
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "tokens_saved": tokens_before - tokens_after,
+            "token_budget": self.token_budget,
+        }
+        return packed, stats
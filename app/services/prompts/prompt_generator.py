@@ -18,6 +18,7 @@ class PromptGenerator:
                 - **Use the citation markers like [@source1], [@source2] inline in your answer to indicate where information comes from.**
                 - Only use information found in the provided context below.
                 - Do NOT invent facts or speculate. If the answer is not in the context, say so.
+                - Use the conversation so far only to understand what the question refers to, not as a source of facts.
 
                 ---
 
@@ -29,6 +30,11 @@ class PromptGenerator:
 
                 ---
 
+                ### Conversation so far:
+                {history}
+
+                ---
+
                 ### Question:
                 {question}
 
@@ -1,23 +1,66 @@
+import hashlib
+import re
+from typing import Optional
+
 from langchain.chains.llm import LLMChain
 from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 
-from langchain_core.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
+from app.config.config import REWRITE_SKIP_MAX_WORDS
+from app.services.prompts.rewrite_cache import RewriteCache
+
+# Conversational filler that the rewrite step exists to strip out
+FILLER_PATTERN = re.compile(
+    r"\b(hi|hello|hey|please|thanks|thank you|can you|could you|would you|i want|i need|i would like|"
+    r"tell me|help me|explain|wondering|my|me|i|it|this|that|they|them)\b",
+    re.IGNORECASE,
+)
+# Openers that only make sense as a follow-up to an earlier turn ("and for my wife?", "what about Zurich?")
+FOLLOW_UP_PATTERN = re.compile(r"^\s*(and|or|but|also|what about|how about|same|then)\b", re.IGNORECASE)
 
 
 class QueryParser:
-    def __init__(self):
+    def __init__(self, rewrite_cache: Optional[RewriteCache] = None):
         self.llm = ChatOpenAI(temperature=0)
         self.prompt = PromptTemplate.from_template("""
             You are a helpful assistant that rewrites user queries for semantic search in a vector DB.
             Remove filler, focus on intent, and make the query concise and relevant.
+            Use the conversation so far to resolve follow-up references, so the query stands on its own.
+
+            Conversation so far:
+            {history}
 
             Original query: {query}
             Optimized query:
         """)
         self.chain = self.prompt | self.llm  # new RunnableSequence
+        self.rewrite_cache = rewrite_cache
+
+        # Any change to the template or the model yields a new version, invalidating cached rewrites
+        self.prompt_version = hashlib.sha256(
+            f"{self.prompt.template}|{self.llm.model_name}|{self.llm.temperature}".encode("utf-8")
+        ).hexdigest()[:16]
+
+    @staticmethod
+    def should_skip_rewrite(user_prompt: str, has_history: bool = False) -> bool:
+        """Short keyword-style queries ("B permit requirements") are already good search queries."""
+        words = user_prompt.split()
+        if not words or len(words) > REWRITE_SKIP_MAX_WORDS:
+            return False
+        if has_history and FOLLOW_UP_PATTERN.search(user_prompt):
+            return False
+        return not FILLER_PATTERN.search(user_prompt)
+
+    async def optimize(self, user_prompt: str, history: str = "") -> str:
+        # Rewrites run at temperature 0, so identical inputs (query and history) can safely reuse an earlier output
+        if self.rewrite_cache is not None:
+            cached = await self.rewrite_cache.get(user_prompt, self.prompt_version, history)
+            if cached is not None:
+                return cached
+
+        result = await self.chain.ainvoke({"query": user_prompt, "history": history or "(none)"})
+        optimized = result.content.strip()
 
-    async def optimize(self, user_prompt: str) -> str:
-        result = await self.chain.ainvoke({"query": user_prompt})
-        return result.content.strip()
\ No newline at end of file
+        if self.rewrite_cache is not None:
+            await self.rewrite_cache.set(user_prompt, self.prompt_version, optimized, history)
+        return optimized
\ No newline at end of file
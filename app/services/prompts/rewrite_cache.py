@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.future import select
+
+from app.db import AsyncSessionLocal
+from app.models.query_rewrite import QueryRewrite
+from app.services.cache.keys import hash_key, normalize_text
+from app.services.cache.lru_cache import LRUTTLCache
+
+
+class RewriteCache:
+    """
+    Cache of QueryParser rewrites keyed on the normalized query and the rewrite prompt version.
+    An in-process LRU sits in front of an optional durable table in Postgres. Because the prompt version is
+    part of the key, changing the rewrite prompt or model makes every older entry unreachable.
+    Only stand-alone questions are persisted: rewrites keyed on a conversation history almost never repeat
+    across threads, so they live in the LRU only instead of adding a table row per follow-up turn.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl_seconds: float = 7 * 24 * 3600, persistent: bool = True):
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        self.memory_cache = LRUTTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.db_hits = 0
+        self.misses = 0
+        self.db_errors = 0
+
+    @staticmethod
+    def cache_key(normalized_query: str, prompt_version: str, history: str = "") -> str:
+        # A follow-up such as "and for my wife?" rewrites differently in every conversation
+        if history:
+            return hash_key(prompt_version, hash_key(history), normalized_query)
+        return hash_key(prompt_version, normalized_query)
+
+    async def get(self, query: str, prompt_version: str, history: str = "") -> Optional[str]:
+        normalized_query = normalize_text(query)
+        key = self.cache_key(normalized_query, prompt_version, history)
+        rewritten = self.memory_cache.get(key)
+        if rewritten is not None:
+            return rewritten
+
+        if self.persistent and not history:
+            try:
+                async with AsyncSessionLocal() as session:
+                    result = await session.execute(
+                        select(QueryRewrite.rewritten_query).where(
+                            QueryRewrite.cache_key == key,
+                            QueryRewrite.expires_at > datetime.now(timezone.utc),
+                        )
+                    )
+                    rewritten = result.scalar_one_or_none()
+            except Exception as e:
+                # The cache must never break the chat path
+                self.db_errors += 1
+                print(f"Rewrite cache lookup failed: {e}")
+                rewritten = None
+
+            if rewritten is not None:
+                self.db_hits += 1
+                self.memory_cache.set(key, rewritten)
+                return rewritten
+
+        self.misses += 1
+        return None
+
+    async def set(self, query: str, prompt_version: str, rewritten_query: str, history: str = "") -> None:
+        normalized_query = normalize_text(query)
+        key = self.cache_key(normalized_query, prompt_version, history)
+        self.memory_cache.set(key, rewritten_query)
+        if not self.persistent or history:
+            return
+
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        statement = insert(QueryRewrite).values(
+            cache_key=key,
+            prompt_version=prompt_version,
+            normalized_query=normalized_query,
+            rewritten_query=rewritten_query,
+            expires_at=expires_at,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[QueryRewrite.cache_key],
+            set_={"rewritten_query": rewritten_query, "expires_at": expires_at},
+        )
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(statement)
+                await session.commit()
+        except Exception as e:
+            self.db_errors += 1
+            print(f"Rewrite cache write failed: {e}")
+
+    async def purge_stale(self, prompt_version: str) -> int:
+        """Delete durable rows written by older rewrite prompts or past their expiry."""
+        if not self.persistent:
+            return 0
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    delete(QueryRewrite).where(
+                        or_(
+                            QueryRewrite.prompt_version != prompt_version,
+                            QueryRewrite.expires_at <= datetime.now(timezone.utc),
+                        )
+                    )
+                )
+                await session.commit()
+                return result.rowcount or 0
+        except Exception as e:
+            self.db_errors += 1
+            print(f"Rewrite cache purge failed: {e}")
+            return 0
+
+    def stats(self) -> dict:
+        memory_stats = self.memory_cache.stats()
+        return {
+            "memory": memory_stats,
+            "persistent": self.persistent,
+            "memory_hits": memory_stats["hits"],
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "db_errors": self.db_errors,
+        }
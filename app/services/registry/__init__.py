@@ -0,0 +1 @@
+# Registry package
@@ -0,0 +1,377 @@
+import os
+import resource
+import time
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, Request, status
+from langchain_openai.embeddings import OpenAIEmbeddings
+
+from app.config.config import (
+    MODEL_WARMUP_ENABLED,
+    RERANK_BATCHING_ENABLED,
+    RERANK_BATCH_WINDOW_MS,
+    RERANK_MAX_BATCH_SIZE,
+    RERANK_MAX_WORKERS,
+    EMBEDDING_CACHE_MAX_SIZE,
+    EMBEDDING_CACHE_TTL_SECONDS,
+    EMBEDDING_CACHE_DB_PATH,
+    EMBEDDING_CACHE_DB_TTL_SECONDS,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_MAX_SIZE,
+    SEMANTIC_CACHE_TTL_SECONDS,
+    SEMANTIC_CACHE_FINGERPRINT_INTERVAL_SECONDS,
+    SEARCH_MODE,
+    SPARSE_INDEX_PATH,
+    VECTOR_BACKEND,
+    FAISS_INDEX_PATH,
+    FAISS_PAYLOAD_PATH,
+    FAISS_HNSW_M,
+    FAISS_EF_CONSTRUCTION,
+    FAISS_EF_SEARCH,
+    REWRITE_CACHE_ENABLED,
+    REWRITE_CACHE_MAX_SIZE,
+    REWRITE_CACHE_TTL_SECONDS,
+    REWRITE_CACHE_PERSISTENT,
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_DUPLICATE_THRESHOLD,
+    CONTEXT_SHINGLE_SIZE,
+    CONTEXTCITE_ENABLED,
+    CONTEXTCITE_MODEL_NAME,
+    CONTEXTCITE_MAX_WORKERS,
+    CONTEXTCITE_TOP_K,
+    CONTEXTCITE_MAX_PENDING,
+    HISTORY_MAX_TURNS,
+    HISTORY_TOKEN_BUDGET,
+    THREAD_SUMMARY_MAX_WORDS,
+    THREAD_SUMMARY_MODEL,
+    MESSAGE_SINK_BATCH_SIZE,
+    MESSAGE_SINK_FLUSH_INTERVAL_MS,
+    MESSAGE_SINK_MAX_RETRIES,
+    INGEST_EXTRACT_WORKERS,
+    INGEST_PAGES_PER_TASK,
+    INGEST_BATCH_SIZE,
+    INGEST_MAX_INFLIGHT_BATCHES,
+    INGEST_PAGE_QUEUE_SIZE,
+)
+from app.services.chat.chat_model_service import ChatModelService
+from app.services.chat.message_sink import MessageSink
+from app.services.chat.semantic_cache import SemanticAnswerCache
+from app.services.documents.ingestion_pipeline import IngestionPipeline
+from app.services.prompts.attribution_service import AttributionService
+from app.services.prompts.citation_service import CitationService
+from app.services.prompts.context_packer import ContextPacker
+from app.services.prompts.query_parser import QueryParser
+from app.services.prompts.rewrite_cache import RewriteCache
+from app.services.search.bm25_index import BM25Index
+from app.services.search.embedding_cache import CachedEmbeddings, SQLiteEmbeddingStore
+from app.services.search.embedding_scheduler import EmbeddingScheduler, build_embedding_scheduler
+from app.services.search.faiss_store import FaissVectorStore
+from app.services.search.qdrant_search_service import QdrantSearchService
+from app.services.search.rerank_scheduler import RerankScheduler
+from app.services.search.reranker import Reranker
+from app.services.tasks.background_tasks import BackgroundTaskRunner
+from app.services.threads.conversation_memory import ConversationMemory
+
+
+def _current_rss_bytes() -> int:
+    """Resident set size of the current process in bytes."""
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is reported in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ModelRegistry:
+    """
+    Process-wide owner of the heavy models and API clients used by the chat pipeline.
+    Created once in the FastAPI lifespan and injected into request handlers.
+    """
+
+    def __init__(self):
+        self._components: Dict[str, Any] = {}
+        self._stats: Dict[str, dict] = {}
+        self.loaded = False
+
+    def _load(self, name: str, factory: Callable[[], Any]) -> Any:
+        rss_before = _current_rss_bytes()
+        started_at = time.perf_counter()
+        component = factory()
+        load_seconds = time.perf_counter() - started_at
+
+        self._components[name] = component
+        self._stats[name] = {
+            "load_seconds": round(load_seconds, 4),
+            "memory_bytes": max(_current_rss_bytes() - rss_before, 0),
+            "warmup_seconds": None,
+        }
+        print(f"Loaded {name} in {load_seconds:.2f}s")
+        return component
+
+    @staticmethod
+    def _build_embeddings() -> CachedEmbeddings:
+        store = None
+        if EMBEDDING_CACHE_DB_PATH:
+            store = SQLiteEmbeddingStore(EMBEDDING_CACHE_DB_PATH, ttl_seconds=EMBEDDING_CACHE_DB_TTL_SECONDS)
+        return CachedEmbeddings(
+            OpenAIEmbeddings(),
+            max_size=EMBEDDING_CACHE_MAX_SIZE,
+            ttl_seconds=EMBEDDING_CACHE_TTL_SECONDS,
+            store=store,
+        )
+
+    def load_search(self) -> QdrantSearchService:
+        """
+        Build only the embeddings, search indexes and embedding scheduler, e.g. for ingestion scripts that
+        must write through the same sparse index and FAISS mirror as the app. Blocking.
+        """
+        if "qdrant_search_service" in self._components:
+            return self.qdrant_search_service
+
+        embeddings = self._load("embeddings", self._build_embeddings)
+        reranker = self._load("reranker", Reranker)
+        sparse_index = None
+        if SEARCH_MODE == "hybrid":
+            sparse_index = self._load("sparse_index", lambda: BM25Index(SPARSE_INDEX_PATH))
+        faiss_store = None
+        if VECTOR_BACKEND == "faiss":
+            faiss_store = self._load(
+                "faiss_store",
+                lambda: FaissVectorStore(
+                    FAISS_INDEX_PATH,
+                    FAISS_PAYLOAD_PATH,
+                    hnsw_m=FAISS_HNSW_M,
+                    ef_construction=FAISS_EF_CONSTRUCTION,
+                    ef_search=FAISS_EF_SEARCH,
+                ),
+            )
+
+        def build_search_service() -> QdrantSearchService:
+            service = QdrantSearchService(
+                embeddings=embeddings,
+                reranker=reranker,
+                sparse_index=sparse_index,
+                faiss_store=faiss_store,
+            )
+            service.bootstrap_sparse_index()
+            service.bootstrap_faiss_store()
+            return service
+
+        search_service = self._load("qdrant_search_service", build_search_service)
+        self._load("embedding_scheduler", lambda: build_embedding_scheduler(embeddings))
+        return search_service
+
+    def load(self) -> None:
+        """Build every component once. Blocking; run it off the event loop."""
+        if self.loaded:
+            return
+
+        search_service = self.load_search()
+        reranker = self.reranker
+        embeddings = self.embeddings
+        if RERANK_BATCHING_ENABLED:
+            search_service.rerank_scheduler = self._load(
+                "rerank_scheduler",
+                lambda: RerankScheduler(
+                    reranker,
+                    search_service.rerank_executor,
+                    batch_window_ms=RERANK_BATCH_WINDOW_MS,
+                    max_batch_size=RERANK_MAX_BATCH_SIZE,
+                    max_inflight_batches=RERANK_MAX_WORKERS,
+                ),
+            )
+        if SEMANTIC_CACHE_ENABLED:
+            self._load(
+                "semantic_cache",
+                lambda: SemanticAnswerCache(
+                    embeddings,
+                    search_service,
+                    similarity_threshold=SEMANTIC_CACHE_THRESHOLD,
+                    max_size=SEMANTIC_CACHE_MAX_SIZE,
+                    ttl_seconds=SEMANTIC_CACHE_TTL_SECONDS,
+                    fingerprint_interval_seconds=SEMANTIC_CACHE_FINGERPRINT_INTERVAL_SECONDS,
+                ),
+            )
+        chat_model_service = self._load("chat_model_service", ChatModelService)
+        self._load(
+            "conversation_memory",
+            lambda: ConversationMemory(
+                chat_model_service,
+                max_turns=HISTORY_MAX_TURNS,
+                token_budget=HISTORY_TOKEN_BUDGET,
+                summary_max_words=THREAD_SUMMARY_MAX_WORDS,
+                summary_model_name=THREAD_SUMMARY_MODEL,
+            ),
+        )
+        rewrite_cache = None
+        if REWRITE_CACHE_ENABLED:
+            rewrite_cache = RewriteCache(
+                max_size=REWRITE_CACHE_MAX_SIZE,
+                ttl_seconds=REWRITE_CACHE_TTL_SECONDS,
+                persistent=REWRITE_CACHE_PERSISTENT,
+            )
+        self._load("query_parser", lambda: QueryParser(rewrite_cache=rewrite_cache))
+        self._load(
+            "citation_service",
+            lambda: CitationService(
+                context_packer=ContextPacker(
+                    token_budget=CONTEXT_TOKEN_BUDGET,
+                    duplicate_threshold=CONTEXT_DUPLICATE_THRESHOLD,
+                    shingle_size=CONTEXT_SHINGLE_SIZE,
+                ),
+            ),
+        )
+        if CONTEXTCITE_ENABLED:
+            # Cheap to construct: the attribution model is only loaded by the worker process on first use
+            self._load(
+                "attribution_service",
+                lambda: AttributionService(
+                    CONTEXTCITE_MODEL_NAME,
+                    max_workers=CONTEXTCITE_MAX_WORKERS,
+                    top_k=CONTEXTCITE_TOP_K,
+                    max_pending=CONTEXTCITE_MAX_PENDING,
+                ),
+            )
+        self._load("background_tasks", BackgroundTaskRunner)
+        self._load(
+            "message_sink",
+            lambda: MessageSink(
+                flush_interval_ms=MESSAGE_SINK_FLUSH_INTERVAL_MS,
+                batch_size=MESSAGE_SINK_BATCH_SIZE,
+                max_retries=MESSAGE_SINK_MAX_RETRIES,
+            ),
+        )
+        # Cheap to construct: the extraction processes are spawned on the first upload
+        self._load(
+            "ingestion_pipeline",
+            lambda: IngestionPipeline(
+                extract_workers=INGEST_EXTRACT_WORKERS,
+                pages_per_task=INGEST_PAGES_PER_TASK,
+                batch_size=INGEST_BATCH_SIZE,
+                max_inflight_batches=INGEST_MAX_INFLIGHT_BATCHES,
+                page_queue_size=INGEST_PAGE_QUEUE_SIZE,
+            ),
+        )
+        self.loaded = True
+
+    def warmup(self) -> None:
+        """Run a dummy inference through the local models so the first request is not the slow one."""
+        if not MODEL_WARMUP_ENABLED:
+            return
+
+        started_at = time.perf_counter()
+        self.reranker.warmup()
+        self._stats["reranker"]["warmup_seconds"] = round(time.perf_counter() - started_at, 4)
+
+    async def astart(self) -> None:
+        """Start the background workers that need a running event loop."""
+        await self.message_sink.start()
+        if self.rerank_scheduler is not None:
+            await self.rerank_scheduler.start()
+
+        rewrite_cache = self.query_parser.rewrite_cache
+        if rewrite_cache is not None:
+            purged = await rewrite_cache.purge_stale(self.query_parser.prompt_version)
+            if purged:
+                print(f"Purged {purged} stale query rewrites.")
+
+    async def aclose(self) -> None:
+        """Release network clients and worker pools owned by the registry."""
+        # Let work queued after earlier replies finish while its dependencies are still open
+        if "background_tasks" in self._components:
+            await self.background_tasks.drain()
+        # Write out every chat message still buffered before the database pool goes away
+        if "message_sink" in self._components:
+            await self.message_sink.stop()
+        if self.attribution_service is not None:
+            self.attribution_service.close()
+        if "ingestion_pipeline" in self._components:
+            self.ingestion_pipeline.close()
+        if self.rerank_scheduler is not None:
+            await self.rerank_scheduler.stop()
+        if "qdrant_search_service" in self._components:
+            await self.qdrant_search_service.aclose()
+        if "embeddings" in self._components:
+            self.embeddings.close()
+
+    def get(self, name: str) -> Any:
+        if name not in self._components:
+            raise KeyError(f"Component '{name}' is not registered.")
+        return self._components[name]
+
+    @property
+    def embeddings(self) -> CachedEmbeddings:
+        return self.get("embeddings")
+
+    @property
+    def reranker(self) -> Reranker:
+        return self.get("reranker")
+
+    @property
+    def qdrant_search_service(self) -> QdrantSearchService:
+        return self.get("qdrant_search_service")
+
+    @property
+    def rerank_scheduler(self) -> Optional[RerankScheduler]:
+        return self._components.get("rerank_scheduler")
+
+    @property
+    def semantic_cache(self) -> Optional[SemanticAnswerCache]:
+        return self._components.get("semantic_cache")
+
+    @property
+    def chat_model_service(self) -> ChatModelService:
+        return self.get("chat_model_service")
+
+    @property
+    def conversation_memory(self) -> ConversationMemory:
+        return self.get("conversation_memory")
+
+    @property
+    def query_parser(self) -> QueryParser:
+        return self.get("query_parser")
+
+    @property
+    def citation_service(self) -> CitationService:
+        return self.get("citation_service")
+
+    @property
+    def attribution_service(self) -> Optional[AttributionService]:
+        return self._components.get("attribution_service")
+
+    @property
+    def message_sink(self) -> MessageSink:
+        return self.get("message_sink")
+
+    @property
+    def ingestion_pipeline(self) -> IngestionPipeline:
+        return self.get("ingestion_pipeline")
+
+    @property
+    def embedding_scheduler(self) -> EmbeddingScheduler:
+        return self.get("embedding_scheduler")
+
+    @property
+    def background_tasks(self) -> BackgroundTaskRunner:
+        return self.get("background_tasks")
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "process_rss_bytes": _current_rss_bytes(),
+            "components": self._stats,
+        }
+
+
+# Dependency to get the process-wide model registry
+def get_model_registry(request: Request) -> ModelRegistry:
+    registry: Optional[ModelRegistry] = getattr(request.app.state, "model_registry", None)
+    if registry is None or not registry.loaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Models are not loaded yet"
+        )
+    return registry
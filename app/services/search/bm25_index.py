@@ -0,0 +1,287 @@
+import fcntl
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+from langchain_qdrant import QdrantVectorStore
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    # Single characters are kept on purpose: permit letters ("G permit") are the whole point of lexical search
+    return _TOKEN_PATTERN.findall(text.casefold())
+
+
+class BM25Index:
+    """
+    In-process Okapi BM25 index over the chunks stored in Qdrant, keyed by Qdrant point id.
+    It is persisted as a JSON file so every worker can load it, and reloaded when another process rewrites it.
+    Saves are serialized across workers with a file lock, and each one merges this process's changes into
+    whatever the file holds at that moment, so concurrent ingestions in different workers do not drop each other's chunks.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75, reload_interval_seconds: float = 30):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.reload_interval_seconds = reload_interval_seconds
+
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._documents: Dict[str, dict] = {}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._total_length = 0
+        # Changes made in this process since the last save; a clear() makes the next save overwrite the file instead
+        self._pending_adds: Dict[str, dict] = {}
+        self._pending_removals: Set[str] = set()
+        self._replace_on_save = False
+        self._loaded_signature: Optional[tuple] = None
+        self._reload_checked_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    @property
+    def average_length(self) -> float:
+        return self._total_length / len(self._documents) if self._documents else 0.0
+
+    def _add_one(self, point_id: str, page_content: str, metadata: dict) -> None:
+        if point_id in self._documents:
+            self._remove_one(point_id)
+
+        term_frequencies = Counter(tokenize(page_content))
+        length = sum(term_frequencies.values())
+        self._documents[point_id] = {
+            "page_content": page_content,
+            "metadata": metadata,
+            "length": length,
+            "terms": dict(term_frequencies),
+        }
+        for term, frequency in term_frequencies.items():
+            self._postings[term][point_id] = frequency
+        self._total_length += length
+
+    def _remove_one(self, point_id: str) -> None:
+        document = self._documents.pop(point_id, None)
+        if document is None:
+            return
+        for term in document["terms"]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(point_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= document["length"]
+
+    def _reset(self) -> None:
+        self._documents = {}
+        self._postings = defaultdict(dict)
+        self._total_length = 0
+
+    def _replace_contents(self, snapshot: Dict[str, dict]) -> None:
+        """Swap in a snapshot read from disk, keeping the changes this process has not saved yet."""
+        self._reset()
+        for point_id, stored in snapshot.items():
+            if point_id not in self._pending_removals and point_id not in self._pending_adds:
+                self._add_one(point_id, stored["page_content"], stored["metadata"])
+        for point_id, stored in self._pending_adds.items():
+            self._add_one(point_id, stored["page_content"], stored["metadata"])
+
+    def add(self, ids: Iterable[str], documents: Iterable[Document]) -> None:
+        with self._lock:
+            for point_id, document in zip(ids, documents):
+                point_id = str(point_id)
+                stored = {"page_content": document.page_content, "metadata": dict(document.metadata)}
+                self._add_one(point_id, stored["page_content"], stored["metadata"])
+                self._pending_adds[point_id] = stored
+                self._pending_removals.discard(point_id)
+
+    def remove(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for point_id in ids:
+                point_id = str(point_id)
+                self._remove_one(point_id)
+                self._pending_adds.pop(point_id, None)
+                self._pending_removals.add(point_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+            self._pending_adds = {}
+            self._pending_removals = set()
+            self._replace_on_save = True
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        metadata_filter: Optional[Callable[[dict], bool]] = None,
+    ) -> List[Tuple[Document, float]]:
+        self.reload_if_changed()
+        query_terms = set(tokenize(query))
+
+        with self._lock:
+            document_count = len(self._documents)
+            if not document_count or not query_terms:
+                return []
+
+            average_length = self.average_length or 1.0
+            scores: Dict[str, float] = defaultdict(float)
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for point_id, frequency in postings.items():
+                    length = self._documents[point_id]["length"]
+                    norm = frequency + self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[point_id] += idf * frequency * (self.k1 + 1) / norm
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            results = []
+            for point_id, score in ranked:
+                stored = self._documents[point_id]
+                if metadata_filter is not None and not metadata_filter(stored["metadata"]):
+                    continue
+                metadata = {**stored["metadata"], "_id": point_id}
+                results.append((Document(page_content=stored["page_content"], metadata=metadata), score))
+                if len(results) >= k:
+                    break
+            return results
+
+    @staticmethod
+    def _signature(stat: os.stat_result) -> tuple:
+        # Every save swaps in a new file, so the inode changes even when two saves land within one mtime tick
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _file_signature(self) -> Optional[tuple]:
+        try:
+            return self._signature(os.stat(self.path))
+        except OSError:
+            return None
+
+    @contextmanager
+    def _file_lock(self):
+        # Only writers take it; readers are safe because the file is swapped in atomically
+        with open(f"{self.path}.lock", "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _snapshot(self) -> Dict[str, dict]:
+        return {
+            point_id: {"page_content": document["page_content"], "metadata": document["metadata"]}
+            for point_id, document in self._documents.items()
+        }
+
+    def _write_snapshot(self, snapshot: Dict[str, dict], directory: str) -> None:
+        # Write to a temp file and rename so readers in other workers never see a partial file
+        fd, temp_path = tempfile.mkstemp(prefix=f"{os.path.basename(self.path)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(snapshot, handle, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+
+        with self._save_lock, self._file_lock():
+            with self._lock:
+                adds, removals, replace = self._pending_adds, self._pending_removals, self._replace_on_save
+                self._pending_adds, self._pending_removals, self._replace_on_save = {}, set(), False
+                disk_signature = self._file_signature()
+                merge = not replace and disk_signature is not None and disk_signature != self._loaded_signature
+                snapshot = None if merge else self._snapshot()
+
+            try:
+                if merge:
+                    # Another worker saved since this one last loaded: apply only this process's changes on top
+                    with open(self.path, encoding="utf-8") as handle:
+                        snapshot = json.load(handle)
+                    for point_id in removals:
+                        snapshot.pop(point_id, None)
+                    snapshot.update(adds)
+                self._write_snapshot(snapshot, directory)
+            except BaseException:
+                # Keep the unsaved changes for the next attempt, unless they were superseded meanwhile
+                with self._lock:
+                    for point_id in removals:
+                        if point_id not in self._pending_adds:
+                            self._pending_removals.add(point_id)
+                    for point_id, stored in adds.items():
+                        if point_id not in self._pending_removals:
+                            self._pending_adds.setdefault(point_id, stored)
+                    self._replace_on_save = self._replace_on_save or replace
+                raise
+
+            with self._lock:
+                if merge:
+                    self._replace_contents(snapshot)
+                self._loaded_signature = self._file_signature()
+
+    def load(self) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        with open(self.path, encoding="utf-8") as handle:
+            signature = self._signature(os.fstat(handle.fileno()))
+            snapshot = json.load(handle)
+        with self._lock:
+            self._replace_contents(snapshot)
+            self._loaded_signature = signature
+        return True
+
+    def reload_if_changed(self) -> None:
+        # A cleared index is about to overwrite the file, so reloading it would bring the old chunks back
+        if not self.path or self._replace_on_save:
+            return
+        now = time.monotonic()
+        if now - self._reload_checked_at < self.reload_interval_seconds:
+            return
+        self._reload_checked_at = now
+        signature = self._file_signature()
+        if signature is not None and signature != self._loaded_signature:
+            self.load()
+
+    def rebuild_from_qdrant(self, client: QdrantClient, collection_name: str, batch_size: int = 256) -> int:
+        """Rebuild the index from every point in the collection, e.g. for chunks ingested before hybrid search."""
+        self.clear()
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False,
+            )
+            with self._lock:
+                for point in points:
+                    payload = point.payload or {}
+                    self._add_one(
+                        str(point.id),
+                        payload.get(QdrantVectorStore.CONTENT_KEY) or "",
+                        payload.get(QdrantVectorStore.METADATA_KEY) or {},
+                    )
+            if offset is None:
+                break
+        self.save()
+        return len(self._documents)
@@ -0,0 +1,165 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from app.services.cache.keys import hash_key, normalize_text
+from app.services.cache.lru_cache import LRUTTLCache
+
+
+class SQLiteEmbeddingStore:
+    """Persistent embedding store keeping vectors as float32 blobs in a local SQLite file."""
+
+    def __init__(self, db_path: str, ttl_seconds: Optional[float] = None):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT vector, created_at FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            blob, created_at = row
+            if self.ttl_seconds is not None and created_at + self.ttl_seconds <= time.time():
+                self._connection.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+                self._connection.commit()
+                return None
+
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    def set(self, key: str, model: str, vector: List[float]) -> None:
+        blob = array("f", vector).tobytes()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, model, len(vector), blob, time.time()),
+            )
+            self._connection.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Two-tier query embedding cache wrapped around another Embeddings object.
+    Lookups go to the in-memory LRU first, then to the optional persistent store, then to the wrapped model.
+    Document embeddings are passed through untouched; only query embeddings are cached.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_size: int = 2048,
+        ttl_seconds: Optional[float] = None,
+        store: Optional[SQLiteEmbeddingStore] = None,
+    ):
+        self.embeddings = embeddings
+        self.model_name = getattr(embeddings, "model", type(embeddings).__name__)
+        self.memory_cache = LRUTTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.store = store
+        self.disk_hits = 0
+        self.misses = 0
+
+    def cache_key(self, text: str) -> str:
+        return hash_key(self.model_name, normalize_text(text))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.cache_key(text)
+        vector = self.memory_cache.get(key)
+        if vector is not None:
+            return vector
+
+        if self.store is not None:
+            vector = self.store.get(key)
+            if vector is not None:
+                self.disk_hits += 1
+                self.memory_cache.set(key, vector)
+                return vector
+
+        self.misses += 1
+        vector = self.embeddings.embed_query(text)
+        self._remember(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self.cache_key(text)
+        vector = self.memory_cache.get(key)
+        if vector is not None:
+            return vector
+
+        if self.store is not None:
+            vector = await asyncio.to_thread(self.store.get, key)
+            if vector is not None:
+                self.disk_hits += 1
+                self.memory_cache.set(key, vector)
+                return vector
+
+        self.misses += 1
+        vector = await self.embeddings.aembed_query(text)
+        if self.store is not None:
+            await asyncio.to_thread(self._remember, key, vector)
+        else:
+            self._remember(key, vector)
+        return vector
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self.memory_cache.set(key, vector)
+        if self.store is not None:
+            self.store.set(key, self.model_name, vector)
+
+    def stats(self) -> dict:
+        memory_stats = self.memory_cache.stats()
+        return {
+            "model": self.model_name,
+            "memory": memory_stats,
+            "disk_enabled": self.store is not None,
+            "disk_entries": self.store.count() if self.store is not None else 0,
+            "memory_hits": memory_stats["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
@@ -0,0 +1,292 @@
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+import openai
+import tiktoken
+from langchain_core.embeddings import Embeddings
+
+from app.config.config import (
+    EMBEDDING_BATCH_MAX_TOKENS,
+    EMBEDDING_BATCH_MAX_INPUTS,
+    EMBEDDING_MAX_CONCURRENCY,
+    EMBEDDING_TOKENS_PER_MINUTE,
+    EMBEDDING_MAX_RETRIES,
+    EMBEDDING_BACKOFF_BASE_SECONDS,
+    EMBEDDING_BACKOFF_MAX_SECONDS,
+    EMBEDDING_CHECKPOINT_DIR,
+)
+from app.services.cache.keys import hash_key
+from app.services.metrics.histogram import Histogram
+
+# (id, text) pairs in, (ids, vectors) out to the sink that stores them
+EmbeddingItem = Tuple[str, str]
+EmbeddingSink = Callable[[List[str], List[List[float]]], Awaitable[None]]
+
+# Failures worth retrying besides rate limiting; anything else is a bug or a bad request
+TRANSIENT_ERRORS = (openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+
+class TokenBucket:
+    """Async token bucket: acquire(n) waits until n tokens are available. Waiters are served in order."""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, amount: float) -> float:
+        """Take amount tokens, returning how long the caller waited for them."""
+        # A single oversized request must still be able to go out eventually
+        amount = min(amount, self.capacity)
+        started_at = time.monotonic()
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return time.monotonic() - started_at
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller back for at least `seconds`, e.g. after the API reported a rate limit."""
+        self._refill()
+        self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class EmbeddingCheckpoint:
+    """Ids already embedded and stored for one job, appended to a file as batches complete."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.completed: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as handle:
+                for line in handle:
+                    self.completed.update(json.loads(line))
+
+    def record(self, ids: List[str]) -> None:
+        with open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(ids) + "\n")
+        self.completed.update(ids)
+
+    def clear(self) -> None:
+        """Forget the job once it has finished; only interrupted jobs need to resume."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.completed.clear()
+
+
+class EmbeddingScheduler:
+    """
+    Embeds large sets of chunks against the OpenAI API without tripping its rate limits:
+
+      - texts are grouped into batches of at most max_batch_tokens tokens and max_batch_inputs texts
+      - at most max_concurrency batches are embedded and stored at once, across every caller
+      - a token bucket keeps the process under tokens_per_minute
+      - rate-limited and transient failures are retried with exponential backoff and jitter;
+        a 429 also pauses the bucket, so concurrent batches back off together
+      - with a checkpoint, ids are recorded as their batch is stored, and a rerun skips them
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_tokens: int = 20000,
+        max_batch_inputs: int = 256,
+        max_concurrency: int = 4,
+        tokens_per_minute: int = 1000000,
+        max_retries: int = 6,
+        backoff_base_seconds: float = 1.0,
+        backoff_max_seconds: float = 60.0,
+        checkpoint_dir: Optional[str] = None,
+    ):
+        self.embeddings = embeddings
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_inputs = max_batch_inputs
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.checkpoint_dir = checkpoint_dir
+        if checkpoint_dir:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+
+        # Every OpenAI embedding model tokenizes with cl100k_base
+        self.encoding = tiktoken.get_encoding("cl100k_base")
+        # Allow a burst of ten seconds' worth of quota, but never less than one full batch
+        tokens_per_second = tokens_per_minute / 60
+        self.rate_limiter = TokenBucket(tokens_per_second, capacity=max(max_batch_tokens, tokens_per_second * 10))
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+
+        self.requests = 0
+        self.tokens_embedded = 0
+        self.rate_limited_retries = 0
+        self.transient_retries = 0
+        self.failed_batches = 0
+        self.batch_tokens_histogram = Histogram([500, 1000, 2500, 5000, 10000, 20000, 50000, 100000])
+        self.request_seconds_histogram = Histogram([0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0])
+        self.rate_limit_wait_seconds_histogram = Histogram([0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0])
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def plan_batches(self, items: List[EmbeddingItem]) -> List[List[Tuple[str, str, int]]]:
+        """Group consecutive items into batches within the token and input limits."""
+        batches = []
+        batch, batch_tokens = [], 0
+        for item_id, text in items:
+            tokens = self.count_tokens(text)
+            if batch and (batch_tokens + tokens > self.max_batch_tokens or len(batch) >= self.max_batch_inputs):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append((item_id, text, tokens))
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def checkpoint(self, job_id: str) -> Optional[EmbeddingCheckpoint]:
+        """Checkpoint of a job, resumed if an earlier run of the same job was interrupted."""
+        if not self.checkpoint_dir:
+            return None
+        return EmbeddingCheckpoint(os.path.join(self.checkpoint_dir, f"{hash_key(job_id)[:32]}.jsonl"))
+
+    def _backoff_seconds(self, attempt: int, error: Optional[openai.APIStatusError] = None) -> float:
+        delay = min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt)
+        delay *= random.uniform(0.5, 1.0)
+        retry_after = error.response.headers.get("retry-after") if error is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    async def _embed_batch(self, texts: List[str], tokens: int) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            waited = await self.rate_limiter.acquire(tokens)
+            self.rate_limit_wait_seconds_histogram.observe(waited)
+            started_at = time.perf_counter()
+            try:
+                vectors = await self.embeddings.aembed_documents(texts)
+            except openai.RateLimitError as e:
+                if attempt == self.max_retries:
+                    raise
+                self.rate_limited_retries += 1
+                # The quota is shared, so every batch waits, not just this one
+                self.rate_limiter.pause(self._backoff_seconds(attempt, e))
+                continue
+            except TRANSIENT_ERRORS:
+                if attempt == self.max_retries:
+                    raise
+                self.transient_retries += 1
+                await asyncio.sleep(self._backoff_seconds(attempt))
+                continue
+
+            self.requests += 1
+            self.request_seconds_histogram.observe(time.perf_counter() - started_at)
+            return vectors
+
+    async def _process(
+        self,
+        batch: List[Tuple[str, str, int]],
+        sink: EmbeddingSink,
+        checkpoint: Optional[EmbeddingCheckpoint],
+        report: dict,
+    ) -> None:
+        ids = [item_id for item_id, _, _ in batch]
+        texts = [text for _, text, _ in batch]
+        tokens = sum(item_tokens for _, _, item_tokens in batch)
+
+        async with self._slots:
+            self._in_flight += 1
+            try:
+                vectors = await self._embed_batch(texts, tokens)
+                await sink(ids, vectors)
+            except Exception:
+                self.failed_batches += 1
+                raise
+            finally:
+                self._in_flight -= 1
+
+        if checkpoint is not None:
+            checkpoint.record(ids)
+        self.tokens_embedded += tokens
+        self.batch_tokens_histogram.observe(tokens)
+        report["embedded"] += len(ids)
+        report["tokens"] += tokens
+
+    async def run(
+        self,
+        items: List[EmbeddingItem],
+        sink: EmbeddingSink,
+        checkpoint: Optional[EmbeddingCheckpoint] = None,
+    ) -> dict:
+        """
+        Embed every item and hand each batch's vectors to sink as soon as the batch is done.
+        Items already in the checkpoint are skipped. The caller clears the checkpoint once the whole job is done.
+        """
+        completed = checkpoint.completed if checkpoint is not None else set()
+        pending = [(item_id, text) for item_id, text in items if item_id not in completed]
+        batches = self.plan_batches(pending)
+        report = {
+            "items": len(items),
+            "resumed": len(items) - len(pending),
+            "batches": len(batches),
+            "embedded": 0,
+            "tokens": 0,
+        }
+
+        started_at = time.perf_counter()
+        tasks = [asyncio.create_task(self._process(batch, sink, checkpoint, report)) for batch in batches]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Stop the remaining batches; whatever was stored is in the checkpoint for the next run
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        report["seconds"] = round(time.perf_counter() - started_at, 4)
+        return report
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "requests": self.requests,
+            "tokens_embedded": self.tokens_embedded,
+            "rate_limited_retries": self.rate_limited_retries,
+            "transient_retries": self.transient_retries,
+            "failed_batches": self.failed_batches,
+            "batch_tokens": self.batch_tokens_histogram.snapshot(),
+            "request_seconds": self.request_seconds_histogram.snapshot(),
+            "rate_limit_wait_seconds": self.rate_limit_wait_seconds_histogram.snapshot(),
+        }
+
+
+def build_embedding_scheduler(embeddings: Embeddings) -> EmbeddingScheduler:
+    """Scheduler configured from the environment."""
+    return EmbeddingScheduler(
+        embeddings,
+        max_batch_tokens=EMBEDDING_BATCH_MAX_TOKENS,
+        max_batch_inputs=EMBEDDING_BATCH_MAX_INPUTS,
+        max_concurrency=EMBEDDING_MAX_CONCURRENCY,
+        tokens_per_minute=EMBEDDING_TOKENS_PER_MINUTE,
+        max_retries=EMBEDDING_MAX_RETRIES,
+        backoff_base_seconds=EMBEDDING_BACKOFF_BASE_SECONDS,
+        backoff_max_seconds=EMBEDDING_BACKOFF_MAX_SECONDS,
+        checkpoint_dir=EMBEDDING_CHECKPOINT_DIR or None,
+    )
@@ -0,0 +1,364 @@
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, List, Optional
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+from langchain_qdrant import QdrantVectorStore
+
+from app.schemas.search import FILTERABLE_METADATA_FIELDS
+
+# Zero-copy mmap of the flat vector storage where supported, plain mmap flag otherwise
+_MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+class FaissVectorStore:
+    """
+    In-process mirror of the Qdrant collection: a memory-mapped FAISS HNSW index over normalized vectors
+    plus a compact SQLite payload table. FAISS ids are the payload table rowids, which map back to
+    Qdrant point ids.
+
+    Every worker may write: writers hold an exclusive lock on <index_path>.lock and always start from the
+    index and payload table on disk, never from their own possibly stale mapping.
+
+    HNSW graphs do not support removing vectors, so replaced and deleted points only lose their payload row.
+    Search over-fetches by the number of such orphaned vectors, and once they exceed max_orphan_ratio of the
+    live rows the index is rebuilt from the live vectors alone.
+    """
+
+    def __init__(
+        self,
+        index_path: str,
+        payload_path: str,
+        hnsw_m: int = 32,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        max_orphan_ratio: float = 0.2,
+        reload_interval_seconds: float = 30,
+    ):
+        self.index_path = index_path
+        self.payload_path = payload_path
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.max_orphan_ratio = max_orphan_ratio
+        self.reload_interval_seconds = reload_interval_seconds
+
+        self._lock = threading.RLock()
+        self._index: Optional[faiss.Index] = None
+        self._payloads: Optional[sqlite3.Connection] = None
+        self._payloads_inode: Optional[int] = None
+        self._loaded_mtime: Optional[float] = None
+        self._reload_checked_at = 0.0
+
+        for path in (index_path, payload_path):
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    @property
+    def ready(self) -> bool:
+        return self._index is not None and self._payloads is not None
+
+    def __len__(self) -> int:
+        return self._index.ntotal if self._index is not None else 0
+
+    @staticmethod
+    def _connect_payloads(path: str) -> sqlite3.Connection:
+        connection = sqlite3.connect(path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS payloads (
+                row_id INTEGER PRIMARY KEY,
+                point_id TEXT NOT NULL UNIQUE,
+                page_content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            )
+            """
+        )
+        # Expression indexes mirror the Qdrant payload indexes so filtered searches stay cheap
+        for field in FILTERABLE_METADATA_FIELDS:
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_payloads_{field} ON payloads (json_extract(metadata, '$.{field}'))"
+            )
+        return connection
+
+    def _open_payloads(self) -> sqlite3.Connection:
+        """Connection to the payload table on disk, reopened when a snapshot in any worker replaced the file."""
+        inode = os.stat(self.payload_path).st_ino if os.path.exists(self.payload_path) else None
+        if self._payloads is not None and inode != self._payloads_inode:
+            self._payloads.close()
+            self._payloads = None
+        if self._payloads is None:
+            self._payloads = self._connect_payloads(self.payload_path)
+            self._payloads_inode = os.stat(self.payload_path).st_ino
+        return self._payloads
+
+    def _new_index(self, dim: int) -> faiss.Index:
+        hnsw = faiss.IndexHNSWFlat(dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efConstruction = self.ef_construction
+        return faiss.IndexIDMap2(hnsw)
+
+    @staticmethod
+    def _as_matrix(vectors: List[List[float]]) -> np.ndarray:
+        # Qdrant uses cosine distance; inner product over L2-normalized vectors ranks identically
+        matrix = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+        faiss.normalize_L2(matrix)
+        return matrix
+
+    def load(self) -> bool:
+        """Memory-map the index from disk; pages are faulted in on demand, so startup stays fast."""
+        if not (os.path.exists(self.index_path) and os.path.exists(self.payload_path)):
+            return False
+        with self._lock:
+            self._index = faiss.read_index(self.index_path, _MMAP_FLAGS)
+            self._open_payloads()
+            self._loaded_mtime = os.path.getmtime(self.index_path)
+        return True
+
+    def reload_if_changed(self) -> None:
+        now = time.monotonic()
+        if now - self._reload_checked_at < self.reload_interval_seconds:
+            return
+        self._reload_checked_at = now
+        try:
+            mtime = os.path.getmtime(self.index_path)
+        except OSError:
+            return
+        if self._loaded_mtime is None or mtime > self._loaded_mtime:
+            self.load()
+
+    @contextmanager
+    def _file_lock(self):
+        # Only writers take it; readers are safe because the index file is swapped in atomically
+        with open(f"{self.index_path}.lock", "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _write_index(self, index: faiss.Index) -> None:
+        # Write next to the live file and rename so mmap readers in other workers never see a partial index
+        temp_path = f"{self.index_path}.tmp.{os.getpid()}"
+        faiss.write_index(index, temp_path)
+        os.replace(temp_path, self.index_path)
+
+    def snapshot_from_qdrant(self, client: QdrantClient, collection_name: str, batch_size: int = 256) -> int:
+        """Rebuild the index and payload table from a full scroll of the Qdrant collection."""
+        temp_payload_path = f"{self.payload_path}.tmp.{os.getpid()}"
+        if os.path.exists(temp_payload_path):
+            os.remove(temp_payload_path)
+        payloads = self._connect_payloads(temp_payload_path)
+
+        index = None
+        row_id = 0
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            if points:
+                vectors = [point.vector for point in points]
+                if index is None:
+                    index = self._new_index(len(vectors[0]))
+                row_ids = np.arange(row_id, row_id + len(points), dtype=np.int64)
+                index.add_with_ids(self._as_matrix(vectors), row_ids)
+                payloads.executemany(
+                    "INSERT INTO payloads (row_id, point_id, page_content, metadata) VALUES (?, ?, ?, ?)",
+                    [self._payload_row(int(rid), point) for rid, point in zip(row_ids, points)],
+                )
+                row_id += len(points)
+            if offset is None:
+                break
+
+        payloads.commit()
+        payloads.close()
+        if index is None:
+            print("FAISS snapshot skipped: the Qdrant collection is empty.")
+            os.remove(temp_payload_path)
+            return 0
+
+        with self._lock, self._file_lock():
+            if self._payloads is not None:
+                self._payloads.close()
+                self._payloads = None
+            os.replace(temp_payload_path, self.payload_path)
+            self._write_index(index)
+            self.load()
+        return row_id
+
+    @staticmethod
+    def _payload_row(row_id: int, point) -> tuple:
+        payload = point.payload or {}
+        return (
+            row_id,
+            str(point.id),
+            payload.get(QdrantVectorStore.CONTENT_KEY) or "",
+            json.dumps(payload.get(QdrantVectorStore.METADATA_KEY) or {}, ensure_ascii=False),
+        )
+
+    def add_points(self, points: Iterable) -> int:
+        """Incrementally add points (with vectors and payloads) fetched from Qdrant after an ingestion."""
+        points = [point for point in points if point.vector is not None]
+        if not points:
+            return 0
+
+        with self._lock, self._file_lock():
+            self._open_payloads()
+
+            # The live index is memory-mapped read-only and may predate another worker's write,
+            # so mutate a private copy of what is on disk now and swap it in
+            if os.path.exists(self.index_path):
+                index = faiss.read_index(self.index_path)
+            else:
+                index = self._new_index(len(points[0].vector))
+
+            # Re-upserted points replace their previous payload row; their old vector is orphaned until compaction
+            point_ids = [str(point.id) for point in points]
+            placeholders = ",".join("?" * len(point_ids))
+            self._payloads.execute(f"DELETE FROM payloads WHERE point_id IN ({placeholders})", point_ids)
+
+            # Allocate above every id on disk, in the payload table and in the index, so writers never collide
+            next_row_id = self._payloads.execute("SELECT COALESCE(MAX(row_id) + 1, 0) FROM payloads").fetchone()[0]
+            next_row_id = max(next_row_id, self._max_index_id(index) + 1)
+            row_ids = np.arange(next_row_id, next_row_id + len(points), dtype=np.int64)
+            index.add_with_ids(self._as_matrix([point.vector for point in points]), row_ids)
+
+            self._payloads.executemany(
+                "INSERT INTO payloads (row_id, point_id, page_content, metadata) VALUES (?, ?, ?, ?)",
+                [self._payload_row(int(rid), point) for rid, point in zip(row_ids, points)],
+            )
+            self._payloads.commit()
+            self._write_index(self._compact_if_needed(index))
+            self.load()
+        return len(points)
+
+    def remove_points(self, point_ids: Iterable[str]) -> int:
+        """Drop points from the mirror by deleting their payload rows; compacts the index once enough are orphaned."""
+        point_ids = [str(point_id) for point_id in point_ids]
+        if not point_ids:
+            return 0
+        with self._lock, self._file_lock():
+            self._open_payloads()
+            placeholders = ",".join("?" * len(point_ids))
+            removed = self._payloads.execute(
+                f"DELETE FROM payloads WHERE point_id IN ({placeholders})", point_ids
+            ).rowcount
+            self._payloads.commit()
+            if removed and os.path.exists(self.index_path):
+                # Count orphans against the index on disk, which another worker may have rewritten
+                self.load()
+                if self._orphan_count(self._index) > self._max_orphans():
+                    # The mapped index is read-only, so compaction reads a private copy to rebuild from
+                    self._write_index(self._compact(faiss.read_index(self.index_path)))
+                    self.load()
+        return removed
+
+    def _live_count(self) -> int:
+        return self._payloads.execute("SELECT COUNT(*) FROM payloads").fetchone()[0]
+
+    def _orphan_count(self, index: faiss.Index) -> int:
+        """Vectors in the index whose point was replaced or deleted."""
+        return max(index.ntotal - self._live_count(), 0)
+
+    def _max_orphans(self) -> float:
+        return self.max_orphan_ratio * self._live_count()
+
+    def _compact(self, index: faiss.Index) -> faiss.Index:
+        """A fresh index holding only the vectors that still have a payload row, under the same ids."""
+        live_row_ids = np.array(
+            [row[0] for row in self._payloads.execute("SELECT row_id FROM payloads ORDER BY row_id")], dtype=np.int64
+        )
+        # A writer that died between committing payload rows and writing the index leaves rows with no vector
+        if index.ntotal:
+            live_row_ids = live_row_ids[np.isin(live_row_ids, faiss.vector_to_array(index.id_map))]
+        else:
+            live_row_ids = live_row_ids[:0]
+        compacted = self._new_index(index.d)
+        if len(live_row_ids):
+            # Stored vectors are already normalized, so they go back in as they are
+            vectors = np.vstack([index.reconstruct(int(row_id)) for row_id in live_row_ids])
+            compacted.add_with_ids(np.ascontiguousarray(vectors, dtype=np.float32), live_row_ids)
+        return compacted
+
+    def _compact_if_needed(self, index: faiss.Index) -> faiss.Index:
+        return self._compact(index) if self._orphan_count(index) > self._max_orphans() else index
+
+    @staticmethod
+    def _max_index_id(index: faiss.Index) -> int:
+        id_map = faiss.vector_to_array(index.id_map) if index.ntotal else np.array([-1])
+        return int(id_map.max())
+
+    def clear(self) -> None:
+        with self._lock, self._file_lock():
+            self._index = None
+            if self._payloads is not None:
+                self._payloads.close()
+                self._payloads = None
+            for path in (self.index_path, self.payload_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _matching_row_ids(self, metadata_filter: dict) -> np.ndarray:
+        clauses = " AND ".join(f"json_extract(metadata, '$.{field}') = ?" for field in metadata_filter)
+        rows = self._payloads.execute(
+            f"SELECT row_id FROM payloads WHERE {clauses}", list(metadata_filter.values())
+        ).fetchall()
+        return np.array([row[0] for row in rows], dtype=np.int64)
+
+    def search(self, query_vector: List[float], k: int = 10, metadata_filter: Optional[dict] = None) -> List[Document]:
+        self.reload_if_changed()
+        with self._lock:
+            if not self.ready or not len(self):
+                return []
+            # Orphaned vectors have no payload row and are dropped below, so fetch enough to still return k hits
+            fetch_k = min(len(self), k + self._orphan_count(self._index))
+            params = faiss.SearchParametersHNSW(efSearch=max(self.ef_search, fetch_k))
+            if metadata_filter:
+                unknown_fields = set(metadata_filter) - set(FILTERABLE_METADATA_FIELDS)
+                if unknown_fields:
+                    raise ValueError(f"Cannot filter on {', '.join(sorted(unknown_fields))}")
+                allowed_row_ids = self._matching_row_ids(metadata_filter)
+                if not len(allowed_row_ids):
+                    return []
+                # Restrict graph traversal results to the rows that match the filter; those are all live rows
+                selector = faiss.IDSelectorBatch(len(allowed_row_ids), faiss.swig_ptr(allowed_row_ids))
+                fetch_k = k
+                params = faiss.SearchParametersHNSW(efSearch=max(self.ef_search, k * 4), sel=selector)
+            scores, row_ids = self._index.search(self._as_matrix([query_vector]), fetch_k, params=params)
+
+            hits = [(int(row_id), float(score)) for row_id, score in zip(row_ids[0], scores[0]) if row_id >= 0]
+            if not hits:
+                return []
+            placeholders = ",".join("?" * len(hits))
+            rows = self._payloads.execute(
+                f"SELECT row_id, point_id, page_content, metadata FROM payloads WHERE row_id IN ({placeholders})",
+                [row_id for row_id, _ in hits],
+            ).fetchall()
+
+        by_row_id = {row[0]: row for row in rows}
+        documents = []
+        for row_id, score in hits:
+            row = by_row_id.get(row_id)
+            if row is None:
+                continue
+            metadata = json.loads(row[3])
+            metadata["_id"] = row[1]
+            metadata["_score"] = score
+            documents.append(Document(page_content=row[2], metadata=metadata))
+            if len(documents) >= k:
+                break
+        return documents
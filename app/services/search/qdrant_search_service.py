@@ -1,30 +1,348 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_openai.embeddings import OpenAIEmbeddings
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
 from langchain_qdrant import QdrantVectorStore
 
-from services.search.reranker import Reranker
+from app.config.config import (
+    EMBEDDING_DIMENSIONS,
+    RERANK_MAX_WORKERS,
+    SEARCH_MODE,
+    DENSE_CANDIDATE_K,
+    HYBRID_DENSE_K,
+    HYBRID_SPARSE_K,
+    HYBRID_CANDIDATE_K,
+    RRF_K,
+)
+from app.schemas.search import FILTERABLE_METADATA_FIELDS, SearchFilters
+from app.services.search.bm25_index import BM25Index
+from app.services.search.faiss_store import FaissVectorStore
+from app.services.search.rank_fusion import reciprocal_rank_fusion
+from app.services.search.rerank_scheduler import RerankScheduler
+from app.services.search.reranker import Reranker
 
 
 class QdrantSearchService:
-    def __init__(self, collection_name: str = "immigration_docs"):
+    def __init__(
+        self,
+        collection_name: str = "immigration_docs",
+        embeddings: Optional[Embeddings] = None,
+        reranker: Optional[Reranker] = None,
+        search_mode: Optional[str] = None,
+        sparse_index: Optional[BM25Index] = None,
+        faiss_store: Optional[FaissVectorStore] = None,
+    ):
         self.collection_name = collection_name
+        self.search_mode = search_mode or SEARCH_MODE
+        if self.search_mode not in ("dense", "hybrid"):
+            raise ValueError(f"Search mode '{self.search_mode}' is not defined. Choose 'dense' or 'hybrid'.")
+        self.sparse_index = sparse_index
+        # When set, dense retrieval reads from the in-process FAISS mirror instead of querying Qdrant
+        self.faiss_store = faiss_store
         self.client = QdrantClient(host="localhost", port=6333)
-        self.embeddings = OpenAIEmbeddings()
+        self.async_client = AsyncQdrantClient(host="localhost", port=6333)
+        self.embeddings = embeddings or OpenAIEmbeddings()
+        self.bootstrap_collection()
         self.vector_store = QdrantVectorStore(
             client=self.client,
             collection_name=self.collection_name,
             embedding=self.embeddings,
         )
-        self.reranker = Reranker()
+        self.reranker = reranker or Reranker()
+        # CrossEncoder.predict is CPU bound, so it runs on a small dedicated pool instead of the event loop
+        self.rerank_executor = ThreadPoolExecutor(max_workers=RERANK_MAX_WORKERS, thread_name_prefix="rerank")
+        # Optional cross-request micro-batcher; attached and started by the model registry
+        self.rerank_scheduler: Optional[RerankScheduler] = None
+        # Bumped on every ingestion in this process so dependent caches can invalidate themselves
+        self.collection_version = 0
+
+    @property
+    def hybrid_enabled(self) -> bool:
+        return self.search_mode == "hybrid" and self.sparse_index is not None
+
+    @property
+    def default_candidate_k(self) -> int:
+        # Fused candidates are already lexically and semantically on topic, so the reranker needs fewer of them
+        return HYBRID_CANDIDATE_K if self.hybrid_enabled else DENSE_CANDIDATE_K
+
+    def bootstrap_collection(self) -> None:
+        """Create the collection if needed and make sure every filterable metadata field has a payload index."""
+        if not self.client.collection_exists(self.collection_name):
+            self.client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=models.VectorParams(size=EMBEDDING_DIMENSIONS, distance=models.Distance.COSINE),
+            )
+            print(f"Created Qdrant collection '{self.collection_name}'.")
+
+        existing_indexes = self.client.get_collection(self.collection_name).payload_schema or {}
+        # document_key is not a search filter, but re-ingestion looks up a document's chunks by it
+        for field in (*FILTERABLE_METADATA_FIELDS, "document_key"):
+            field_name = f"{QdrantVectorStore.METADATA_KEY}.{field}"
+            if field_name in existing_indexes:
+                continue
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=models.PayloadSchemaType.KEYWORD,
+            )
+            print(f"Created payload index on '{field_name}'.")
+
+    @staticmethod
+    def build_qdrant_filter(filters: Optional[SearchFilters]) -> Optional[models.Filter]:
+        if filters is None or filters.is_empty():
+            return None
+        return models.Filter(
+            must=[
+                models.FieldCondition(
+                    key=f"{QdrantVectorStore.METADATA_KEY}.{key}",
+                    match=models.MatchValue(value=value),
+                )
+                for key, value in filters.as_metadata().items()
+            ]
+        )
+
+    def mark_collection_changed(self) -> None:
+        self.collection_version += 1
+
+    def bootstrap_sparse_index(self) -> None:
+        """Load the persisted BM25 index, or rebuild it from the collection when none exists yet."""
+        if self.sparse_index is None:
+            return
+        if self.sparse_index.load():
+            print(f"Loaded BM25 index with {len(self.sparse_index)} chunks.")
+            return
+        try:
+            indexed = self.sparse_index.rebuild_from_qdrant(self.client, self.collection_name)
+            print(f"Rebuilt BM25 index from Qdrant with {indexed} chunks.")
+        except Exception as e:
+            print(f"BM25 index rebuild failed: {e}")
+
+    def bootstrap_faiss_store(self) -> None:
+        """Memory-map the FAISS mirror, or snapshot it from the collection when none exists yet."""
+        if self.faiss_store is None:
+            return
+        if self.faiss_store.load():
+            print(f"Memory-mapped FAISS index with {len(self.faiss_store)} vectors.")
+            return
+        try:
+            mirrored = self.faiss_store.snapshot_from_qdrant(self.client, self.collection_name)
+            print(f"Snapshotted {mirrored} vectors from Qdrant into the FAISS index.")
+        except Exception as e:
+            print(f"FAISS snapshot failed: {e}")
+
+    def on_documents_added(self, ids: List[str], documents: List[Document]) -> None:
+        """Keep secondary indexes in step with chunks just written to the collection."""
+        if self.sparse_index is not None:
+            self.sparse_index.add(ids, documents)
+            self.sparse_index.save()
+        if self.faiss_store is not None and ids:
+            # Mirror exactly what Qdrant stored, so the FAISS copy never drifts from the source of truth
+            points = []
+            for start in range(0, len(ids), 256):
+                points.extend(self.client.retrieve(
+                    self.collection_name, ids=ids[start:start + 256], with_payload=True, with_vectors=True
+                ))
+            self.faiss_store.add_points(points)
+        self.mark_collection_changed()
+
+    def stored_metadata(self, ids: List[str], batch_size: int = 256) -> Dict[str, dict]:
+        """Metadata of those of the given ids that are already stored in the collection."""
+        stored = {}
+        for start in range(0, len(ids), batch_size):
+            points = self.client.retrieve(
+                self.collection_name,
+                ids=ids[start:start + batch_size],
+                with_payload=[QdrantVectorStore.METADATA_KEY],
+                with_vectors=False,
+            )
+            for point in points:
+                stored[str(point.id)] = (point.payload or {}).get(QdrantVectorStore.METADATA_KEY) or {}
+        return stored
+
+    def update_chunk_metadata(self, metadata_by_id: Dict[str, dict]) -> None:
+        """Replace the metadata of stored chunks in place, keeping their text and vectors."""
+        if not metadata_by_id:
+            return
+        self.client.batch_update_points(
+            collection_name=self.collection_name,
+            update_operations=[
+                models.SetPayloadOperation(
+                    set_payload=models.SetPayload(payload={QdrantVectorStore.METADATA_KEY: metadata}, points=[point_id])
+                )
+                for point_id, metadata in metadata_by_id.items()
+            ],
+        )
+
+    def upsert_chunks(
+        self,
+        ids: List[str],
+        documents: List[Document],
+        vectors: List[List[float]],
+        update_indexes: bool = True,
+    ) -> None:
+        """
+        Write chunks embedded elsewhere, with the same payload layout QdrantVectorStore uses.
+        Bulk jobs pass update_indexes=False and call on_documents_added once for everything they wrote,
+        since every update rewrites the BM25 file and the FAISS index.
+        """
+        self.client.upsert(
+            collection_name=self.collection_name,
+            points=[
+                models.PointStruct(
+                    id=point_id,
+                    vector=vector,
+                    payload={
+                        QdrantVectorStore.CONTENT_KEY: document.page_content,
+                        QdrantVectorStore.METADATA_KEY: document.metadata,
+                    },
+                )
+                for point_id, document, vector in zip(ids, documents, vectors)
+            ],
+        )
+        if update_indexes:
+            self.on_documents_added(ids, documents)
+
+    def point_ids_for_document(self, document_key: str, batch_size: int = 256) -> List[str]:
+        """Ids of every chunk ingested from the document with the given key."""
+        document_filter = models.Filter(
+            must=[
+                models.FieldCondition(
+                    key=f"{QdrantVectorStore.METADATA_KEY}.document_key",
+                    match=models.MatchValue(value=document_key),
+                )
+            ]
+        )
+        point_ids = []
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=document_filter,
+                limit=batch_size,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False,
+            )
+            point_ids.extend(str(point.id) for point in points)
+            if offset is None:
+                return point_ids
+
+    def delete_points(self, ids: List[str]) -> None:
+        if not ids:
+            return
+        self.client.delete(self.collection_name, points_selector=models.PointIdsList(points=ids))
+        self.on_documents_removed(ids)
+
+    def on_documents_removed(self, ids: Iterable[str]) -> None:
+        """Keep secondary indexes in step with chunks just deleted from the collection."""
+        ids = list(ids)
+        if self.sparse_index is not None:
+            self.sparse_index.remove(ids)
+            self.sparse_index.save()
+        if self.faiss_store is not None:
+            self.faiss_store.remove_points(ids)
+        self.mark_collection_changed()
+
+    def on_collection_deleted(self) -> None:
+        if self.sparse_index is not None:
+            self.sparse_index.clear()
+            self.sparse_index.save()
+        if self.faiss_store is not None:
+            self.faiss_store.clear()
+        self.mark_collection_changed()
+
+    async def acollection_fingerprint(self) -> tuple:
+        """Cheap summary of the collection state used to detect writes made by other processes."""
+        info = await self.async_client.get_collection(self.collection_name)
+        return info.points_count, info.indexed_vectors_count, info.segments_count
 
     # Searches for the top-k most similar document chunks based on the input query
-    def search_similarity(self, query: str, k: int = 10):
+    def search_similarity(self, query: str, k: int = 10, filters: Optional[SearchFilters] = None):
         try:
-            results = self.vector_store.similarity_search(query=query, k=k)
+            results = self.vector_store.similarity_search(query=query, k=k, filter=self.build_qdrant_filter(filters))
             if not results:
                 return []
             reranked_results = self.reranker.rerank(query, results, 5)
             return reranked_results
         except Exception as e:
             print(f"Similarity search failed: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    def _point_to_document(self, point) -> Document:
+        payload = point.payload or {}
+        metadata = dict(payload.get(QdrantVectorStore.METADATA_KEY) or {})
+        metadata["_id"] = point.id
+        metadata["_collection_name"] = self.collection_name
+        return Document(
+            page_content=payload.get(QdrantVectorStore.CONTENT_KEY) or "",
+            metadata=metadata,
+        )
+
+    async def _adense_candidates(self, query: str, k: int, filters: Optional[SearchFilters] = None) -> List[Document]:
+        """Dense retrieval using async embeddings and the async Qdrant client (or the FAISS mirror)."""
+        query_vector = await self.embeddings.aembed_query(query)
+        if self.faiss_store is not None and self.faiss_store.ready:
+            metadata_filter = filters.as_metadata() if filters is not None else None
+            return await asyncio.to_thread(self.faiss_store.search, query_vector, k, metadata_filter)
+        response = await self.async_client.query_points(
+            collection_name=self.collection_name,
+            query=query_vector,
+            query_filter=self.build_qdrant_filter(filters),
+            limit=k,
+            with_payload=True,
+        )
+        return [self._point_to_document(point) for point in response.points]
+
+    async def _asparse_candidates(self, query: str, k: int, filters: Optional[SearchFilters] = None) -> List[Document]:
+        metadata_filter = filters.matches if filters is not None and not filters.is_empty() else None
+        results = await asyncio.to_thread(self.sparse_index.search, query, k, metadata_filter)
+        return [document for document, _ in results]
+
+    async def aretrieve_candidates(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[Document]:
+        """Candidate retrieval without reranking: dense only, or dense + BM25 fused with reciprocal rank fusion."""
+        k = k or self.default_candidate_k
+        if not self.hybrid_enabled:
+            return await self._adense_candidates(query, k, filters)
+
+        dense_results, sparse_results = await asyncio.gather(
+            self._adense_candidates(query, HYBRID_DENSE_K, filters),
+            self._asparse_candidates(query, HYBRID_SPARSE_K, filters),
+        )
+        return reciprocal_rank_fusion([dense_results, sparse_results], k=RRF_K)[:k]
+
+    async def arerank(self, query: str, documents: List[Document], top_k: int = 5) -> List[Document]:
+        """Rerank on the bounded executor so the event loop keeps serving other requests."""
+        if not documents:
+            return []
+        if self.rerank_scheduler is not None and self.rerank_scheduler.running:
+            return await self.rerank_scheduler.rerank(query, documents, top_k)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.rerank_executor, self.reranker.rerank, query, documents, top_k)
+
+    # Async counterpart of search_similarity for use inside request handlers
+    async def asearch_similarity(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        top_k: int = 5,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[Document]:
+        try:
+            results = await self.aretrieve_candidates(query, k, filters)
+            return await self.arerank(query, results, top_k)
+        except Exception as e:
+            print(f"Async similarity search failed: {e}")
+            return []
+
+    async def aclose(self) -> None:
+        await self.async_client.close()
+        self.rerank_executor.shutdown(wait=False)
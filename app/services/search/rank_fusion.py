@@ -0,0 +1,31 @@
+from typing import Dict, List, Sequence
+
+from langchain_core.documents import Document
+
+
+def fusion_key(document: Document) -> str:
+    """Identity of a chunk across the fused lists: its Qdrant point id when known, otherwise its text."""
+    point_id = document.metadata.get("_id")
+    return str(point_id) if point_id is not None else document.page_content
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Document]], k: int = 60) -> List[Document]:
+    """
+    Fuse several ranked lists with reciprocal rank fusion: score(d) = sum(1 / (k + rank)).
+    Documents are deduplicated by point id; the first occurrence is kept.
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key = fusion_key(document)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(key, document)
+
+    ordered_keys = sorted(scores, key=lambda key: scores[key], reverse=True)
+    fused = []
+    for key in ordered_keys:
+        document = documents[key]
+        document.metadata["_rrf_score"] = round(scores[key], 6)
+        fused.append(document)
+    return fused
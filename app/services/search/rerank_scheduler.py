@@ -0,0 +1,170 @@
+import asyncio
+import time
+from concurrent.futures import Executor
+from typing import List, Optional, Sequence, Tuple
+
+from app.services.metrics.histogram import Histogram
+from app.services.search.reranker import Reranker
+
+
+class _RerankRequest:
+    __slots__ = ("pairs", "future", "enqueued_at")
+
+    def __init__(self, pairs: List[Tuple[str, str]], future: asyncio.Future):
+        self.pairs = pairs
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class RerankScheduler:
+    """
+    Collects (query, passage) pairs from concurrent requests for a short window, or until the batch is full,
+    scores them with a single batched predict call on a worker thread and routes the scores back to each caller.
+    """
+
+    def __init__(
+        self,
+        reranker: Reranker,
+        executor: Executor,
+        batch_window_ms: float = 5,
+        max_batch_size: int = 64,
+        max_inflight_batches: int = 2,
+    ):
+        self.reranker = reranker
+        self.executor = executor
+        self.batch_window_seconds = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_inflight_batches = max_inflight_batches
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Semaphore] = None
+        self._batch_tasks: set = set()
+
+        self.batch_size_histogram = Histogram([1, 2, 5, 10, 20, 30, 40, 50, 64, 96, 128, 256])
+        self.queue_wait_histogram = Histogram([0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 0.5, 1.0])
+        self.predict_seconds_histogram = Histogram([0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5])
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._inflight = asyncio.Semaphore(self.max_inflight_batches)
+        self._worker = asyncio.create_task(self._run(), name="rerank-scheduler")
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+
+        # Fail anything still waiting so callers do not hang on shutdown
+        while self._queue is not None and not self._queue.empty():
+            request = self._queue.get_nowait()
+            if not request.future.done():
+                request.future.set_exception(RuntimeError("Rerank scheduler stopped"))
+
+    async def score(self, pairs: Sequence[Tuple[str, str]]) -> List[float]:
+        if not pairs:
+            return []
+        if not self.running:
+            raise RuntimeError("Rerank scheduler is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_RerankRequest(list(pairs), future))
+        return await future
+
+    async def rerank(self, query: str, documents: list, top_k: int = 5) -> list:
+        pairs = [(query, document.page_content) for document in documents]
+        scores = await self.score(pairs)
+        return self.reranker.select_top(documents, scores, top_k)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            pair_count = len(first.pairs)
+
+            try:
+                # Keep collecting until the window closes or the batch is full
+                deadline = loop.time() + self.batch_window_seconds
+                while pair_count < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        request = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    batch.append(request)
+                    pair_count += len(request.pairs)
+
+                # Backpressure: wait for a free slot before dispatching another batch to the executor
+                await self._inflight.acquire()
+            except asyncio.CancelledError:
+                # These requests are already off the queue, so stop() cannot fail them for us
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(RuntimeError("Rerank scheduler stopped"))
+                raise
+            task = asyncio.create_task(self._score_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _score_batch(self, batch: List[_RerankRequest]) -> None:
+        try:
+            dispatched_at = time.perf_counter()
+            pending = [request for request in batch if not request.future.cancelled()]
+            for request in pending:
+                self.queue_wait_histogram.observe(dispatched_at - request.enqueued_at)
+
+            all_pairs = [pair for request in pending for pair in request.pairs]
+            if not all_pairs:
+                return
+            self.batch_size_histogram.observe(len(all_pairs))
+
+            loop = asyncio.get_running_loop()
+            try:
+                scores = await loop.run_in_executor(
+                    self.executor, self.reranker.score, all_pairs, max(len(all_pairs), 1)
+                )
+            except Exception as e:
+                for request in pending:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                return
+            finally:
+                self.predict_seconds_histogram.observe(time.perf_counter() - dispatched_at)
+
+            # Route each slice of scores back to the caller that submitted those pairs
+            offset = 0
+            for request in pending:
+                request_scores = scores[offset:offset + len(request.pairs)]
+                offset += len(request.pairs)
+                if not request.future.done():
+                    request.future.set_result(request_scores)
+        finally:
+            self._inflight.release()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "inflight_batches": len(self._batch_tasks),
+            "batch_window_ms": self.batch_window_seconds * 1000,
+            "max_batch_size": self.max_batch_size,
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "queue_wait_seconds": self.queue_wait_histogram.snapshot(),
+            "predict_seconds": self.predict_seconds_histogram.snapshot(),
+        }
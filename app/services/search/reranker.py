@@ -1,19 +1,81 @@
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
 from sentence_transformers import CrossEncoder
 
+from app.config.config import (
+    RERANKER_MODEL_NAME,
+    RERANKER_BACKEND,
+    RERANKER_ONNX_DIR,
+    RERANKER_ONNX_QUANTIZATION,
+)
 
-class Reranker:
 
-    def __init__(self):
-        self.cross_encoder = CrossEncoder('cross-encoder/ms-marco-MiniLM-L-6-v2')
+def load_torch_cross_encoder(model_name: str = RERANKER_MODEL_NAME) -> CrossEncoder:
+    return CrossEncoder(model_name)
 
 
-    def rerank(self, query: str, documents: list, top_k: int = 5) -> list:
-        # Prepare (query, document) pairs
-        pairs = [(query, document.page_content) for document in documents]
+def load_onnx_int8_cross_encoder(
+    model_name: str = RERANKER_MODEL_NAME,
+    model_dir: str = RERANKER_ONNX_DIR,
+    quantization: str = RERANKER_ONNX_QUANTIZATION,
+) -> CrossEncoder:
+    """
+    Load the int8 dynamically quantized ONNX Runtime export of the cross-encoder,
+    exporting and quantizing it into model_dir on first use.
+    """
+    file_name = f"onnx/model_qint8_{quantization}.onnx"
+    if not os.path.exists(os.path.join(model_dir, file_name)):
+        export_onnx_int8_cross_encoder(model_name, model_dir, quantization)
+    return CrossEncoder(model_dir, backend="onnx", model_kwargs={"file_name": file_name})
 
-        # Get scores
-        scores = self.cross_encoder.predict(pairs)
 
+def export_onnx_int8_cross_encoder(
+    model_name: str = RERANKER_MODEL_NAME,
+    model_dir: str = RERANKER_ONNX_DIR,
+    quantization: str = RERANKER_ONNX_QUANTIZATION,
+) -> None:
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    print(f"Exporting {model_name} to ONNX with int8 dynamic quantization ({quantization}) into {model_dir}...")
+    # Loading with the onnx backend exports the fp32 graph when the repository has none
+    onnx_model = CrossEncoder(model_name, backend="onnx")
+    onnx_model.save_pretrained(model_dir)
+    export_dynamic_quantized_onnx_model(
+        onnx_model,
+        quantization_config=quantization,
+        model_name_or_path=model_dir,
+    )
+
+
+RERANKER_BACKENDS: Dict[str, Callable[[], CrossEncoder]] = {
+    "torch": load_torch_cross_encoder,
+    "onnx-int8": load_onnx_int8_cross_encoder,
+}
+
+
+class Reranker:
+
+    def __init__(self, backend: Optional[str] = None):
+        self.backend = backend or RERANKER_BACKEND
+        if self.backend not in RERANKER_BACKENDS:
+            raise ValueError(
+                f"Reranker backend '{self.backend}' is not defined. Choose one of: {', '.join(RERANKER_BACKENDS)}."
+            )
+        self.cross_encoder = RERANKER_BACKENDS[self.backend]()
+
+    def warmup(self) -> None:
+        # A first predict call initializes kernels and tokenizer caches
+        self.cross_encoder.predict([("warmup query", "warmup passage")])
+
+    def score(self, pairs: Sequence[Tuple[str, str]], batch_size: int = 32) -> List[float]:
+        """Score (query, passage) pairs in a single predict call."""
+        if not pairs:
+            return []
+        return [float(score) for score in self.cross_encoder.predict(list(pairs), batch_size=batch_size)]
+
+    @staticmethod
+    def select_top(documents: list, scores: Sequence[float], top_k: int = 5) -> list:
         # Combine with results
         scored_hits = list(zip(documents, scores))
 
@@ -21,5 +83,13 @@ class Reranker:
         scored_hits.sort(key=lambda x: x[1], reverse=True)
 
         # Final top-k results
-        top_results = [hit[0] for hit in scored_hits[:top_k]]
-        return top_results
\ No newline at end of file
+        return [hit[0] for hit in scored_hits[:top_k]]
+
+    def rerank(self, query: str, documents: list, top_k: int = 5) -> list:
+        # Prepare (query, document) pairs
+        pairs = [(query, document.page_content) for document in documents]
+
+        # Get scores
+        scores = self.score(pairs)
+
+        return self.select_top(documents, scores, top_k)
@@ -0,0 +1,57 @@
+import asyncio
+from typing import Awaitable, Optional, Set
+
+
+class BackgroundTaskRunner:
+    """
+    Keeps track of fire-and-forget work started after a response has been sent.
+    Holds a strong reference to every task so it is not garbage collected mid-flight,
+    logs failures instead of losing them, and lets the lifespan drain pending work on shutdown.
+    """
+
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+
+    def spawn(self, awaitable: Awaitable, name: Optional[str] = None) -> asyncio.Task:
+        task = asyncio.ensure_future(awaitable)
+        if name:
+            task.set_name(name)
+        self._tasks.add(task)
+        self.started += 1
+        task.add_done_callback(self._on_done)
+        return task
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.failed += 1
+            print(f"Background task '{task.get_name()}' failed: {error}")
+        else:
+            self.completed += 1
+
+    async def drain(self, timeout: float = 30.0) -> None:
+        """Wait for pending tasks to finish; whatever is still running after the timeout is cancelled."""
+        if not self._tasks:
+            return
+
+        pending = set(self._tasks)
+        _, still_running = await asyncio.wait(pending, timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        if still_running:
+            print(f"Cancelled {len(still_running)} background tasks still running at shutdown.")
+            await asyncio.gather(*still_running, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._tasks),
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
@@ -0,0 +1,183 @@
+from datetime import datetime
+from typing import List, Optional, Sequence, Set, Tuple
+
+import tiktoken
+from sqlalchemy import or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.db import AsyncSessionLocal
+from app.models.chat import ChatMessage, ChatThread, RoleEnum
+from app.services.chat.chat_model_service import ChatModelService
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a person moving to Switzerland and an immigration assistant.
+Update the summary with the new messages. Keep facts about the person (nationality, family, canton, permit, job, dates)
+and the questions already answered. Drop greetings and formatting. Answer with the updated summary only, at most {max_words} words.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+
+Updated summary:"""
+
+# Below this many tokens a truncated message carries no useful information
+MIN_MESSAGE_TOKENS = 8
+
+
+class ConversationHistory:
+    """Rolling summary of older turns plus the most recent messages of a thread, oldest first."""
+
+    def __init__(self, summary: Optional[str], messages: List[Tuple[RoleEnum, str]]):
+        self.summary = summary
+        self.messages = messages
+
+    def is_empty(self) -> bool:
+        return not self.summary and not self.messages
+
+
+class ConversationMemory:
+    """
+    Bounded thread memory for the chat pipeline.
+    The last N turns are kept verbatim; everything older is folded into ChatThread.summary
+    after each assistant turn, in the background, so prompts stay within a fixed token budget.
+    """
+
+    def __init__(
+        self,
+        chat_model_service: ChatModelService,
+        max_turns: int = 3,
+        token_budget: int = 1200,
+        summary_max_words: int = 200,
+        summary_model_name: str = "gpt-3.5",
+        encoding_model: str = "gpt-4o",
+    ):
+        self.chat_model_service = chat_model_service
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.summary_max_words = summary_max_words
+        self.summary_model_name = summary_model_name
+        self.encoding = tiktoken.encoding_for_model(encoding_model)
+        self._updating: Set[str] = set()
+        self.summaries_updated = 0
+        self.summary_failures = 0
+
+    @property
+    def window_size(self) -> int:
+        """Messages kept verbatim: one user and one assistant message per turn."""
+        return self.max_turns * 2
+
+    async def load(self, db: AsyncSession, thread: ChatThread, pending: Sequence = ()) -> ConversationHistory:
+        """
+        Recent messages of the thread. `pending` are messages accepted by the write-behind sink
+        but possibly not inserted yet; one that was flushed in the meantime is only counted once.
+        """
+        result = await db.execute(
+            select(ChatMessage.id, ChatMessage.role, ChatMessage.content, ChatMessage.created_at)
+            .where(ChatMessage.thread_id == thread.id)
+            .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+            .limit(self.window_size)
+        )
+        rows = {row.id: (row.created_at, row.id, row.role, row.content) for row in result}
+        for message in pending:
+            rows.setdefault(message.id, (message.created_at, message.id, message.role, message.content))
+
+        recent = sorted(rows.values())[-self.window_size:] if self.window_size else []
+        return ConversationHistory(thread.summary, [(role, content) for _, _, role, content in recent])
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        tokens = self.encoding.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return self.encoding.decode(tokens[:max_tokens]).rstrip() + " …"
+
+    def format(self, history: ConversationHistory, token_budget: Optional[int] = None) -> str:
+        """
+        Render the history for a prompt within the token budget.
+        The summary is always kept (truncated to half the budget at most); recent messages are added
+        newest first until the budget runs out, then put back in chronological order. A long message
+        may take at most half of what is left, so one verbose answer cannot push out the question before it.
+        """
+        budget = token_budget or self.token_budget
+        parts: List[str] = []
+
+        if history.summary:
+            summary = self._truncate(history.summary, budget // 2)
+            parts.append(f"Summary of earlier conversation: {summary}")
+            budget -= len(self.encoding.encode(parts[0]))
+
+        recent: List[str] = []
+        for index, (role, content) in enumerate(reversed(history.messages)):
+            if budget < MIN_MESSAGE_TOKENS:
+                break
+            line = f"{role.value.capitalize()}: {content}"
+            tokens = len(self.encoding.encode(line))
+            is_oldest = index == len(history.messages) - 1
+            allowance = budget if is_oldest else max(budget // 2, MIN_MESSAGE_TOKENS)
+            if tokens > allowance:
+                line = self._truncate(line, allowance)
+                tokens = allowance
+            recent.append(line)
+            budget -= tokens
+
+        parts.extend(reversed(recent))
+        return "\n".join(parts)
+
+    async def update_summary(self, thread_id: str) -> None:
+        """Fold messages that have left the verbatim window into the thread summary."""
+        # One update per thread at a time; a skipped update is caught up after the next turn
+        if thread_id in self._updating:
+            return
+        self._updating.add(thread_id)
+        try:
+            async with AsyncSessionLocal() as session:
+                thread = await session.get(ChatThread, thread_id)
+                if thread is None:
+                    return
+
+                query = select(ChatMessage).where(ChatMessage.thread_id == thread_id)
+                if thread.summarized_until is not None:
+                    query = query.where(ChatMessage.created_at > thread.summarized_until)
+                result = await session.execute(query.order_by(ChatMessage.created_at, ChatMessage.id))
+                unsummarized = result.scalars().all()
+
+                to_fold = unsummarized[:-self.window_size] if self.window_size else unsummarized
+                if not to_fold:
+                    return
+
+                prompt = SUMMARY_PROMPT.format(
+                    max_words=self.summary_max_words,
+                    summary=thread.summary or "(empty)",
+                    messages="\n".join(
+                        f"{message.role.value.capitalize()}: {message.content}" for message in to_fold
+                    ),
+                )
+                response = await self.chat_model_service.invoke(prompt, self.summary_model_name)
+                summarized_until: datetime = to_fold[-1].created_at
+
+                # Guard against a concurrent worker that already moved the watermark further
+                await session.execute(
+                    update(ChatThread)
+                    .where(
+                        ChatThread.id == thread_id,
+                        or_(ChatThread.summarized_until.is_(None), ChatThread.summarized_until < summarized_until),
+                    )
+                    .values(summary=response.content.strip(), summarized_until=summarized_until)
+                )
+                await session.commit()
+                self.summaries_updated += 1
+        except Exception as e:
+            self.summary_failures += 1
+            print(f"Thread summary update failed for {thread_id}: {e}")
+        finally:
+            self._updating.discard(thread_id)
+
+    def stats(self) -> dict:
+        return {
+            "max_turns": self.max_turns,
+            "token_budget": self.token_budget,
+            "updating": len(self._updating),
+            "summaries_updated": self.summaries_updated,
+            "summary_failures": self.summary_failures,
+        }
@@ -1,9 +1,26 @@
-from typing import Any
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
 
-from sqlalchemy import Row, RowMapping
+from fastapi import HTTPException
+from sqlalchemy import Row, RowMapping, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.models.chat import ChatThread
+from app.models.chat import ChatMessage, ChatThread
+
+
+def encode_cursor(created_at: datetime, message_id: str) -> str:
+    payload = json.dumps({"created_at": created_at.isoformat(), "id": message_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(payload["created_at"]), str(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 class ThreadService:
@@ -25,3 +42,41 @@ class ThreadService:
         self.db.add(thread)
         await self.db.flush()
         return thread
+
+    async def list_messages(
+        self,
+        thread_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        newest_first: bool = False
+    ) -> dict:
+        """
+        One page of a thread's messages using keyset pagination on (created_at, id).
+        Each page is a range scan on ix_chat_messages_thread_id_created_at_id, so its cost does not
+        depend on how deep into the thread it is, unlike OFFSET.
+        """
+        thread_exists = await self.db.scalar(select(ChatThread.id).where(ChatThread.id == thread_id))
+        if thread_exists is None:
+            raise HTTPException(status_code=404, detail="Thread not found")
+
+        sort_key = tuple_(ChatMessage.created_at, ChatMessage.id)
+        query = select(ChatMessage).where(ChatMessage.thread_id == thread_id)
+        if cursor is not None:
+            after = tuple_(*decode_cursor(cursor))
+            query = query.where(sort_key < after if newest_first else sort_key > after)
+        if newest_first:
+            query = query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+        else:
+            query = query.order_by(ChatMessage.created_at, ChatMessage.id)
+
+        # One extra row tells us whether another page exists without a COUNT
+        result = await self.db.execute(query.limit(limit + 1))
+        messages = result.scalars().all()
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+
+        next_cursor = None
+        if has_more:
+            last = messages[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+        return {"messages": messages, "next_cursor": next_cursor, "has_more": has_more}
@@ -5,6 +5,8 @@ import uuid
 
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
+from app.services.auth.revocation_list import revocation_list
+from app.services.auth.user_cache import user_cache
 
 
 class UserService:
@@ -57,10 +59,15 @@ class UserService:
             if not user:
                 raise HTTPException(status_code=404, detail="User not found")
 
+            was_active = user.is_active
             for field, value in user_in.dict(exclude_unset=True).items():
                 setattr(user, field, value)
+            if was_active and not user.is_active:
+                # Outstanding access tokens would otherwise stay valid until they expire
+                revocation_list.revoke_user(self.db, user_uuid)
 
             await self.db.commit()
+            user_cache.invalidate(user_uuid)
             await self.db.refresh(user)
             return user
         except ValueError:
@@ -76,7 +83,9 @@ class UserService:
                 raise HTTPException(status_code=404, detail="User not found")
 
             await self.db.delete(user)
+            revocation_list.revoke_user(self.db, user_uuid)
             await self.db.commit()
+            user_cache.invalidate(user_uuid)
             return user
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid user ID format")
@@ -4,6 +4,7 @@ Script to add documents to Qdrant vector database.
 Run this script to populate your local Qdrant with sample documents.
 """
 
+import asyncio
 import os
 import sys
 from pathlib import Path
@@ -13,23 +14,28 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from dotenv import load_dotenv
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams
-from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.vectorstores import Qdrant
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
 # Load environment variables
 load_dotenv()
 
+from app.services.documents.document_service import DocumentService
+from app.services.registry.model_registry import ModelRegistry
+
 def add_sample_documents():
     """Add sample immigration-related documents to Qdrant."""
     
     print("🚀 Starting to add documents to Qdrant...")
     
-    # Initialize Qdrant client and embeddings
-    client = QdrantClient(host="localhost", port=6333)
-    embeddings = OpenAIEmbeddings()
+    # Chunks are embedded through the rate-limited embedding scheduler; chunks already in the
+    # collection are skipped, and an interrupted run resumes from its checkpoint.
+    # The registry's search service carries the configured sparse index and FAISS mirror, so they
+    # stay in step with Qdrant instead of drifting until the next app restart
+    registry = ModelRegistry()
+    document_service = DocumentService(
+        registry.load_search(),
+        embedding_scheduler=registry.embedding_scheduler,
+    )
     
     # Sample immigration documents (you can replace with your real docs)
     sample_docs = [
@@ -99,33 +105,21 @@ def add_sample_documents():
             metadata=doc["metadata"]
         ))
     
-    # Split documents into chunks (optional, for larger documents)
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=50,
-        length_function=len,
-    )
-    
-    split_docs = text_splitter.split_documents(documents)
-    print(f"📄 Split {len(documents)} documents into {len(split_docs)} chunks")
-    
-    # Create collection and add documents
+    # Split, embed and store the documents
     try:
-        collection_name = "immigration_docs"
+        collection_name = document_service.qdrant_search_service.collection_name
         
-        # Create Qdrant vector store and add documents
-        vector_store = Qdrant.from_documents(
-            split_docs,
-            embeddings,
-            url="http://localhost:6333",
-            collection_name=collection_name,
-        )
+        if not asyncio.run(document_service.add_multiple_documents(documents)):
+            return False
         
-        print(f"✅ Successfully added {len(split_docs)} document chunks to collection '{collection_name}'")
+        print(f"✅ Successfully added {len(documents)} documents to collection '{collection_name}'")
+        scheduler_stats = document_service.embedding_scheduler.stats()
+        print(f"📊 Embedding scheduler: {scheduler_stats['requests']} requests, "
+              f"{scheduler_stats['tokens_embedded']} tokens, {scheduler_stats['rate_limited_retries']} rate-limit retries")
         
         # Test the search
         print("\n🔍 Testing search functionality...")
-        results = vector_store.similarity_search("How to get work permit in Switzerland?", k=2)
+        results = document_service.search_documents("How to get work permit in Switzerland?", k=2)
         
         print(f"Found {len(results)} relevant documents:")
         for i, result in enumerate(results, 1):
@@ -135,6 +129,9 @@ def add_sample_documents():
     except Exception as e:
         print(f"❌ Error adding documents: {e}")
         return False
+    finally:
+        document_service.ingestion_pipeline.close()
+        asyncio.run(registry.aclose())
     
     return True
 
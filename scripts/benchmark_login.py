@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark password verification under concurrent logins.
+Compares bcrypt run inline on the event loop (the old login path) with the bounded password_hasher pool,
+reporting login throughput, login latency and how long the event loop was blocked, which is what
+stalls chat streaming for everyone else on the worker.
+
+    python scripts/benchmark_login.py [--logins 200] [--concurrency 50] [--rounds 12]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from fastapi import HTTPException
+
+from app.services.auth.password_hasher import PasswordHasher, build_password_context
+
+PASSWORD = "correct horse battery staple"
+
+
+async def measure_loop_lag(stop: asyncio.Event, samples: list, interval: float = 0.01) -> None:
+    """Record how late a 10 ms timer fires; on a free loop this stays close to zero."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(loop.time() - expected, 0.0))
+
+
+async def run_logins(verify, logins: int, concurrency: int) -> dict:
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+    rejected = 0
+
+    async def login():
+        nonlocal rejected
+        async with gate:
+            started_at = time.perf_counter()
+            try:
+                await verify()
+            except HTTPException:
+                rejected += 1
+                return
+            latencies.append(time.perf_counter() - started_at)
+
+    stop = asyncio.Event()
+    lag_samples = []
+    lag_task = asyncio.create_task(measure_loop_lag(stop, lag_samples))
+    started_at = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started_at
+    stop.set()
+    await lag_task
+
+    latencies.sort()
+    return {
+        "logins_per_second": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else None,
+        "max_loop_lag_ms": max(lag_samples, default=0.0) * 1000,
+        "rejected": rejected,
+    }
+
+
+def print_result(label: str, result: dict) -> None:
+    print(
+        f"{label:<22} {result['logins_per_second']:>8.1f} logins/s   p50 {result['p50_ms']:>8.1f}ms   "
+        f"p95 {result['p95_ms']:>8.1f}ms   max loop lag {result['max_loop_lag_ms']:>8.1f}ms   "
+        f"rejected {result['rejected']}"
+    )
+
+
+async def run(args) -> None:
+    context = build_password_context(args.rounds)
+    hashed_password = context.hash(PASSWORD)
+
+    async def inline_verify():
+        context.verify(PASSWORD, hashed_password)
+
+    print(f"{args.logins} logins, {args.concurrency} concurrent, bcrypt cost {args.rounds}\n")
+    print_result("inline (event loop)", await run_logins(inline_verify, args.logins, args.concurrency))
+
+    for workers in args.workers:
+        hasher = PasswordHasher(context, max_workers=workers, max_queue=args.max_queue)
+
+        async def pooled_verify():
+            await hasher.verify_and_update(PASSWORD, hashed_password)
+
+        print_result(f"pool, {workers} workers", await run_logins(pooled_verify, args.logins, args.concurrency))
+        hasher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Pool sizes to compare")
+    parser.add_argument("--max-queue", type=int, default=64)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Benchmark thread history pagination as chat_messages grows.
+Seeds synthetic messages into the database from DATABASE_URL, then times keyset pages
+(first page and a page deep into a long thread) next to the equivalent OFFSET query at each table size.
+Keyset page latency should stay flat; OFFSET grows with the depth of the page.
+
+    python scripts/benchmark_message_pagination.py [--sizes 10000,100000,1000000,3000000] [--keep]
+
+Seeded rows belong to threads with user_id 'benchmark' and are deleted afterwards unless --keep is given.
+Run it against a scratch database: seeding millions of rows takes a while.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import text
+
+from app.db import AsyncSessionLocal, engine
+from app.services.threads.thread_service import ThreadService
+
+TARGET_THREAD_ID = "benchmark-target"
+FILLER_THREADS = 10000
+
+
+async def seed_target_thread(message_count: int) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO chat_threads (id, user_id) VALUES (:id, 'benchmark') ON CONFLICT DO NOTHING"
+        ), {"id": TARGET_THREAD_ID})
+        await conn.execute(text("""
+            INSERT INTO chat_messages (id, thread_id, role, content, created_at)
+            SELECT md5('target' || g), :thread_id,
+                   CASE WHEN g % 2 = 0 THEN 'USER'::roleenum ELSE 'ASSISTANT'::roleenum END,
+                   'benchmark message ' || g,
+                   now() - interval '1 year' + g * interval '1 second'
+            FROM generate_series(1, :count) g
+            ON CONFLICT DO NOTHING
+        """), {"thread_id": TARGET_THREAD_ID, "count": message_count})
+
+
+async def grow_table(start: int, end: int) -> None:
+    """Add filler messages spread over many other threads, numbered start..end."""
+    async with engine.begin() as conn:
+        await conn.execute(text("""
+            INSERT INTO chat_threads (id, user_id)
+            SELECT 'benchmark-filler-' || g, 'benchmark' FROM generate_series(0, :threads - 1) g
+            ON CONFLICT DO NOTHING
+        """), {"threads": FILLER_THREADS})
+        batch = 200000
+        for batch_start in range(start, end + 1, batch):
+            batch_end = min(batch_start + batch - 1, end)
+            await conn.execute(text("""
+                INSERT INTO chat_messages (id, thread_id, role, content, created_at)
+                SELECT md5('filler' || g), 'benchmark-filler-' || (g % :threads),
+                       CASE WHEN g % 2 = 0 THEN 'USER'::roleenum ELSE 'ASSISTANT'::roleenum END,
+                       'benchmark filler message ' || g,
+                       now() - interval '1 year' + (g % 31536000) * interval '1 second'
+                FROM generate_series(:start, :end) g
+            """), {"threads": FILLER_THREADS, "start": batch_start, "end": batch_end})
+        await conn.execute(text("ANALYZE chat_messages"))
+
+
+async def table_size() -> int:
+    async with engine.connect() as conn:
+        return (await conn.execute(text("SELECT count(*) FROM chat_messages"))).scalar_one()
+
+
+async def time_keyset_pages(page_size: int, repeats: int) -> dict:
+    """Walk the whole target thread once to collect cursors, then time the first and the deepest page."""
+    async with AsyncSessionLocal() as session:
+        service = ThreadService(session)
+        cursors = [None]
+        while True:
+            page = await service.list_messages(TARGET_THREAD_ID, page_size, cursors[-1])
+            if not page["has_more"]:
+                break
+            cursors.append(page["next_cursor"])
+
+        timings = {}
+        for label, cursor in (("keyset_first_ms", cursors[0]), ("keyset_deep_ms", cursors[-1])):
+            samples = []
+            for _ in range(repeats):
+                started_at = time.perf_counter()
+                await service.list_messages(TARGET_THREAD_ID, page_size, cursor)
+                samples.append((time.perf_counter() - started_at) * 1000)
+            timings[label] = statistics.median(samples)
+        timings["pages"] = len(cursors)
+        return timings
+
+
+async def time_offset_page(page_size: int, offset: int, repeats: int) -> float:
+    samples = []
+    async with engine.connect() as conn:
+        for _ in range(repeats):
+            started_at = time.perf_counter()
+            await conn.execute(text("""
+                SELECT * FROM chat_messages WHERE thread_id = :thread_id
+                ORDER BY created_at, id OFFSET :offset LIMIT :limit
+            """), {"thread_id": TARGET_THREAD_ID, "offset": offset, "limit": page_size + 1})
+            samples.append((time.perf_counter() - started_at) * 1000)
+    return statistics.median(samples)
+
+
+async def explain_page(page_size: int) -> str:
+    async with engine.connect() as conn:
+        rows = await conn.execute(text("""
+            EXPLAIN SELECT * FROM chat_messages WHERE thread_id = :thread_id
+            ORDER BY created_at, id LIMIT :limit
+        """), {"thread_id": TARGET_THREAD_ID, "limit": page_size + 1})
+        return "\n".join(f"    {row[0]}" for row in rows)
+
+
+async def cleanup() -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "DELETE FROM chat_messages WHERE thread_id IN (SELECT id FROM chat_threads WHERE user_id = 'benchmark')"
+        ))
+        await conn.execute(text("DELETE FROM chat_threads WHERE user_id = 'benchmark'"))
+
+
+async def run(args) -> None:
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    await seed_target_thread(args.thread_messages)
+
+    seeded = 0
+    results = []
+    try:
+        for size in sizes:
+            current = await table_size()
+            if current < size:
+                print(f"Growing chat_messages from {current:,} to {size:,} rows...")
+                await grow_table(seeded + 1, seeded + size - current)
+                seeded += size - current
+
+            timings = await time_keyset_pages(args.page_size, args.repeats)
+            deep_offset = (timings["pages"] - 1) * args.page_size
+            timings["offset_deep_ms"] = await time_offset_page(args.page_size, deep_offset, args.repeats)
+            timings["rows"] = await table_size()
+            results.append(timings)
+
+        print(f"\nQuery plan of a page:\n{await explain_page(args.page_size)}\n")
+        print(f"{'rows':>12} {'keyset first':>14} {'keyset deep':>13} {'offset deep':>13}")
+        for timings in results:
+            print(
+                f"{timings['rows']:>12,} {timings['keyset_first_ms']:>12.2f}ms {timings['keyset_deep_ms']:>11.2f}ms "
+                f"{timings['offset_deep_ms']:>11.2f}ms"
+            )
+        print(f"\nTarget thread: {args.thread_messages:,} messages, {args.page_size} per page, "
+              f"median of {args.repeats} runs.")
+    finally:
+        if not args.keep:
+            await cleanup()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000,3000000",
+                        help="Comma-separated chat_messages table sizes to measure at")
+    parser.add_argument("--thread-messages", type=int, default=5000, help="Messages in the paginated thread")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded rows afterwards")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run(args))
+    except Exception as e:
+        print(f"❌ Benchmark failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Compare the reranker backends on a held-out query set.
+Checks ranking parity of the int8 ONNX backend against the PyTorch baseline and benchmarks
+single-query latency and batched throughput of both.
+
+    python scripts/benchmark_reranker.py [--export] [--repeats 50]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.services.search.reranker import Reranker, export_onnx_int8_cross_encoder
+
+HOLDOUT_PATH = Path(__file__).parent / "data" / "reranker_holdout.json"
+
+
+def spearman(a, b):
+    """Spearman rank correlation without ties handling, enough for continuous scores."""
+    def ranks(values):
+        order = sorted(range(len(values)), key=lambda i: values[i])
+        result = [0] * len(values)
+        for rank, index in enumerate(order):
+            result[index] = rank
+        return result
+
+    ra, rb = ranks(a), ranks(b)
+    n = len(a)
+    if n < 2:
+        return 1.0
+    d2 = sum((x - y) ** 2 for x, y in zip(ra, rb))
+    return 1 - (6 * d2) / (n * (n * n - 1))
+
+
+def check_parity(baseline: Reranker, candidate: Reranker, holdout: list, top_k: int) -> dict:
+    abs_diffs, correlations, top1_agreement, topk_overlap = [], [], 0, []
+
+    for item in holdout:
+        pairs = [(item["query"], passage) for passage in item["passages"]]
+        base_scores = baseline.score(pairs)
+        cand_scores = candidate.score(pairs)
+
+        abs_diffs.extend(abs(x - y) for x, y in zip(base_scores, cand_scores))
+        correlations.append(spearman(base_scores, cand_scores))
+
+        base_order = sorted(range(len(pairs)), key=lambda i: base_scores[i], reverse=True)
+        cand_order = sorted(range(len(pairs)), key=lambda i: cand_scores[i], reverse=True)
+        top1_agreement += base_order[0] == cand_order[0]
+        topk_overlap.append(len(set(base_order[:top_k]) & set(cand_order[:top_k])) / min(top_k, len(pairs)))
+
+    return {
+        "queries": len(holdout),
+        "max_abs_score_diff": round(max(abs_diffs), 4),
+        "mean_abs_score_diff": round(statistics.mean(abs_diffs), 4),
+        "mean_spearman": round(statistics.mean(correlations), 4),
+        "top1_agreement": round(top1_agreement / len(holdout), 4),
+        f"mean_top{top_k}_overlap": round(statistics.mean(topk_overlap), 4),
+    }
+
+
+def benchmark(reranker: Reranker, holdout: list, repeats: int, batch_size: int) -> dict:
+    reranker.warmup()
+
+    # Latency: one query's pairs per call, as in a single chat request
+    latencies = []
+    for _ in range(repeats):
+        for item in holdout:
+            pairs = [(item["query"], passage) for passage in item["passages"]]
+            started_at = time.perf_counter()
+            reranker.score(pairs)
+            latencies.append(time.perf_counter() - started_at)
+    latencies.sort()
+
+    # Throughput: large batches, as produced by the rerank scheduler under load
+    all_pairs = [(item["query"], passage) for item in holdout for passage in item["passages"]]
+    batch = (all_pairs * (batch_size // len(all_pairs) + 1))[:batch_size]
+    started_at = time.perf_counter()
+    for _ in range(repeats):
+        reranker.score(batch, batch_size=batch_size)
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        "latency_p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "latency_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "throughput_pairs_per_second": round(repeats * batch_size / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--export", action="store_true", help="(Re)export the int8 ONNX model before benchmarking")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--min-spearman", type=float, default=0.95)
+    parser.add_argument("--min-top1-agreement", type=float, default=0.9)
+    args = parser.parse_args()
+
+    holdout = json.loads(HOLDOUT_PATH.read_text())
+
+    if args.export:
+        export_onnx_int8_cross_encoder()
+
+    print("🔧 Loading reranker backends...")
+    baseline = Reranker(backend="torch")
+    candidate = Reranker(backend="onnx-int8")
+
+    print("\n🔍 Parity (onnx-int8 vs torch)")
+    parity = check_parity(baseline, candidate, holdout, args.top_k)
+    print(json.dumps(parity, indent=2))
+
+    print("\n⏱️  Benchmark")
+    results = {
+        "torch": benchmark(baseline, holdout, args.repeats, args.batch_size),
+        "onnx-int8": benchmark(candidate, holdout, args.repeats, args.batch_size),
+    }
+    print(json.dumps(results, indent=2))
+
+    if parity["mean_spearman"] < args.min_spearman or parity["top1_agreement"] < args.min_top1_agreement:
+        print("\n❌ Parity check failed: the int8 ONNX backend reorders results too much.")
+        sys.exit(1)
+    print("\n✅ Parity check passed.")
+
+
+if __name__ == "__main__":
+    main()
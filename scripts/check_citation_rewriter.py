@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Check that the incremental citation rewriter matches a one-shot regex rewrite byte for byte,
+whichever chunk boundaries the LLM stream happens to produce.
+Every answer is split at every single offset and at every pair of offsets, and also fed one character at a time.
+
+    python scripts/check_citation_rewriter.py
+"""
+
+import itertools
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.prompts.citation_service import (
+    MARKER_PATTERN,
+    IncrementalCitationRewriter,
+    format_citation,
+)
+
+CITATION_MAP = {
+    "source1": {"marker": "[@source1]", "text": "", "metadata": {
+        "author": "SEM", "year": "2024", "title": "Residence permits", "url": "https://www.sem.admin.ch"}},
+    "source2": {"marker": "[@source2]", "text": "", "metadata": {"title": "Health insurance"}},
+    "source12": {"marker": "[@source12]", "text": "", "metadata": {
+        "author": "Canton of Zurich", "year": "2023", "title": "Registration"}},
+}
+
+ANSWERS = [
+    "A B permit is valid for one year [@source1].",
+    "[@source1][@source2] Back-to-back markers at the start.",
+    "Two digits [@source12] and an unknown one [@source7] stay apart.",
+    "Brackets that are not markers: [note], [@src], [@source], [@sourceX] and a trailing [@sour",
+    "Nested [[@source2]] and repeated [@source1] [@source1] markers.",
+    "Ends with a marker [@source2]",
+    "No markers at all.",
+    "",
+]
+
+
+def reference_rewrite(answer, citation_map):
+    """The batch regex rewrite the incremental path has to reproduce."""
+    entries = []
+
+    def replace(match):
+        citation = citation_map.get(match.group(0)[2:-1])
+        if not citation:
+            return match.group(0)
+        inline, bib_entry = format_citation(citation["metadata"])
+        entries.append(bib_entry)
+        return inline
+
+    return MARKER_PATTERN.sub(replace, answer), "\n".join(sorted(set(entries)))
+
+
+def rewrite_in_chunks(chunks, citation_map):
+    rewriter = IncrementalCitationRewriter(citation_map)
+    emitted = "".join(rewriter.feed(chunk) for chunk in chunks) + rewriter.flush()
+    if emitted != rewriter.text:
+        raise AssertionError("emitted text differs from accumulated text")
+    return emitted, rewriter.bibliography()
+
+
+def split_at(answer, offsets):
+    bounds = [0, *offsets, len(answer)]
+    return [answer[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def main():
+    failures = 0
+    checked = 0
+    for answer in ANSWERS:
+        expected = reference_rewrite(answer, CITATION_MAP)
+        splits = [list(answer)]
+        splits += [split_at(answer, offsets) for offsets in itertools.combinations(range(len(answer) + 1), 1)]
+        splits += [split_at(answer, offsets) for offsets in itertools.combinations(range(len(answer) + 1), 2)]
+
+        for chunks in splits:
+            checked += 1
+            actual = rewrite_in_chunks(chunks, CITATION_MAP)
+            if actual != expected:
+                failures += 1
+                if failures <= 10:
+                    print(f"❌ Mismatch for chunks {chunks!r}:\n   expected {expected!r}\n   got      {actual!r}")
+
+    if failures:
+        print(f"❌ {failures} of {checked} splits differ from the batch rewrite")
+        sys.exit(1)
+    print(f"✅ {checked} splits across {len(ANSWERS)} answers match the batch rewrite")
+
+
+if __name__ == "__main__":
+    main()
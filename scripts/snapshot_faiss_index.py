@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Snapshot the Qdrant collection into the memory-mapped FAISS index used when VECTOR_BACKEND=faiss.
+Run it before switching a deployment to the FAISS backend, or to compact the index after many re-ingestions.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+from qdrant_client import QdrantClient
+
+load_dotenv()
+
+from app.config.config import (
+    FAISS_INDEX_PATH,
+    FAISS_PAYLOAD_PATH,
+    FAISS_HNSW_M,
+    FAISS_EF_CONSTRUCTION,
+    FAISS_EF_SEARCH,
+)
+from app.services.search.faiss_store import FaissVectorStore
+
+
+def main(collection_name: str = "immigration_docs"):
+    client = QdrantClient(host="localhost", port=6333)
+    store = FaissVectorStore(
+        FAISS_INDEX_PATH,
+        FAISS_PAYLOAD_PATH,
+        hnsw_m=FAISS_HNSW_M,
+        ef_construction=FAISS_EF_CONSTRUCTION,
+        ef_search=FAISS_EF_SEARCH,
+    )
+
+    print(f"📦 Snapshotting '{collection_name}' into {FAISS_INDEX_PATH}...")
+    started_at = time.perf_counter()
+    mirrored = store.snapshot_from_qdrant(client, collection_name)
+    print(f"✅ Mirrored {mirrored} vectors in {time.perf_counter() - started_at:.1f}s")
+
+    started_at = time.perf_counter()
+    store.load()
+    print(f"⏱️  Memory-mapped load took {(time.perf_counter() - started_at) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])